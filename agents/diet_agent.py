@@ -1,113 +1,328 @@
-from typing import List
+from typing import Dict, List, Optional
 from google.genai import types
 from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
-from google.adk.runners import Runner   
-from models.diet_schemas import DietInput, DietResponse
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from models.diet_schemas import DietInput, DietResponse, DietBatchInput, DietBatchEntry, DietBatchResponse
+import asyncio
 import json
-from config.app_config import APP_NAME, USER_ID, MODEL_NAME, retry_config, session_service, SESSION_ID
+import logging
+from config.app_config import (
+    APP_NAME, USER_ID, MODEL_NAME, retry_config,
+    RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS, DIET_PACK_SIZE, REQUEST_DEADLINE_SECONDS,
+)
+from services.session_manager import request_session
+from services.agent_output import run_for_output
+from services.response_cache import ResponseCache, request_key
+from services.incremental_json import IncrementalJsonParser
+from services.deadline import deadline_scope, mark_degraded
+from services.model_gateway import answers_locally, build_model
+from services.admission import Overloaded
+from services.circuit_breaker import CircuitOpen
+from runner_manager import RunnerManager
+from agents.diet_rules import compatible_items as rule_compatible_items, is_known_diet
+from agents.prompts import build_instruction
+from agents.registry import get_agent
+
+# --- Local diet rules ---
+def _diet_source(callback_context: CallbackContext) -> Optional[DietInput]:
+    """
+    The items and diet the DietAgent is working on: the inventory stage's
+    output inside the pipeline, otherwise the DietInput user message.
+    """
+    inventory = callback_context.state.get("inventory_result")
+    if isinstance(inventory, dict) and "usable_items" in inventory:
+        return DietInput(items=inventory["usable_items"], diet=inventory.get("diet", "unknown"))
+    content = callback_context.user_content
+    if not content or not content.parts or not content.parts[0].text:
+        return None
+    try:
+        return DietInput.model_validate_json(content.parts[0].text)
+    except ValueError:
+        return None
 
-from dotenv import load_dotenv
 
-load_dotenv() # Load environment variables from .env file
+def enforce_diet_rules(callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+    """
+    after_model_callback: replace the model's compatible_items with the
+    deterministic result of the local diet engine for known diets.
+    The model's recipe ideas are kept as-is.
+    """
+    if llm_response.partial or not llm_response.content or not llm_response.content.parts:
+        return None
+    source = _diet_source(callback_context)
+    if source is None or not is_known_diet(source.diet):
+        return None
+
+    text = "".join(part.text for part in llm_response.content.parts if part.text and not part.thought)
+    try:
+        response = DietResponse.model_validate_json(text)
+    except ValueError:
+        return None
+
+    response.compatible_items = rule_compatible_items(source.items, source.diet)
+    llm_response.content = types.Content(
+        role="model",
+        parts=[types.Part(text=response.model_dump_json())]
+    )
+    return llm_response
+
+
+FALLBACK_RECIPE_IDEA = "Fallback recipe idea based on available items"
+
+
+def filter_locally_when_unavailable(
+    callback_context: CallbackContext, llm_request: LlmRequest, error: Exception
+) -> Optional[LlmResponse]:
+    """
+    on_model_error_callback: when the model call fails, runs out of time or
+    its circuit is open, answer with the local diet rules (all items for
+    unknown diets) and a generic idea instead of failing.
+    """
+    if not answers_locally(error):
+        return None
+    source = _diet_source(callback_context)
+    if source is None:
+        return None
+    mark_degraded("diet_agent")
+    known_diet = is_known_diet(source.diet)
+    response = DietResponse(
+        compatible_items=rule_compatible_items(source.items, source.diet) if known_diet else source.items,
+        suggested_recipe_ideas=[FALLBACK_RECIPE_IDEA]
+    )
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=response.model_dump_json())]))
+
 
 # --- Agent definition ---
-diet_agent = LlmAgent(
-    model=Gemini(
-        model=MODEL_NAME,
-        retry_options=retry_config
-    ),
-    name="diet_agent",
-    input_schema=DietInput,
-    output_schema=DietResponse,
-    output_key="diet_result",
-    description="Suggests diet-compatible items and recipe ideas.",
-    instruction = f"""
+# Agents are built on first use through agents/registry.py
+def build_diet_agent() -> LlmAgent:
+    return LlmAgent(
+        model=build_model("diet_agent"),
+        name="diet_agent",
+        input_schema=DietInput,
+        output_schema=DietResponse,
+        output_key="diet_result",
+        description="Suggests diet-compatible items and recipe ideas.",
+        instruction = build_instruction("diet_agent", """
     You are a nutrition assistant.
     The inventory agent will provide available items in JSON format like:
-    {{"items": ["tomato","chicken","spinach"], "diet": "vegan"}}.
+    {"items": ["tomato","chicken","spinach"], "diet": "vegan"}.
     - Filter items to only those compatible with the given diet.
     - Include 5 recipe ideas using only the compatible items.
-    Respond ONLY with a JSON object matching this exact schema:
-    {json.dumps(DietResponse.model_json_schema(), indent=2)}
+    """, DietResponse),
+        # Known diets: compatible_items is decided by local rules, not the model
+        after_model_callback=enforce_diet_rules,
+        on_model_error_callback=filter_locally_when_unavailable
+    )
+
+# --- Packed (multi-item) diet agent ---
+def keep_valid_entries(callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
     """
-)
+    after_model_callback for the packed agent: keep only the entries that
+    validate on their own, so one bad entry (or a truncated tail) does not
+    fail the whole pack. Requests without a valid entry are retried singly.
+    """
+    if llm_response.partial or not llm_response.content or not llm_response.content.parts:
+        return None
+    text = "".join(part.text for part in llm_response.content.parts if part.text and not part.thought)
 
-# --- Session + Runner setup ---
-diet_runner = Runner(
-    agent=diet_agent,
-    app_name=APP_NAME,
-    session_service=session_service
-)
+    entries = []
+    for kind, key, _, value in IncrementalJsonParser().feed(text):
+        if kind != "item" or key != "responses":
+            continue
+        try:
+            entries.append(DietBatchEntry.model_validate(value))
+        except ValueError:
+            continue
+
+    llm_response.content = types.Content(
+        role="model",
+        parts=[types.Part(text=DietBatchResponse(responses=entries).model_dump_json())]
+    )
+    return llm_response
+
+
+def build_packed_diet_agent() -> LlmAgent:
+    return LlmAgent(
+        model=build_model("packed_diet_agent"),
+        name="packed_diet_agent",
+        input_schema=DietBatchInput,
+        output_schema=DietBatchResponse,
+        output_key="diet_batch_result",
+        description="Answers several diet requests in one call.",
+        instruction = build_instruction("packed_diet_agent", """
+    You are a nutrition assistant.
+    You receive several independent requests in JSON format like:
+    {"requests": [{"items": ["tomato","chicken"], "diet": "vegan"}, {"items": ["rice"], "diet": "keto"}]}.
+    For EACH request, at its position index (0-based):
+    - Filter its items to only those compatible with its diet.
+    - Include 5 recipe ideas using only its compatible items.
+    Return one entry per request, tagged with its index.
+    """, DietBatchResponse),
+        after_model_callback=keep_valid_entries
+    )
+
+def __getattr__(name: str):
+    # diet_agent and packed_diet_agent are built on first access
+    if name in ("diet_agent", "packed_diet_agent"):
+        return get_agent(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Responses by canonical DietInput, shared with the /api/diet route
+diet_cache = ResponseCache("diet", RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS)
 
-# Assuming these are already defined/imported in your module:
-# session_service, diet_runner, diet_agent, APP_NAME, USER_ID
 async def run_diet(items: List[str], diet: str) -> DietResponse:
-    # Ensure session exists (shared session_id passed from pipeline)
-    # await session_service.create_session(
-    #     app_name=APP_NAME,
-    #     user_id=USER_ID,
-    #     session_id=SESSION_ID
-    # )
+    cache_key = request_key(DietInput(items=items, diet=diet))
+    cached = diet_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Known diets are filtered locally; the model is then only needed for ideas
+    known_diet = is_known_diet(diet)
+    candidates = rule_compatible_items(items, diet) if known_diet else items
+    if known_diet and not candidates:
+        return DietResponse(compatible_items=[], suggested_recipe_ideas=[])
 
     # Build user message from schema
-    query_json = DietInput(items=items, diet=diet).model_dump_json()
+    query_json = DietInput(items=candidates, diet=diet).model_dump_json()
     user_content = types.Content(role="user", parts=[types.Part(text=query_json)])
 
-    final_response_content = None
-    async for event in diet_runner.run_async(
-        user_id=USER_ID,
-        session_id=SESSION_ID,
-        new_message=user_content
-    ):
-        if event.is_final_response():
-            final_response_content = (
-                event.content.parts[0].text
-                if event.content and event.content.parts
-                else None
-            )
-
-    # Retrieve from session state via output_key
-    current_session = await session_service.get_session(
-        app_name=APP_NAME,
-        user_id=USER_ID,
-        session_id= SESSION_ID
-    )
+    # Each call runs in its own short-lived session (deleted on exit).
+    # The typed output comes straight from the final event, no re-parsing.
+    # If the time budget runs out or the model is down, the agent answers
+    # from the local rules.
+    diet_agent = get_agent("diet_agent")
+    with deadline_scope(REQUEST_DEADLINE_SECONDS) as deadline:
+        async with RunnerManager.invocation(diet_agent) as runner:
+            async with request_session(runner.session_service) as session_id:
+                result = await run_for_output(
+                    runner,
+                    diet_agent,
+                    user_id=USER_ID,
+                    session_id=session_id,
+                    new_message=user_content
+                )
 
-    stored_output = None
-    if current_session and diet_agent.output_key:
-        stored_output = current_session.state.get(diet_agent.output_key)
+    return _diet_response(cache_key, items, candidates, known_diet, result, cache=not deadline.degraded)
 
+def _diet_response(
+    cache_key: str,
+    items: List[str],
+    candidates: List[str],
+    known_diet: bool,
+    result: Optional[DietResponse],
+    cache: bool = True,
+) -> DietResponse:
+    """Merge the model's answer with the local rules and cache it (unless told not to)."""
     compatible_items, suggested_recipe_ideas = [], []
+    if result:
+        compatible_items = candidates if known_diet else result.compatible_items
+        suggested_recipe_ideas = result.suggested_recipe_ideas
 
-    # First try stored_output
-    if stored_output:
-        try:
-            parsed_output = (
-                json.loads(stored_output)
-                if isinstance(stored_output, str)
-                else stored_output
-            )
-            compatible_items = parsed_output.get("compatible_items", [])
-            suggested_recipe_ideas = parsed_output.get("suggested_recipe_ideas", [])
-        except (json.JSONDecodeError, AttributeError):
-            pass
-
-    # If still empty, try parsing final_response_content
-    if not compatible_items and final_response_content:
-        try:
-            parsed_output = json.loads(final_response_content)
-            compatible_items = parsed_output.get("compatible_items", [])
-            suggested_recipe_ideas = parsed_output.get("suggested_recipe_ideas", [])
-        except json.JSONDecodeError:
-            pass
-
-    # Fallback: if still empty, assume all items are compatible
+    # Fallback: if still empty, use the local rules (or assume all items
+    # are compatible for diets the rules do not know). Not cached.
     if not compatible_items and items:
-        compatible_items = items
-        suggested_recipe_ideas = ["Fallback recipe idea based on available items"]
+        return DietResponse(
+            compatible_items=candidates,
+            suggested_recipe_ideas=[FALLBACK_RECIPE_IDEA]
+        )
 
-    return DietResponse(
+    response = DietResponse(
         compatible_items=compatible_items,
         suggested_recipe_ideas=suggested_recipe_ideas
-    )
\ No newline at end of file
+    )
+    if cache:
+        diet_cache.put(cache_key, response)
+    return response
+
+async def _run_packed(inputs: List[DietInput]) -> Dict[int, DietResponse]:
+    """
+    Send several DietInputs in one packed model call.
+    Returns the valid answers by position; missing positions need a retry.
+    """
+    batch = DietBatchInput(requests=inputs)
+    user_content = types.Content(role="user", parts=[types.Part(text=batch.model_dump_json())])
+    try:
+        packed_diet_agent = get_agent("packed_diet_agent")
+        async with RunnerManager.invocation(packed_diet_agent) as runner:
+            async with request_session(runner.session_service) as session_id:
+                result = await run_for_output(
+                    runner,
+                    packed_diet_agent,
+                    user_id=USER_ID,
+                    session_id=session_id,
+                    new_message=user_content
+                )
+    except ValueError as e:
+        logging.warning("Packed diet response failed validation: %s", e)
+        result = None
+    except Exception as e:
+        # Calls shed by admission control surface as 503; after any other
+        # failure every position is retried singly (see run_diet_batch)
+        if isinstance(e, Overloaded) and not isinstance(e, CircuitOpen):
+            raise
+        logging.warning("Packed diet call gave up: %r", e)
+        result = None
+
+    answers: Dict[int, DietResponse] = {}
+    for entry in result.responses if result else []:
+        if 0 <= entry.index < len(inputs):
+            answers.setdefault(entry.index, DietResponse(
+                compatible_items=entry.compatible_items,
+                suggested_recipe_ideas=entry.suggested_recipe_ideas
+            ))
+    return answers
+
+async def run_diet_batch(requests: List[DietInput], pack_size: int = DIET_PACK_SIZE) -> List[DietResponse]:
+    """
+    Diet responses for many requests, in input order.
+
+    Each request is handled like run_diet (cache, local rules, fallback),
+    but the ones that need the model are deduplicated and packed, up to
+    pack_size per call, into a single prompt with an array-typed schema, so
+    the fixed instruction is paid once per pack instead of once per request.
+    A request whose packed answer is missing or invalid falls back to its
+    own run_diet call.
+    """
+    responses: List[Optional[DietResponse]] = [None] * len(requests)
+    pending: Dict[str, List[int]] = {}
+    prepared: Dict[str, tuple] = {}
+
+    for index, request in enumerate(requests):
+        cache_key = request_key(request)
+        cached = diet_cache.get(cache_key)
+        if cached is not None:
+            responses[index] = cached
+            continue
+        if cache_key not in prepared:
+            known_diet = is_known_diet(request.diet)
+            candidates = rule_compatible_items(request.items, request.diet) if known_diet else request.items
+            if known_diet and not candidates:
+                responses[index] = DietResponse(compatible_items=[], suggested_recipe_ideas=[])
+                continue
+            prepared[cache_key] = (request, candidates, known_diet)
+        pending.setdefault(cache_key, []).append(index)
+
+    async def run_pack(keys: List[str]) -> None:
+        inputs = [DietInput(items=prepared[key][1], diet=prepared[key][0].diet) for key in keys]
+        answers = await _run_packed(inputs)
+
+        async def resolve(position: int, key: str) -> None:
+            request, candidates, known_diet = prepared[key]
+            answer = answers.get(position)
+            if answer is None:
+                response = await run_diet(request.items, request.diet)
+            else:
+                response = _diet_response(key, request.items, candidates, known_diet, answer)
+            for index in pending[key]:
+                responses[index] = response
+
+        retries = len(keys) - len(answers)
+        if retries:
+            logging.info("Packed diet call answered %d/%d; retrying %d singly", len(answers), len(keys), retries)
+        await asyncio.gather(*(resolve(position, key) for position, key in enumerate(keys)))
+
+    keys = list(pending)
+    await asyncio.gather(*(run_pack(keys[i:i + pack_size]) for i in range(0, len(keys), pack_size)))
+    return responses
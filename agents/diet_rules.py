@@ -0,0 +1,205 @@
+"""
+Diet Rules Module
+-----------------
+
+Local, rule-based diet compatibility engine.
+
+Deciding whether "chicken breast" is vegan does not need a model call. This
+module keeps a small ingredient taxonomy, compiles it once into a compact
+index (ingredient phrase -> category bitmask) and defines each diet as the
+set of categories it forbids. Checking an item is then a few dictionary
+lookups and one bitwise AND, so compatible_items() runs in microseconds and
+the LLM is only needed for recipe ideas.
+
+Usage:
+    load_index()                                  # once, at startup
+    compatible_items(["tomato", "chicken breast"], "vegan")   # -> ["tomato"]
+"""
+
+from functools import lru_cache
+from typing import Dict, FrozenSet, List
+
+from agents.inventory_normalizer import normalize_item
+
+# --- Taxonomy: category -> ingredient phrases (singular, lower case) ---
+TAXONOMY: Dict[str, FrozenSet[str]] = {
+    "meat": frozenset({
+        "beef", "pork", "lamb", "mutton", "veal", "venison", "goat", "bacon", "ham",
+        "sausage", "salami", "pepperoni", "prosciutto", "chorizo", "steak", "mince",
+        "ground beef", "meatball", "hot dog", "jerky", "pancetta", "bison", "rabbit",
+    }),
+    "poultry": frozenset({
+        "chicken", "turkey", "duck", "goose", "quail", "chicken breast", "chicken thigh",
+    }),
+    "fish": frozenset({
+        "fish", "salmon", "tuna", "cod", "tilapia", "trout", "sardine", "anchovy",
+        "mackerel", "halibut", "haddock", "herring", "bass", "fish sauce",
+    }),
+    "shellfish": frozenset({
+        "shrimp", "prawn", "crab", "lobster", "clam", "mussel", "oyster", "scallop", "squid",
+    }),
+    "dairy": frozenset({
+        "milk", "cheese", "butter", "cream", "yogurt", "yoghurt", "ghee", "whey", "kefir",
+        "parmesan", "mozzarella", "cheddar", "feta", "ricotta", "brie", "mascarpone",
+        "sour cream", "cream cheese", "buttermilk", "custard", "ice cream",
+    }),
+    "egg": frozenset({"egg", "egg white", "egg yolk", "mayonnaise", "mayo", "meringue"}),
+    "honey": frozenset({"honey"}),
+    "gelatin": frozenset({"gelatin", "gelatine"}),
+    "gluten": frozenset({
+        "wheat", "flour", "bread", "pasta", "spaghetti", "noodle", "macaroni", "barley",
+        "rye", "couscous", "seitan", "cracker", "bulgur", "semolina", "farro", "spelt",
+        "breadcrumb", "tortilla", "pita", "bagel", "croissant", "soy sauce", "beer",
+    }),
+    "high_carb": frozenset({
+        "rice", "pasta", "spaghetti", "noodle", "bread", "potato", "sweet potato", "corn",
+        "oats", "oat", "quinoa", "flour", "sugar", "banana", "bean", "lentil", "chickpea",
+        "couscous", "tortilla", "cereal", "honey", "maple syrup", "pita", "bagel", "bulgur",
+        "macaroni", "cracker", "date", "raisin", "juice", "barley",
+    }),
+}
+
+# Phrases that override the word-level categories of their parts
+# ("almond milk" is not dairy, "rice flour" is not gluten, ...).
+PHRASE_OVERRIDES: Dict[str, FrozenSet[str]] = {
+    "almond milk": frozenset(), "oat milk": frozenset({"high_carb"}), "soy milk": frozenset(),
+    "coconut milk": frozenset(), "rice milk": frozenset({"high_carb"}), "coconut cream": frozenset(),
+    "peanut butter": frozenset(), "almond butter": frozenset(), "cocoa butter": frozenset(),
+    "rice flour": frozenset({"high_carb"}), "almond flour": frozenset(), "coconut flour": frozenset(),
+    "corn tortilla": frozenset({"high_carb"}), "rice noodle": frozenset({"high_carb"}),
+    "cauliflower rice": frozenset(), "tamari": frozenset(),
+    "butter bean": frozenset({"high_carb"}), "cream of tartar": frozenset(),
+    "beef tomato": frozenset(), "hot dog bun": frozenset({"gluten", "high_carb"}),
+}
+
+# Animal + product head noun: the product decides ("goat cheese" is dairy,
+# "duck egg" is egg), not the animal it came from
+PRODUCT_HEADS: Dict[FrozenSet[str], FrozenSet[str]] = {
+    frozenset({"goat", "sheep", "ewe", "cow", "buffalo", "camel"}):
+        frozenset({"cheese", "milk", "butter", "cream", "yogurt", "yoghurt", "kefir"}),
+    frozenset({"chicken", "duck", "goose", "quail", "turkey", "ostrich"}): frozenset({"egg"}),
+}
+
+# Qualifier words that cancel categories for the whole item ("vegan cheese")
+QUALIFIERS: Dict[str, FrozenSet[str]] = {
+    "vegan": frozenset({"meat", "poultry", "fish", "shellfish", "dairy", "egg", "honey", "gelatin"}),
+    "plant-based": frozenset({"meat", "poultry", "fish", "shellfish", "dairy", "egg"}),
+    "meatless": frozenset({"meat", "poultry"}),
+    "dairy-free": frozenset({"dairy"}),
+    "gluten-free": frozenset({"gluten"}),
+    "egg-free": frozenset({"egg"}),
+    "sugar-free": frozenset({"high_carb"}),
+}
+
+# --- Diets: the categories each one forbids ---
+ANIMAL = {"meat", "poultry", "fish", "shellfish", "gelatin"}
+DIET_RULES: Dict[str, FrozenSet[str]] = {
+    "omnivore": frozenset(),
+    "vegan": frozenset(ANIMAL | {"dairy", "egg", "honey"}),
+    "vegetarian": frozenset(ANIMAL),
+    "pescatarian": frozenset({"meat", "poultry", "gelatin"}),
+    "keto": frozenset({"high_carb"}),
+    "gluten-free": frozenset({"gluten"}),
+    "dairy-free": frozenset({"dairy"}),
+}
+DIET_ALIASES = {
+    "none": "omnivore", "any": "omnivore", "regular": "omnivore", "normal": "omnivore",
+    "ketogenic": "keto", "low-carb": "keto",
+    "celiac": "gluten-free", "lactose-free": "dairy-free",
+    "pescetarian": "pescatarian", "plant-based": "vegan",
+}
+
+CATEGORIES = tuple(sorted(TAXONOMY))
+CATEGORY_BITS = {name: 1 << i for i, name in enumerate(CATEGORIES)}
+MAX_PHRASE_WORDS = 3
+
+
+def _mask(categories) -> int:
+    mask = 0
+    for name in categories:
+        mask |= CATEGORY_BITS[name]
+    return mask
+
+
+@lru_cache(maxsize=1)
+def load_index() -> Dict[str, int]:
+    """
+    Compile the taxonomy into phrase -> category bitmask.
+    Built once per process (call at startup) and shared by all requests.
+    """
+    index: Dict[str, int] = {}
+    for category, phrases in TAXONOMY.items():
+        bit = CATEGORY_BITS[category]
+        for phrase in phrases:
+            index[phrase] = index.get(phrase, 0) | bit
+    for animals, heads in PRODUCT_HEADS.items():
+        for animal in animals:
+            for head in heads:
+                index[f"{animal} {head}"] = index[head]
+    for phrase, categories in PHRASE_OVERRIDES.items():
+        index[phrase] = _mask(categories)
+    return index
+
+
+DIET_MASKS = {diet: _mask(categories) for diet, categories in DIET_RULES.items()}
+QUALIFIER_MASKS = {word: _mask(categories) for word, categories in QUALIFIERS.items()}
+
+
+def normalize_diet(diet: str) -> str:
+    """Canonical diet name: 'Gluten Free' -> 'gluten-free', 'ketogenic' -> 'keto'."""
+    key = "-".join((diet or "").casefold().replace("_", " ").split())
+    return DIET_ALIASES.get(key, key)
+
+
+def is_known_diet(diet: str) -> bool:
+    """True if the engine has rules for this diet."""
+    return normalize_diet(diet) in DIET_MASKS
+
+
+@lru_cache(maxsize=4096)
+def item_mask(item: str) -> int:
+    """
+    Category bitmask of one ingredient.
+
+    The item is normalized like the inventory stage does, then covered
+    greedily with the longest known phrases ("chicken breast" before
+    "chicken"). Qualifiers such as "vegan" or "gluten-free" clear categories.
+    """
+    key = normalize_item(item) or ""
+    words = key.split(" ")
+    index = load_index()
+
+    mask, cleared, i = 0, 0, 0
+    while i < len(words):
+        if words[i] in QUALIFIER_MASKS:
+            cleared |= QUALIFIER_MASKS[words[i]]
+            i += 1
+            continue
+        for size in range(min(MAX_PHRASE_WORDS, len(words) - i), 0, -1):
+            phrase = " ".join(words[i:i + size])
+            if phrase in index:
+                mask |= index[phrase]
+                i += size
+                break
+        else:
+            i += 1
+    return mask & ~cleared
+
+
+def item_categories(item: str) -> List[str]:
+    """Names of the taxonomy categories an ingredient belongs to."""
+    mask = item_mask(item)
+    return [name for name in CATEGORIES if mask & CATEGORY_BITS[name]]
+
+
+def compatible_items(items: List[str], diet: str) -> List[str]:
+    """
+    Return the items allowed by the diet, in their original order and spelling.
+
+    Raises:
+        ValueError: if the diet is not known to the engine (see is_known_diet).
+    """
+    forbidden = DIET_MASKS.get(normalize_diet(diet))
+    if forbidden is None:
+        raise ValueError(f"Unknown diet: {diet}")
+    return [item for item in items if not item_mask(item) & forbidden]
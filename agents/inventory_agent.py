@@ -1,17 +1,27 @@
 # from models import InventoryResponse, InventoryInput
-from config.app_config import APP_NAME, USER_ID, MODEL_NAME, retry_config, session_service, SESSION_ID
-from typing import List
-import json, os, asyncio
+from config.app_config import (
+    APP_NAME, USER_ID, MODEL_NAME, retry_config, INVENTORY_LLM_CONFIDENCE,
+    RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS, REQUEST_DEADLINE_SECONDS,
+)
+from services.session_manager import request_session
+from runner_manager import RunnerManager
+from services.agent_output import run_for_output
+from services.response_cache import ResponseCache, request_key
+from services.deadline import deadline_scope, mark_degraded
+from services.model_gateway import answers_locally, build_model
+from typing import List, Optional
+import json, asyncio, logging
 from models.inventory_schemas import InventoryInput, InventoryResponse
+from agents.inventory_normalizer import normalize_inventory
+from agents.prompts import build_instruction
+from agents.registry import get_agent
 from pydantic import BaseModel, Field
-from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
-from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.events import Event, EventActions
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
 from google.genai import types
-from dotenv import load_dotenv
-
-load_dotenv() # Load environment variables from .env file
 
 # The Inventory Agent takes user input (a list of groceries) and checks this data, removing any unusable or blank entries. 
 # It then outputs a cleaned list of ingredients ready for the next step.
@@ -45,9 +55,7 @@ load_dotenv() # Load environment variables from .env file
 # SESSION_ID = "inventory_session"
 # MODEL_NAME = "gemini-2.5-flash-lite"
 
-API_KEY = os.getenv("GEMINI_API_KEY")
-if not API_KEY:
-    raise ValueError("Missing GEMINI_API_KEY in environment")
+# GEMINI_API_KEY is checked when the first agent is built (see agents/registry.py)
 
 
 """
@@ -62,91 +70,175 @@ Retry options automatically handle these failures by retrying the request with e
 #     http_status_codes=[429, 500, 503, 504], # Retry on these HTTP errors
 # )
 
+# --- Deadline fallback ---
+def clean_locally_when_unavailable(
+    callback_context: CallbackContext, llm_request: LlmRequest, error: Exception
+) -> Optional[LlmResponse]:
+    """
+    on_model_error_callback: when the model call fails, runs out of time or
+    its circuit is open, answer with the deterministic normalizer's
+    result instead of failing.
+    """
+    if not answers_locally(error):
+        return None
+    payload = _read_inventory_payload(callback_context.user_content)
+    if payload is None:
+        return None
+    mark_degraded("inventory_agent")
+    response = InventoryResponse(
+        usable_items=normalize_inventory(payload.items).items,
+        message=CLEANED_MESSAGE,
+        diet=payload.diet
+    )
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=response.model_dump_json())]))
+
+
 # --- Agent definition ---
-inventory_agent = LlmAgent(
-    model=Gemini(
-        model=MODEL_NAME,
-        retry_options=retry_config
-    ),
-    name="inventory_agent",
-    input_schema=InventoryInput,
-    output_schema=InventoryResponse,
-    output_key="inventory_result",
-    description="Filters unusable ingredients and returns a clean list.",
-    instruction=f"""You are a kitchen assistant.
-The user will provide the ingredient list and diet type in JSON format like {{"items": ["chicken","apple","??"], "diet": "keto"}}.
-Clean the ingredient list (trim whitespace, drop invalid entries) and pass the diet type forward unchanged.
-Respond ONLY with a JSON object matching this exact schema:
-{json.dumps(InventoryResponse.model_json_schema(), indent=2)}"""
-)
+# Agents are built on first use through agents/registry.py
+def build_inventory_agent() -> LlmAgent:
+    return LlmAgent(
+        model=build_model("inventory_agent"),
+        name="inventory_agent",
+        input_schema=InventoryInput,
+        output_schema=InventoryResponse,
+        output_key="inventory_result",
+        description="Filters unusable ingredients and returns a clean list.",
+        instruction=build_instruction("inventory_agent", """You are a kitchen assistant.
+The user will provide the ingredient list and diet type in JSON format like {"items": ["chicken","apple","??"], "diet": "keto"}.
+Clean the ingredient list (trim whitespace, drop invalid entries) and pass the diet type forward unchanged.""", InventoryResponse),
+        on_model_error_callback=clean_locally_when_unavailable
+    )
+
+# --- Local-first pipeline stage ---
+CLEANED_MESSAGE = "Filtered usable items successfully."
+
+
+def _read_inventory_payload(content: Optional[types.Content]) -> Optional[InventoryInput]:
+    """
+    Extract the pantry list from the pipeline's user message.
+    Accepts both {"items": [...]} (API payloads) and {"pantry_items": [...]}.
+    """
+    if not content or not content.parts or not content.parts[0].text:
+        return None
+    try:
+        data = json.loads(content.parts[0].text)
+        return InventoryInput(
+            items=data.get("items", data.get("pantry_items")),
+            diet=data.get("diet", "unknown")
+        )
+    except (json.JSONDecodeError, AttributeError, ValueError):
+        return None
+
+
+class LocalInventoryAgent(BaseAgent):
+    """
+    Inventory stage that cleans the pantry list with the deterministic
+    normalizer and only delegates to the LLM InventoryAgent when the rules
+    are not confident (or the input cannot be read).
+
+    It emits the same final event as the LlmAgent would: the JSON response as
+    content and the validated output under output_key, so downstream agents
+    and output_from_event() see no difference.
+    """
+    llm_fallback: LlmAgent
+    output_key: str = "inventory_result"
+    output_schema: type[BaseModel] = InventoryResponse
+    min_confidence: float = INVENTORY_LLM_CONFIDENCE
+
+    async def _run_async_impl(self, ctx):
+        payload = _read_inventory_payload(ctx.user_content)
+        if payload is not None:
+            normalized = normalize_inventory(payload.items)
+            if normalized.confidence >= self.min_confidence:
+                response = InventoryResponse(
+                    usable_items=normalized.items,
+                    message=CLEANED_MESSAGE,
+                    diet=payload.diet
+                )
+                yield Event(
+                    invocation_id=ctx.invocation_id,
+                    author=self.name,
+                    branch=ctx.branch,
+                    content=types.Content(role="model", parts=[types.Part(text=response.model_dump_json())]),
+                    actions=EventActions(state_delta={self.output_key: response.model_dump()}),
+                )
+                return
+
+        # Low confidence: let the model clean the list
+        async for event in self.llm_fallback.run_async(ctx):
+            yield event
+
+
+def build_inventory_stage() -> LocalInventoryAgent:
+    # Same name as the LLM agent so the pipeline's events look the same either way
+    return LocalInventoryAgent(
+        name="inventory_agent",
+        llm_fallback=get_agent("inventory_agent"),
+        description="Cleans the ingredient list locally, using the LLM only when unsure.",
+    )
 
-# --- Session + Runner setup ---
-# session_service = InMemorySessionService()
 
-inventory_runner = Runner(
-    agent=inventory_agent,
-    app_name=APP_NAME,
-    session_service=session_service
-)
+def __getattr__(name: str):
+    # inventory_agent and inventory_stage are built on first access
+    if name in ("inventory_agent", "inventory_stage"):
+        return get_agent(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Responses by canonical InventoryInput (only the model path is worth caching)
+inventory_cache = ResponseCache("inventory", RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS)
 
 async def run_inventory(items: List[str], diet: str = "unknown") -> InventoryResponse:
 
+    # Deterministic cleaning first; the model is only called when the rules are unsure
+    normalized = normalize_inventory(items)
+    if normalized.confidence >= INVENTORY_LLM_CONFIDENCE:
+        return InventoryResponse(
+            usable_items=normalized.items,
+            message=CLEANED_MESSAGE,
+            diet=diet
+        )
+
+    cache_key = request_key(InventoryInput(items=items, diet=diet))
+    cached = inventory_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     # Build user message from schema (include diet to satisfy Pydantic)
     query_json = InventoryInput(items=items, diet=diet).model_dump_json()
     user_content = types.Content(role="user", parts=[types.Part(text=query_json)])
 
-    final_response_content = None
-    async for event in inventory_runner.run_async(
-        user_id=USER_ID,
-        session_id=SESSION_ID,
-        new_message=user_content
-    ):
-        if event.is_final_response() and event.content and event.content.parts:
-            final_response_content = event.content.parts[0].text
-
-    print(f"<<< Agent Response: {final_response_content}")
-
-    # Retrieve from session state via output_key
-    current_session = await session_service.get_session(
-        app_name=APP_NAME,
-        user_id=USER_ID,
-        session_id=SESSION_ID
-    )
-
-    stored_output = None
-    if current_session and inventory_agent.output_key:
-        stored_output = current_session.state.get(inventory_agent.output_key)
-
-    usable_items = []
-
-    # First try stored_output
-    if stored_output:
-        if isinstance(stored_output, str):
-            try:
-                parsed_output = json.loads(stored_output)
-                usable_items = parsed_output.get("usable_items", [])
-            except json.JSONDecodeError:
-                pass
-        elif isinstance(stored_output, dict):
-            usable_items = stored_output.get("usable_items", [])
-
-    # If still empty, try parsing final_response_content
-    if not usable_items and final_response_content:
-        try:
-            parsed_output = json.loads(final_response_content)
-            usable_items = parsed_output.get("usable_items", [])
-        except json.JSONDecodeError:
-            pass
-
-    # Fallback: return original items if agent gave nothing
+    # Each call runs in its own short-lived session (deleted on exit).
+    # The typed output comes straight from the final event, no re-parsing.
+    # If the time budget runs out or the model is down, the agent answers
+    # with the local result.
+    inventory_agent = get_agent("inventory_agent")
+    with deadline_scope(REQUEST_DEADLINE_SECONDS) as deadline:
+        async with RunnerManager.invocation(inventory_agent) as runner:
+            async with request_session(runner.session_service) as session_id:
+                result = await run_for_output(
+                    runner,
+                    inventory_agent,
+                    user_id=USER_ID,
+                    session_id=session_id,
+                    new_message=user_content
+                )
+
+    logging.debug("Inventory agent response: %s", result)
+
+    usable_items = result.usable_items if result else []
+
+    # Fallback: use the deterministic result if agent gave nothing
     if not usable_items and items:
-        usable_items = [i.strip() for i in items if i.strip()]
-        
-    return InventoryResponse(
+        usable_items = normalized.items
+
+    response = InventoryResponse(
         usable_items=usable_items,
-        message="Filtered usable items successfully.",
+        message=CLEANED_MESSAGE,
         diet=diet
     )
+    if result and not deadline.degraded:
+        inventory_cache.put(cache_key, response)
+    return response
 
 
 # --- Quick test harness ---
@@ -0,0 +1,174 @@
+"""
+Inventory Normalizer Module
+---------------------------
+
+Deterministic, pure-Python cleaning of raw pantry entries.
+
+This does what the InventoryAgent used to ask Gemini for, without a model
+round trip:
+    - trims and collapses whitespace, case-folds
+    - strips quantities and units ("2 lbs chicken breast" -> "chicken breast")
+    - drops blank and garbage entries ("", " ", "??", "n/a")
+    - merges plural/singular forms ("tomatoes" + "tomato" -> "tomato")
+    - removes duplicates while keeping the original order
+
+Each result carries a confidence score: the share of entries the rules could
+handle unambiguously. Callers fall back to the LLM only when it is low.
+
+Example:
+    >>> normalize_inventory(["2 lbs Chicken Breast", "tomatoes", "Tomato", "??"]).items
+    ['chicken breast', 'tomato']
+"""
+
+import re
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+# Units and container words that may follow a leading quantity
+UNITS = {
+    "lb", "lbs", "pound", "pounds", "oz", "ounce", "ounces",
+    "g", "gr", "gram", "grams", "kg", "kgs", "kilo", "kilos", "kilogram", "kilograms",
+    "ml", "l", "liter", "liters", "litre", "litres",
+    "cup", "cups", "tbsp", "tbsps", "tablespoon", "tablespoons", "tsp", "tsps", "teaspoon", "teaspoons",
+    "clove", "cloves", "can", "cans", "tin", "tins", "jar", "jars", "bottle", "bottles",
+    "bunch", "bunches", "head", "heads", "piece", "pieces", "pc", "pcs", "slice", "slices",
+    "stick", "sticks", "pack", "packs", "package", "packages", "bag", "bags", "box", "boxes",
+    "pinch", "pinches", "handful", "handfuls", "dozen", "x",
+}
+
+# Spelled-out quantities that may start an entry ("a dozen eggs", "two onions")
+QUANTITY_WORDS = {
+    "a", "an", "some", "few", "several", "one", "two", "three", "four", "five",
+    "six", "seven", "eight", "nine", "ten", "couple",
+}
+
+# Entries that carry no ingredient at all
+JUNK_WORDS = {
+    "n/a", "na", "none", "null", "nil", "nothing", "unknown", "undefined",
+    "test", "asdf", "xxx", "tbd", "todo", "-", "?",
+}
+
+# Words whose plural form is irregular or that must not be singularized
+IRREGULAR_SINGULARS = {
+    "leaves": "leaf", "loaves": "loaf", "halves": "half", "knives": "knife",
+    "cookies": "cookie", "brownies": "brownie", "pies": "pie", "ties": "tie",
+    "potatoes": "potato", "tomatoes": "tomato", "mangoes": "mango",
+}
+UNCOUNTABLE = {
+    "hummus", "asparagus", "couscous", "molasses", "oats", "grits", "greens",
+    "citrus", "swiss", "brussels", "series", "species", "chips", "fries",
+}
+
+QUANTITY_RE = re.compile(
+    r"^(?:\d+(?:[.,]\d+)?(?:\s*(?:/|-|to)\s*\d+(?:[.,]\d+)?)?|[¼-¾⅐-⅞])"
+)
+ATTACHED_UNIT_RE = re.compile(r"^(\d+(?:[.,]\d+)?)([a-z]+)$")
+PARENTHETICAL_RE = re.compile(r"\([^)]*\)")
+WHITESPACE_RE = re.compile(r"\s+")
+PLAUSIBLE_RE = re.compile(r"^[^\W\d_]+(?:[ '&-][^\W\d_]+)*$")
+
+MAX_PLAUSIBLE_WORDS = 4
+MAX_PLAUSIBLE_LENGTH = 40
+
+
+class NormalizedInventory(BaseModel):
+    """Result of deterministic inventory cleaning."""
+    items: List[str] = Field(..., description="Cleaned, deduplicated ingredient names")
+    dropped: List[str] = Field(default_factory=list, description="Raw entries discarded as blank or junk")
+    ambiguous: List[str] = Field(default_factory=list, description="Kept entries the rules were unsure about")
+    confidence: float = Field(..., description="Share of entries handled unambiguously, 0.0 - 1.0")
+
+
+def singularize(word: str) -> str:
+    """Best-effort English singular for a single ingredient word."""
+    if word in UNCOUNTABLE or len(word) <= 3:
+        return word
+    if word in IRREGULAR_SINGULARS:
+        return IRREGULAR_SINGULARS[word]
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("ches", "shes", "xes", "zes", "sses")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def strip_quantity(text: str) -> str:
+    """Remove a leading quantity and unit: '2 lbs chicken breast' -> 'chicken breast'."""
+    words = text.split(" ")
+
+    # Leading amount(s): "2", "1/2", "1 1/2", "2-3", "1.5", "½", "500g", "a", "two"
+    while len(words) > 1:
+        attached = ATTACHED_UNIT_RE.match(words[0])
+        if (
+            QUANTITY_RE.fullmatch(words[0])
+            or words[0] in QUANTITY_WORDS
+            or (attached and attached.group(2) in UNITS)
+        ):
+            words = words[1:]
+        else:
+            break
+
+    # Optional unit(s) and "of": "cups of rice", "dozen eggs", "x eggs"
+    while len(words) > 1 and words[0] in UNITS:
+        words = words[1:]
+    if len(words) > 1 and words[0] == "of":
+        words = words[1:]
+
+    return " ".join(words)
+
+
+def normalize_item(raw: str) -> Optional[str]:
+    """
+    Normalize one raw pantry entry.
+    Returns None for blank or junk entries.
+    """
+    text = PARENTHETICAL_RE.sub(" ", raw or "")
+    text = WHITESPACE_RE.sub(" ", text).strip().casefold().strip(" .,;:!*")
+    if not text or text in JUNK_WORDS or not any(ch.isalpha() for ch in text):
+        return None
+
+    text = strip_quantity(text)
+    if text in JUNK_WORDS:
+        return None
+
+    # Merge plural/singular forms on the head noun: "cherry tomatoes" -> "cherry tomato"
+    words = text.split(" ")
+    words[-1] = singularize(words[-1])
+    return " ".join(words)
+
+
+def is_plausible(item: str) -> bool:
+    """True if a normalized item looks like a plain ingredient name."""
+    return (
+        len(item) <= MAX_PLAUSIBLE_LENGTH
+        and len(item.split(" ")) <= MAX_PLAUSIBLE_WORDS
+        and bool(PLAUSIBLE_RE.match(item))
+    )
+
+
+def normalize_inventory(items: List[str]) -> NormalizedInventory:
+    """
+    Clean a raw pantry list deterministically.
+
+    Confidence is the share of raw entries that were either confidently
+    dropped as junk or normalized into a plausible ingredient name. An empty
+    input has confidence 1.0.
+    """
+    cleaned, dropped, ambiguous = [], [], []
+    seen = set()
+
+    for raw in items:
+        item = normalize_item(raw)
+        if item is None:
+            dropped.append(raw)
+            continue
+        if not is_plausible(item):
+            ambiguous.append(item)
+        if item not in seen:
+            seen.add(item)
+            cleaned.append(item)
+
+    confidence = 1.0 - (len(ambiguous) / len(items)) if items else 1.0
+    return NormalizedInventory(items=cleaned, dropped=dropped, ambiguous=ambiguous, confidence=confidence)
@@ -1,125 +1,298 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional, Tuple
 from pydantic import BaseModel, Field
 from google.genai import types
 from google.adk.agents import LlmAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
 from google.adk import Agent
-from google.adk.models.google_llm import Gemini
-from google.adk.runners import Runner
-from google.adk.tools import google_search
+import asyncio
 import json
-from models.planner_schemas import PlannerInput, PlannerResponse
-from config.app_config import APP_NAME, USER_ID, MODEL_NAME, retry_config, session_service, SESSION_ID
-from dotenv import load_dotenv
-
-load_dotenv() # Load environment variables from .env file
+import logging
+from models.planner_schemas import PlannerInput, PlannerResponse, Step
+from config.app_config import (
+    APP_NAME, USER_ID, MODEL_NAME, retry_config,
+    RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS, PLANNER_FANOUT_K, REQUEST_DEADLINE_SECONDS,
+)
+from services.session_manager import request_session
+from runner_manager import RunnerManager
+from services.agent_output import run_for_output
+from services.response_cache import ResponseCache, request_key
+from services.deadline import deadline_scope, mark_degraded, track_degraded
+from services.model_gateway import FALLBACK_ERRORS, answers_locally, build_model
+from agents.planner_stream import recipe_from_prefix
+from agents.prompts import build_instruction
+from agents.inventory_normalizer import normalize_item
+from agents.diet_agent import FALLBACK_RECIPE_IDEA
+from agents.registry import get_agent
 
 # async def search_tool(query: str):
 #     return await google_search({"query": query})
 
-planner_agent = Agent(
-    model=Gemini(
-        model=MODEL_NAME,
-        retry_options=retry_config
-    ),
-    name="planner_agent",
-    input_schema=PlannerInput,
-    output_schema=PlannerResponse,
-    output_key="planner_result",
-    # tools=[google_search],
-    # tools=[search_tool],
-    description="Chooses the best recipe idea and expands it into a full recipe.",
-    instruction = f"""
+def repair_planner_output(callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+    """
+    after_model_callback: if the final response does not match
+    PlannerResponse (e.g. a truncated or malformed tail), keep the valid
+    prefix instead of failing the whole run on schema validation.
+    """
+    if llm_response.partial or not llm_response.content or not llm_response.content.parts:
+        return None
+    text = "".join(part.text for part in llm_response.content.parts if part.text and not part.thought)
+    try:
+        PlannerResponse.model_validate_json(text)
+        return None
+    except ValueError:
+        recipe = recipe_from_prefix(text)
+
+    if recipe is None:
+        return None
+    logging.warning("Planner output was invalid; kept %d valid steps", len(recipe.steps))
+    llm_response.content = types.Content(
+        role="model",
+        parts=[types.Part(text=recipe.model_dump_json())]
+    )
+    return llm_response
+
+def template_recipe(compatible_items: List[str], suggested_recipe_ideas: List[str]) -> PlannerResponse:
+    """
+    A generic recipe built without the model: the first real idea (or the
+    items) as title, every compatible item as an ingredient and stock steps.
+    """
+    items = [item for item in compatible_items if item.strip()]
+    ideas = [idea for idea in suggested_recipe_ideas if idea.strip() and idea != FALLBACK_RECIPE_IDEA]
+    title = ideas[0] if ideas else (f"Simple {', '.join(items[:3])} skillet" if items else "")
+    if not items:
+        return PlannerResponse(title=title, ingredients=[], steps=[])
+    listed = ", ".join(items)
+    instructions = [
+        f"Wash and prepare the ingredients: {listed}.",
+        "Cut everything into bite-sized pieces.",
+        "Heat a pan over medium heat and cook the ingredients, starting with those that take longest, until tender.",
+        "Season to taste and serve warm.",
+    ]
+    return PlannerResponse(
+        title=title,
+        ingredients=items,
+        steps=[Step(step_number=n, instruction=text) for n, text in enumerate(instructions, start=1)],
+    )
+
+def _planner_source(callback_context: CallbackContext) -> Optional[PlannerInput]:
+    """
+    What the PlannerAgent is working on: the diet stage's output inside the
+    pipeline, otherwise the PlannerInput user message.
+    """
+    diet_result = callback_context.state.get("diet_result")
+    if isinstance(diet_result, dict) and "compatible_items" in diet_result:
+        inventory = callback_context.state.get("inventory_result") or {}
+        return PlannerInput(
+            compatible_items=diet_result["compatible_items"],
+            suggested_recipe_ideas=diet_result.get("suggested_recipe_ideas", []),
+            diet=inventory.get("diet", "unknown"),
+        )
+    content = callback_context.user_content
+    if not content or not content.parts or not content.parts[0].text:
+        return None
+    try:
+        return PlannerInput.model_validate_json(content.parts[0].text)
+    except ValueError:
+        return None
+
+def plan_locally_when_unavailable(
+    callback_context: CallbackContext, llm_request: LlmRequest, error: Exception
+) -> Optional[LlmResponse]:
+    """
+    on_model_error_callback: when the model call fails, runs out of time or
+    its circuit is open, answer with template_recipe instead of failing.
+    """
+    if not answers_locally(error):
+        return None
+    source = _planner_source(callback_context)
+    if source is None:
+        return None
+    mark_degraded("planner_agent")
+    recipe = template_recipe(source.compatible_items, source.suggested_recipe_ideas)
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=recipe.model_dump_json())]))
+
+# Agents are built on first use through agents/registry.py
+def build_planner_agent() -> Agent:
+    return Agent(
+        model=build_model("planner_agent"),
+        name="planner_agent",
+        input_schema=PlannerInput,
+        output_schema=PlannerResponse,
+        output_key="planner_result",
+        after_model_callback=repair_planner_output,
+        on_model_error_callback=plan_locally_when_unavailable,
+        # tools=[google_search],
+        # tools=[search_tool],
+        description="Chooses the best recipe idea and expands it into a full recipe.",
+        instruction = build_instruction("planner_agent", """
 You are a kitchen assistant.
 The diet agent will provide compatible items and recipe ideas in JSON format like:
-{{
-  "compatible_items": ["tomato","spinach"],
-  "suggested_recipe_ideas": ["Vegan Tomato Soup","Spinach Salad","Tomato-Spinach Pasta"],
-  "diet": "vegan"
-}}.
+{"compatible_items": ["tomato","spinach"], "suggested_recipe_ideas": ["Vegan Tomato Soup","Spinach Salad"], "diet": "vegan"}.
 - Choose the best recipe idea from the list.
 - Expand it into a complete recipe with title, ingredients, and step-by-step instructions.
-Respond ONLY with a JSON object matching this exact schema:
-{json.dumps(PlannerResponse.model_json_schema(), indent=2)}
-"""
-##### AFC is always active because the SDK enforces it whenever tools are attached. 
-##### It’s not the prompt or the agent design — it’s the runtime’s default. 
-##### That’s why the course demos worked (different environment, no AFC enforcement), but our test fail.
-##### conceptually, an agent should be able to “choose its workflow.” But in ADK, that choice lives in 
-##### the orchestration layer, not inside the agent itself. That’s why you felt blocked — 
-##### you were trying to make PlannerAgent both schema‑bound and tool‑driven. Splitting them is the way forward.
-#     instruction = f"""
-# You are a kitchen assistant.
-# The diet agent will provide compatible items and recipe ideas in JSON format like:
-# {{
-#   "compatible_items": ["tomato","spinach"],
-#   "suggested_recipe_ideas": ["Vegan Tomato Soup","Spinach Salad","Tomato-Spinach Pasta"],
-#   "diet": "vegan"
-# }}.
-# - Choose the best recipe idea from the list.
-# - Use the google_search tool if needed to enrich the recipe with realistic ingredients and cooking steps.
-# - Expand it into a complete recipe with title, ingredients, and step-by-step instructions.
-# Respond ONLY with a JSON object matching this exact schema:
-# {json.dumps(PlannerResponse.model_json_schema(), indent=2)}
-# """
-)
+""", PlannerResponse)
+    ##### AFC is always active because the SDK enforces it whenever tools are attached. 
+    ##### It’s not the prompt or the agent design — it’s the runtime’s default. 
+    ##### That’s why the course demos worked (different environment, no AFC enforcement), but our test fail.
+    ##### conceptually, an agent should be able to “choose its workflow.” But in ADK, that choice lives in 
+    ##### the orchestration layer, not inside the agent itself. That’s why you felt blocked — 
+    ##### you were trying to make PlannerAgent both schema‑bound and tool‑driven. Splitting them is the way forward.
+    #     instruction = f"""
+    # You are a kitchen assistant.
+    # The diet agent will provide compatible items and recipe ideas in JSON format like:
+    # {{
+    #   "compatible_items": ["tomato","spinach"],
+    #   "suggested_recipe_ideas": ["Vegan Tomato Soup","Spinach Salad","Tomato-Spinach Pasta"],
+    #   "diet": "vegan"
+    # }}.
+    # - Choose the best recipe idea from the list.
+    # - Use the google_search tool if needed to enrich the recipe with realistic ingredients and cooking steps.
+    # - Expand it into a complete recipe with title, ingredients, and step-by-step instructions.
+    # Respond ONLY with a JSON object matching this exact schema:
+    # {json.dumps(PlannerResponse.model_json_schema(), indent=2)}
+    # """
+    )
 
-planner_runner = Runner(
-    agent=planner_agent,
-    app_name=APP_NAME,
-    session_service=session_service
-)
+def __getattr__(name: str):
+    # planner_agent is built on first access
+    if name == "planner_agent":
+        return get_agent(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Responses by canonical PlannerInput
+planner_cache = ResponseCache("planner", RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS)
 
 async def run_planner(compatible_items: List[str], suggested_recipe_ideas: List[str], diet: str) -> PlannerResponse:
-    # Build user message from schema
-    query_json = PlannerInput(
+    planner_input = PlannerInput(
         compatible_items=compatible_items,
         suggested_recipe_ideas=suggested_recipe_ideas,
         diet=diet
-    ).model_dump_json()
+    )
+    cache_key = request_key(planner_input)
+    cached = planner_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Build user message from schema
+    query_json = planner_input.model_dump_json()
 
     user_content = types.Content(role="user", parts=[types.Part(text=query_json)])
 
-    # Run agent asynchronously
-    async for event in planner_runner.run_async(
-        user_id=USER_ID,
-        session_id=SESSION_ID,
-        new_message=user_content
-    ):
-        if event.is_final_response():
-            final_response_content = (
-                event.content.parts[0].text
-                if event.content and event.content.parts
-                else None
-            )
-
-    # Retrieve from session state via output_key
-    current_session = await session_service.get_session(
-        app_name=APP_NAME,
-        user_id=USER_ID,
-        session_id=SESSION_ID
+    # Each call runs in its own short-lived session (deleted on exit).
+    # The typed output comes straight from the final event, no re-parsing.
+    planner_agent = get_agent("planner_agent")
+    try:
+        with deadline_scope(REQUEST_DEADLINE_SECONDS) as deadline:
+            async with RunnerManager.invocation(planner_agent) as runner:
+                async with request_session(runner.session_service) as session_id:
+                    result = await run_for_output(
+                        runner,
+                        planner_agent,
+                        user_id=USER_ID,
+                        session_id=session_id,
+                        new_message=user_content
+                    )
+    except FALLBACK_ERRORS as e:
+        logging.warning("Planner gave up: %s", e)
+        mark_degraded("planner_agent")
+        result = None
+
+    if result:
+        # A template answered during an outage must not outlive it
+        if not deadline.degraded:
+            planner_cache.put(cache_key, result)
+        return result
+
+    # Nothing usable came back: return an empty recipe
+    return PlannerResponse(
+        title="",
+        ingredients=[],
+        steps=[]
     )
 
-    stored_output = None
-    if current_session and planner_agent.output_key:
-        stored_output = current_session.state.get(planner_agent.output_key)
+# --- Parallel planner (fan-out over several ideas) ---
+FANOUT_MODES = ("first", "ranked")
 
-    title, ingredients, steps = "", [], []
-    if stored_output:
-        try:
-            parsed_output = (
-                json.loads(stored_output)
-                if isinstance(stored_output, str)
-                else stored_output
-            )
-            title = parsed_output.get("title", "")
-            ingredients = parsed_output.get("ingredients", [])
-            steps = parsed_output.get("steps", [])
-        except (json.JSONDecodeError, AttributeError):
-            pass
+def is_valid_plan(recipe: PlannerResponse) -> bool:
+    """A plan is usable if it has a title and at least one step."""
+    return bool(recipe.title.strip() and recipe.steps)
 
-    return PlannerResponse(
-        title=title,
-        ingredients=ingredients,
-        steps=steps
+def plan_score(recipe: PlannerResponse, compatible_items: List[str]) -> Tuple[float, int]:
+    """
+    Ranking key of a plan: the share of its ingredients that come from the
+    diet-safe pantry, then its number of steps.
+    """
+    pantry = {normalize_item(item) for item in compatible_items} - {None}
+    ingredients = [normalize_item(item) or "" for item in recipe.ingredients]
+    matched = sum(
+        1 for ingredient in ingredients
+        if any(f" {name} " in f" {ingredient} " for name in pantry)
     )
+    coverage = matched / len(ingredients) if ingredients else 0.0
+    return coverage, len(recipe.steps)
+
+async def run_planner_fanout(
+    compatible_items: List[str],
+    suggested_recipe_ideas: List[str],
+    diet: str,
+    top_k: int = PLANNER_FANOUT_K,
+    mode: str = "ranked",
+) -> List[PlannerResponse]:
+    """
+    Expand the top_k recipe ideas concurrently, each in its own planner
+    call and session, instead of letting the planner pick a single idea.
+
+    mode="first": return the first valid plan to arrive (hedged latency);
+                  the other calls are cancelled.
+    mode="ranked": wait for all and return the valid plans, best first
+                   (see plan_score; ties keep the ideas' order).
+    Invalid, failed or degraded (templated) expansions are dropped, so the
+    list may be empty. The expansions share one request deadline.
+    """
+    if mode not in FANOUT_MODES:
+        raise ValueError(f"Unknown fan-out mode '{mode}'; expected one of {FANOUT_MODES}")
+    ideas = list(dict.fromkeys(idea for idea in suggested_recipe_ideas if idea.strip()))[:top_k]
+    if not ideas:
+        return []
+
+    async def expand(idea: str) -> Optional[PlannerResponse]:
+        with track_degraded() as degraded:
+            recipe = await run_planner(compatible_items, [idea], diet)
+        if degraded:
+            logging.warning("Planner fan-out call for '%s' was degraded (%s); dropped", idea, sorted(degraded))
+            return None
+        return recipe if is_valid_plan(recipe) else None
+
+    with deadline_scope(REQUEST_DEADLINE_SECONDS):
+        tasks = [asyncio.create_task(expand(idea)) for idea in ideas]
+
+    if mode == "first":
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    recipe = await next_done
+                except Exception as e:
+                    logging.warning("Planner fan-out call failed: %r", e)
+                    continue
+                if recipe is not None:
+                    return [recipe]
+            return []
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    plans = []
+    for idea, result in zip(ideas, results):
+        if isinstance(result, Exception):
+            logging.warning("Planner fan-out call for '%s' failed: %r", idea, result)
+        elif result is not None:
+            plans.append(result)
+    # sort() is stable, so equal scores keep the ideas' order
+    plans.sort(key=lambda recipe: plan_score(recipe, compatible_items), reverse=True)
+    return plans
+
@@ -0,0 +1,96 @@
+"""
+Planner Stream Module
+---------------------
+
+Turns the PlannerAgent's streamed JSON into validated recipe pieces while
+the model is still writing.
+
+PlannerStreamParser feeds each chunk to an IncrementalJsonParser and checks
+every completed piece against the schema in models/planner_schemas.py: the
+title as soon as its string closes, each ingredient and each Step as soon
+as it closes. Steps can be sent to the client before later steps exist, and
+a malformed or truncated tail only loses the pieces it touches: result()
+rebuilds a PlannerResponse from the valid prefix.
+
+Usage:
+    parser = PlannerStreamParser()
+    for chunk in chunks:
+        for piece in parser.feed(chunk):
+            send(piece)
+    recipe = parser.result()
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, get_args
+
+from pydantic import TypeAdapter, ValidationError
+
+from models.planner_schemas import PlannerPiece, PlannerResponse, Step
+from services.incremental_json import IncrementalJsonParser
+
+LIST_FIELDS = {"ingredients", "steps"}
+
+# Validators for one piece of each PlannerResponse field: the field type for
+# scalars, the element type for lists (List[Step] -> Step).
+PIECE_ADAPTERS: Dict[str, TypeAdapter] = {
+    name: TypeAdapter(get_args(field.annotation)[0] if name in LIST_FIELDS else field.annotation)
+    for name, field in PlannerResponse.model_fields.items()
+}
+
+
+class PlannerStreamParser:
+    """Incremental, schema-validated parser for PlannerResponse JSON."""
+
+    def __init__(self):
+        self._json = IncrementalJsonParser()
+        self.title: Optional[str] = None
+        self.ingredients: List[str] = []
+        self.steps: List[Step] = []
+        self.rejected = 0
+
+    def feed(self, chunk: str) -> List[PlannerPiece]:
+        """Consume a chunk of model output; return the pieces it completed."""
+        pieces = []
+        for kind, key, index, value in self._json.feed(chunk):
+            if key not in PIECE_ADAPTERS:
+                continue
+            # A list field is reported item by item; its final "field"
+            # event repeats the items, so only scalars are taken from it.
+            if (kind == "item") != (key in LIST_FIELDS):
+                continue
+            piece = self._validate(key, index, value)
+            if piece is not None:
+                pieces.append(piece)
+        return pieces
+
+    def result(self) -> Optional[PlannerResponse]:
+        """
+        The recipe built from every valid piece seen so far,
+        or None if no title or no step has been parsed.
+        """
+        if not self.title or not self.steps:
+            return None
+        return PlannerResponse(title=self.title, ingredients=list(self.ingredients), steps=list(self.steps))
+
+    def _validate(self, key: str, index: Optional[int], value: Any) -> Optional[PlannerPiece]:
+        try:
+            value = PIECE_ADAPTERS[key].validate_python(value)
+        except ValidationError as e:
+            self.rejected += 1
+            logging.debug("Discarding invalid planner %s piece: %s", key, e.errors())
+            return None
+
+        if key == "title":
+            self.title = value
+        elif key == "ingredients":
+            self.ingredients.append(value)
+        elif key == "steps":
+            self.steps.append(value)
+        return PlannerPiece(field=key, index=index, value=value)
+
+
+def recipe_from_prefix(text: str) -> Optional[PlannerResponse]:
+    """Recover a recipe from the valid prefix of planner output (None if nothing usable)."""
+    parser = PlannerStreamParser()
+    parser.feed(text)
+    return parser.result()
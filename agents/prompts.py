@@ -0,0 +1,139 @@
+"""
+Prompts Module
+--------------
+
+Builds the agents' instruction prompts from their output schemas.
+
+Every agent used to paste json.dumps(Model.model_json_schema(), indent=2)
+into its instruction: pretty-printed, with titles and descriptions, re-sent
+on every call although output_schema already constrains the response. Two
+modes are available, chosen per agent in config/app_config.py:
+
+    - "compact": a one-line type sketch of the output, e.g.
+      {"title":str,"ingredients":[str],"steps":[{"step_number":int,"instruction":str}]}
+    - "verbose": the full JSON schema, as before
+
+Every instruction built here is registered, so the prompt size of each agent
+can be compared across modes:
+
+    python -m agents.prompts            # estimated token counts
+    python -m agents.prompts --exact    # counts from the Gemini API (needs a key)
+
+Usage:
+    instruction = build_instruction("planner_agent", TASK, PlannerResponse)
+"""
+
+import json
+import math
+import sys
+import textwrap
+from typing import Any, Dict, Tuple, Type
+
+from pydantic import BaseModel
+
+from config.app_config import MODEL_NAME, PROMPT_MODE, PROMPT_MODES
+
+MODES = ("compact", "verbose")
+
+# Rough characters per token for English text and JSON with Gemini models
+CHARS_PER_TOKEN = 4
+
+# Task text and output model of every built instruction, by agent name
+PROMPTS: Dict[str, Tuple[str, Type[BaseModel]]] = {}
+
+JSON_TYPES = {"string": "str", "integer": "int", "number": "float", "boolean": "bool", "null": "null"}
+
+
+def _sketch(schema: Dict[str, Any], defs: Dict[str, Any]) -> str:
+    """Render a JSON schema node as a compact type sketch."""
+    if "$ref" in schema:
+        return _sketch(defs[schema["$ref"].split("/")[-1]], defs)
+    if "anyOf" in schema:
+        return "|".join(_sketch(option, defs) for option in schema["anyOf"])
+    if "enum" in schema:
+        return "|".join(json.dumps(value) for value in schema["enum"])
+    if "const" in schema:
+        return json.dumps(schema["const"])
+
+    kind = schema.get("type")
+    if kind == "object":
+        required = set(schema.get("required", ()))
+        fields = [
+            f'"{name}{"" if name in required else "?"}":{_sketch(field, defs)}'
+            for name, field in schema.get("properties", {}).items()
+        ]
+        return "{" + ",".join(fields) + "}"
+    if kind == "array":
+        return "[" + _sketch(schema.get("items", {}), defs) + "]"
+    return JSON_TYPES.get(kind, "any")
+
+
+def compact_schema(model: Type[BaseModel]) -> str:
+    """One-line type sketch of a model's JSON output (optional keys end in '?')."""
+    schema = model.model_json_schema()
+    return _sketch(schema, schema.get("$defs", {}))
+
+
+def verbose_schema(model: Type[BaseModel]) -> str:
+    """The full, pretty-printed JSON schema (titles and descriptions included)."""
+    return json.dumps(model.model_json_schema(), indent=2)
+
+
+def prompt_mode(agent_name: str) -> str:
+    """Configured prompt mode of an agent: its override, else the default."""
+    mode = PROMPT_MODES.get(agent_name, PROMPT_MODE)
+    if mode not in MODES:
+        raise ValueError(f"Unknown prompt mode '{mode}' for {agent_name}; expected one of {MODES}")
+    return mode
+
+
+def render_instruction(task: str, output_model: Type[BaseModel], mode: str) -> str:
+    task = textwrap.dedent(task).strip()
+    if mode == "verbose":
+        return f"{task}\nRespond ONLY with a JSON object matching this exact schema:\n{verbose_schema(output_model)}"
+    return f"{task}\nRespond ONLY with JSON: {compact_schema(output_model)}"
+
+
+def build_instruction(agent_name: str, task: str, output_model: Type[BaseModel]) -> str:
+    """
+    Instruction for an agent: its task text followed by the output format,
+    in the agent's configured mode.
+    """
+    PROMPTS[agent_name] = (task, output_model)
+    return render_instruction(task, output_model, prompt_mode(agent_name))
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def count_tokens(text: str) -> int:
+    """Exact token count from the Gemini API (network call, needs GEMINI_API_KEY)."""
+    from google import genai
+
+    return genai.Client().models.count_tokens(model=MODEL_NAME, contents=text).total_tokens
+
+
+def prompt_report(exact: bool = False) -> Dict[str, Dict[str, Any]]:
+    """Instruction size of every registered agent, in both modes."""
+    counter = count_tokens if exact else estimate_tokens
+    report = {}
+    for agent_name, (task, output_model) in PROMPTS.items():
+        entry: Dict[str, Any] = {"mode": prompt_mode(agent_name)}
+        for mode in MODES:
+            entry[f"{mode}_tokens"] = counter(render_instruction(task, output_model, mode))
+        report[agent_name] = entry
+    return report
+
+
+if __name__ == "__main__":
+    # Run as a script this file is __main__; the agents register in agents.prompts
+    from agents.registry import build_agents
+    from agents.prompts import prompt_report
+
+    build_agents()  # builds and registers every agent
+
+    exact = "--exact" in sys.argv[1:]
+    print(f"{'agent':<20} {'mode':<8} {'compact':>8} {'verbose':>8}  ({'exact' if exact else 'estimated'} tokens)")
+    for agent_name, entry in prompt_report(exact).items():
+        print(f"{agent_name:<20} {entry['mode']:<8} {entry['compact_tokens']:>8} {entry['verbose_tokens']:>8}")
@@ -1,48 +1,401 @@
 # agents/recipe_pipeline.py  
+import asyncio
 import logging
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
 from google.adk.agents import SequentialAgent
-from google.adk.runners import InMemoryRunner
-from agents.inventory_agent import inventory_agent
-from agents.diet_agent import diet_agent
-from agents.planner_agent import planner_agent
-from config.app_config import APP_NAME, SESSION_ID, USER_ID
-# from runner_factory import get_runner
-
-# Define the pipeline by chaining the three agents
-recipe_pipeline = SequentialAgent(
-    name="RecipePipeline",
-    sub_agents=[inventory_agent, diet_agent,planner_agent]
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.genai import types
+from agents.inventory_agent import run_inventory
+from agents.diet_agent import run_diet, run_diet_batch
+from agents.planner_agent import run_planner, run_planner_fanout
+from agents.planner_stream import PlannerStreamParser
+from agents.registry import get_agent
+from config.app_config import (
+    USER_ID, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS, RESULT_STORE_WARM_ENTRIES,
+    RECIPE_BATCH_CONCURRENCY, PLANNER_FANOUT_K, REQUEST_DEADLINE_SECONDS, STAGE_BUDGET_SHARES, DIET_PACK_SIZE,
 )
+from models.diet_schemas import DietInput
+from models.inventory_schemas import InventoryInput
+from models.planner_schemas import PlannerResponse
+from models.pipeline_schemas import PipelineEvent, PipelineResult, RecipeBatchItem
+from runner_manager import RunnerManager
+from services.agent_output import output_from_event
+from services.metrics import instrument_run
+from services.admission import priority_scope
+from services.deadline import deadline_scope, track_degraded
+from services.response_cache import ResponseCache, request_key
+from services.result_store import get_result_store
+from services.session_manager import request_session
+from services.single_flight import SingleFlight
 
-# # Optional: helper function to run the pipeline end-to-end
-async def run_recipe_pipeline(pantry_items: list[str], diet: str):
+# Define the pipeline by chaining the three stages. The inventory stage is
+# deterministic and only calls the model when its rules are unsure.
+# Built on first use through agents/registry.py.
+def build_recipe_pipeline() -> SequentialAgent:
+    return SequentialAgent(
+        name="RecipePipeline",
+        sub_agents=[get_agent("inventory_stage"), get_agent("diet_agent"), get_agent("planner_agent")]
+    )
+
+def __getattr__(name: str):
+    # recipe_pipeline is built on first access
+    if name == "recipe_pipeline":
+        return get_agent(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Full pipeline results by canonical InventoryInput. When RESULT_STORE_PATH
+# is set they are also persisted on disk and shared between workers.
+recipe_cache = ResponseCache("recipe", RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS)
+RESULT_KIND = "recipe"
+
+# Identical requests arriving while a pipeline run is in flight share it
+recipe_flight = SingleFlight("recipe")
+
+async def warm_start_recipe_cache(limit: int = RESULT_STORE_WARM_ENTRIES) -> int:
+    """
+    Preload recipe_cache with the most recently used results from the disk
+    store. Called at startup; returns the number of results loaded.
     """
-    Run the full recipe pipeline:
-    1. InventoryAgent filters pantry items
+    store = get_result_store()
+    if store is None:
+        return 0
+    rows = await asyncio.to_thread(store.recent, RESULT_KIND, limit)
+    # Oldest first, so the newest end up most recently used in the LRU
+    for key, value in reversed(rows):
+        recipe_cache.put(key, PipelineResult.model_validate_json(value))
+    logging.info("Warm-started recipe cache with %d stored results", len(rows))
+    return len(rows)
+
+async def _cached_result(cache_key: str) -> Optional[PipelineResult]:
+    """Look a result up in recipe_cache, then in the shared disk store."""
+    cached = recipe_cache.get(cache_key)
+    if cached is not None:
+        return cached.model_copy(update={"cached": True})
+
+    store = get_result_store()
+    if store is not None:
+        stored = await store.aget(cache_key)
+        if stored is not None:
+            result = PipelineResult.model_validate_json(stored)
+            recipe_cache.put(cache_key, result)
+            return result.model_copy(update={"cached": True})
+    return None
+
+async def run_recipe_pipeline(pantry_items: list[str], diet: str) -> PipelineResult:
+    """
+    Run the full recipe pipeline once:
+    1. Inventory stage cleans pantry items (locally, LLM only when unsure)
     2. DietAgent applies diet rules and suggests recipes
     3. PlannerAgent expands one recipe idea into full recipe
+
+    Uses the pooled pipeline runner and a per-call session, and returns the
+    typed recipe along with each stage's output and wall time. A stage's time
+    runs from the end of the previous stage to its own final event.
+    Repeated pantry/diet combinations are served from recipe_cache, then
+    from the shared disk store, before the pipeline is run; concurrent
+    identical calls share a single run.
+
+    Raises:
+        RuntimeError: if the planner produced no final response.
     """
-    # Wrap the root pipeline agent in an InMemoryRunner
-    runner = InMemoryRunner(agent=recipe_pipeline, app_name=APP_NAME)
+    logging.debug("Running recipe pipeline with pantry=%s, diet=%s", pantry_items, diet)
 
-    # Run the pipeline with structured input
-    response = await runner.run_debug(
-        {
-            "pantry_items": pantry_items,
-            "diet": diet,
-        }
-    )
+    payload = InventoryInput(items=pantry_items, diet=diet)
+    cache_key = request_key(payload)
+    cached = await _cached_result(cache_key)
+    if cached is not None:
+        return cached
+
+    return await recipe_flight.do(cache_key, lambda: _execute_pipeline(payload, cache_key))
+
+async def stream_recipe_pipeline(pantry_items: list[str], diet: str) -> AsyncIterator[PipelineEvent]:
+    """
+    Run the recipe pipeline and yield its progress as it happens: one
+    'stage' event per finished stage, a 'partial' event per title,
+    ingredient and Step of the planner's output while it is generated, and a
+    final 'result' event.
+
+    A cached result is replayed as its stage events and result. The generator
+    only advances when the consumer asks for the next event, so a slow client
+    slows the run down instead of buffering it.
+
+    Raises:
+        RuntimeError: if the planner produced no final response.
+    """
+    started = time.perf_counter()
+    payload = InventoryInput(items=pantry_items, diet=diet)
+    cache_key = request_key(payload)
+
+    cached = await _cached_result(cache_key)
+    if cached is not None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        inventory_stage, diet_stage, planner_stage = get_agent("recipe_pipeline").sub_agents
+        for stage, output in (
+            (inventory_stage.name, cached.inventory),
+            (diet_stage.name, cached.diet),
+            (planner_stage.name, cached.recipe),
+        ):
+            if output is not None:
+                yield PipelineEvent(event="stage", stage=stage, data=output, elapsed_ms=elapsed_ms)
+        yield PipelineEvent(event="result", data=cached, elapsed_ms=elapsed_ms)
+        return
+
+    async for event in _pipeline_events(payload, cache_key, stream_partials=True):
+        yield event
+
+async def run_recipe_alternatives(
+    pantry_items: list[str],
+    diet: str,
+    top_k: int = PLANNER_FANOUT_K,
+    mode: str = "ranked",
+) -> List[PlannerResponse]:
+    """
+    Clean the pantry and apply the diet like the pipeline does, then expand
+    the top_k recipe ideas concurrently instead of the planner's single pick
+    (see run_planner_fanout): the first valid plan, or all valid plans ranked.
+    The stages share one request deadline.
+    """
+    with deadline_scope(REQUEST_DEADLINE_SECONDS, STAGE_BUDGET_SHARES):
+        inventory = await run_inventory(pantry_items, diet)
+        diet_result = await run_diet(inventory.usable_items, diet)
+        return await run_planner_fanout(
+            diet_result.compatible_items,
+            diet_result.suggested_recipe_ideas,
+            diet,
+            top_k=top_k,
+            mode=mode,
+        )
+
+async def iter_recipe_batch(
+    requests: List[InventoryInput],
+    max_concurrency: int = RECIPE_BATCH_CONCURRENCY,
+) -> AsyncIterator[RecipeBatchItem]:
+    """
+    Plan many pantries and yield one RecipeBatchItem per request as soon as
+    it completes (completion order; item.index is the input position).
+
+    Identical requests (same canonical InventoryInput) are run once and their
+    result is fanned out to every position. Uncached requests are planned in
+    chunks of up to DIET_PACK_SIZE through the pipeline's stages (see
+    _plan_chunk), so each chunk's diet stage is a single packed model call;
+    at most max_concurrency requests are in flight. A failing request yields
+    an item with `error` set and does not affect the others. Closing the
+    iterator early cancels the remaining work. Model calls run in the
+    "batch" priority class.
+    """
+    groups: Dict[str, List[int]] = {}
+    for index, request in enumerate(requests):
+        groups.setdefault(request_key(request), []).append(index)
+    chunk_size = max(1, min(DIET_PACK_SIZE, max_concurrency))
+    keys = list(groups)
+    pending = deque(keys[i:i + chunk_size] for i in range(0, len(keys), chunk_size))
+    done: asyncio.Queue = asyncio.Queue()
+
+    def emit(key: str, outcome) -> None:
+        if isinstance(outcome, BaseException):
+            logging.warning("Batch request %d failed: %r", groups[key][0], outcome)
+            outcome = {"error": str(outcome) or type(outcome).__name__}
+        for index in groups[key]:
+            done.put_nowait(RecipeBatchItem(index=index, **outcome))
+
+    async def worker():
+        with priority_scope("batch"):
+            while pending:
+                chunk = []
+                for key in pending.popleft():
+                    cached = await _cached_result(key)
+                    if cached is not None:
+                        emit(key, {"recipe": cached.recipe, "cached": True})
+                    else:
+                        chunk.append((key, requests[groups[key][0]]))
+                if chunk:
+                    await _plan_chunk(chunk, emit)
+
+    logging.info("Planning batch of %d requests (%d unique)", len(requests), len(groups))
+    workers = [asyncio.create_task(worker()) for _ in range(min(max(1, max_concurrency // chunk_size), len(pending)))]
+    try:
+        for _ in range(len(requests)):
+            yield await done.get()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+async def _plan_chunk(chunk: List[Tuple[str, InventoryInput]], emit: Callable[[str, object], None]) -> None:
+    """
+    Plan distinct, uncached requests together, stage by stage like the
+    pipeline: the inventory of each, one packed diet call for all of them
+    (run_diet_batch) instead of one per request, then a planner call each.
+    emit(key, outcome) is called for each request as soon as its outcome is
+    ready: the fields of its RecipeBatchItem, or the exception it failed
+    with. Results are cached like pipeline results; a request counts as
+    degraded after its own fallbacks and after those of the chunk's diet call.
+    """
+    started = time.perf_counter()
+    with deadline_scope(REQUEST_DEADLINE_SECONDS, STAGE_BUDGET_SHARES):
+        async def clean(request: InventoryInput):
+            with track_degraded() as degraded:
+                return await run_inventory(request.items, request.diet), degraded
+
+        cleaned = await asyncio.gather(*(clean(request) for _, request in chunk), return_exceptions=True)
+        ready = []
+        for (key, request), outcome in zip(chunk, cleaned):
+            if isinstance(outcome, Exception):
+                emit(key, outcome)
+            else:
+                ready.append((key, request, *outcome))
+        inventory_ms = (time.perf_counter() - started) * 1000
+        if not ready:
+            return
+
+        diet_started = time.perf_counter()
+        try:
+            with track_degraded() as diet_degraded:
+                diets = await run_diet_batch([
+                    DietInput(items=inventory.usable_items, diet=request.diet) for _, request, inventory, _ in ready
+                ])
+        except Exception as e:
+            for key, *_ in ready:
+                emit(key, e)
+            return
+        diet_ms = (time.perf_counter() - diet_started) * 1000
+
+        async def expand(key, request, inventory, inventory_degraded, diet):
+            planner_started = time.perf_counter()
+            try:
+                with track_degraded() as degraded:
+                    recipe = await run_planner(diet.compatible_items, diet.suggested_recipe_ideas, request.diet)
+            except Exception as e:
+                emit(key, e)
+                return
+            now = time.perf_counter()
+            result = PipelineResult(
+                recipe=recipe,
+                inventory=inventory,
+                diet=diet,
+                stage_timings_ms={
+                    "inventory_agent": inventory_ms,
+                    "diet_agent": diet_ms,
+                    "planner_agent": (now - planner_started) * 1000,
+                    "total": (now - started) * 1000,
+                },
+                degraded=sorted(inventory_degraded | diet_degraded | degraded),
+            )
+            await _save_result(key, result)
+            emit(key, {"recipe": recipe, "cached": False})
+
+        await asyncio.gather(*(expand(*entry, diet) for entry, diet in zip(ready, diets)))
 
-    logging.debug(f"Running recipe pipeline with pantry={pantry_items}, diet={diet}")
-    # Run the pipeline with structured input
-    # runner = get_runner(recipe_pipeline, app_name=APP_NAME, user_id=USER_ID, session_id=SESSION_ID)
-    response = await runner.run_debug(
-        {
-            "pantry_items": pantry_items,
-            "diet": diet,
-        }
+async def run_recipe_batch(
+    requests: List[InventoryInput],
+    max_concurrency: int = RECIPE_BATCH_CONCURRENCY,
+) -> List[RecipeBatchItem]:
+    """Plan many pantries (see iter_recipe_batch); results in input order."""
+    results: List[Optional[RecipeBatchItem]] = [None] * len(requests)
+    async for item in iter_recipe_batch(requests, max_concurrency):
+        results[item.index] = item
+    return results
+
+async def _save_result(cache_key: str, result: PipelineResult) -> None:
+    """Cache a pipeline result and persist it to the shared store, unless it was degraded."""
+    if result.degraded:
+        logging.warning("Pipeline degraded to local fallbacks in %s; not caching", result.degraded)
+        return
+    recipe_cache.put(cache_key, result)
+    store = get_result_store()
+    if store is not None:
+        await store.aput(cache_key, RESULT_KIND, result.model_dump_json())
+
+async def _execute_pipeline(payload: InventoryInput, cache_key: str) -> PipelineResult:
+    """Run the pipeline for one request and return its result."""
+    result = None
+    async for event in _pipeline_events(payload, cache_key):
+        if event.event == "result":
+            result = event.data
+    return result
+
+def _partial_text(event) -> str:
+    if not (event.content and event.content.parts):
+        return ""
+    return "".join(part.text for part in event.content.parts if part.text and not part.thought)
+
+async def _pipeline_events(
+    payload: InventoryInput,
+    cache_key: str,
+    stream_partials: bool = False,
+) -> AsyncIterator[PipelineEvent]:
+    """
+    Run the pipeline on the pooled runner and yield a PipelineEvent per
+    finished stage, then the result, which is also stored in the caches
+    unless a stage ran out of its time budget and fell back to a local answer.
+    The request deadline is split across the stages (STAGE_BUDGET_SHARES).
+    With stream_partials the model is called in SSE mode and each title,
+    ingredient and Step of the planner's output is yielded, validated, as
+    soon as the model closes it.
+    """
+    user_content = types.Content(
+        role="user",
+        parts=[types.Part(text=payload.model_dump_json())]
     )
-    logging.info(f"Pipeline response: {response}")
+    run_config = RunConfig(streaming_mode=StreamingMode.SSE) if stream_partials else None
+    planner_stream = PlannerStreamParser()
+    recipe_pipeline = get_agent("recipe_pipeline")
+    inventory_stage, diet_stage, planner_stage = recipe_pipeline.sub_agents
 
+    outputs, stage_timings_ms = {}, {}
+    started = stage_started = time.perf_counter()
 
-    return response
+    with deadline_scope(REQUEST_DEADLINE_SECONDS, STAGE_BUDGET_SHARES) as deadline:
+        async with RunnerManager.invocation(recipe_pipeline) as runner:
+            async with request_session(runner.session_service) as session_id:
+                events = runner.run_async(
+                    user_id=USER_ID,
+                    session_id=session_id,
+                    new_message=user_content,
+                    run_config=run_config,
+                )
+                async for event in instrument_run(events, recipe_pipeline.name):
+                    now = time.perf_counter()
+                    if event.partial:
+                        if stream_partials and event.author == planner_stage.name:
+                            for piece in planner_stream.feed(_partial_text(event)):
+                                yield PipelineEvent(
+                                    event="partial",
+                                    stage=planner_stage.name,
+                                    data=piece,
+                                    elapsed_ms=(now - started) * 1000,
+                                )
+                        continue
+
+                    for stage in recipe_pipeline.sub_agents:
+                        output = output_from_event(event, stage)
+                        if output is not None:
+                            outputs[stage.name] = output
+                            stage_timings_ms[stage.name] = (now - stage_started) * 1000
+                            stage_started = now
+                            yield PipelineEvent(
+                                event="stage",
+                                stage=stage.name,
+                                data=output,
+                                elapsed_ms=(now - started) * 1000,
+                            )
+
+    stage_timings_ms["total"] = (time.perf_counter() - started) * 1000
+
+    recipe = outputs.get(planner_stage.name)
+    if recipe is None:
+        raise RuntimeError("No final response from recipe pipeline")
+
+    logging.info("Pipeline finished in %.0f ms: %s", stage_timings_ms["total"], stage_timings_ms)
+
+    result = PipelineResult(
+        recipe=recipe,
+        inventory=outputs.get(inventory_stage.name),
+        diet=outputs.get(diet_stage.name),
+        stage_timings_ms=stage_timings_ms,
+        degraded=sorted(deadline.degraded),
+    )
+    await _save_result(cache_key, result)
+    yield PipelineEvent(event="result", data=result, elapsed_ms=stage_timings_ms["total"])
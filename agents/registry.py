@@ -0,0 +1,85 @@
+"""
+Agent Registry Module
+---------------------
+
+Builds agents and their models on first use instead of at import.
+
+Importing an agent module used to load .env, check GEMINI_API_KEY, build a
+model client and render the instruction of every agent in it, and create a
+module-level Runner. Now each agent module only defines a factory, listed
+in FACTORIES, and the registry builds an agent the first time it is asked
+for (or during FastAPI lifespan startup, see build_agents), so a worker only
+pays for the agents it serves and importing the app builds nothing.
+The API key is checked before the first agent is built (.env itself is
+loaded by the config package, before any setting is read).
+
+The agent modules keep their old attributes (agents.diet_agent.diet_agent,
+agents.recipe_pipeline.recipe_pipeline, ...) through a module __getattr__
+that forwards to get_agent. Runners are pooled separately, one per agent,
+by RunnerManager (runner_manager.py).
+
+Usage:
+    diet_agent = get_agent("diet_agent")
+    async with RunnerManager.invocation(diet_agent) as runner:
+        ...
+"""
+
+import importlib
+import os
+from typing import Dict, Iterable, List, Optional
+
+from google.adk.agents import BaseAgent
+
+from config.app_config import MODEL_BACKEND
+
+# Factory of every agent by registry name (the agent module's attribute), as "module:function"
+FACTORIES: Dict[str, str] = {
+    "inventory_agent": "agents.inventory_agent:build_inventory_agent",
+    "inventory_stage": "agents.inventory_agent:build_inventory_stage",
+    "diet_agent": "agents.diet_agent:build_diet_agent",
+    "packed_diet_agent": "agents.diet_agent:build_packed_diet_agent",
+    "planner_agent": "agents.planner_agent:build_planner_agent",
+    "recipe_pipeline": "agents.recipe_pipeline:build_recipe_pipeline",
+}
+
+_agents: Dict[str, BaseAgent] = {}
+_environment_loaded = False
+
+
+def load_environment() -> None:
+    """
+    Check the model credentials, once, before the first agent is built.
+    Raises ValueError if the Gemini backend has no API key.
+    """
+    global _environment_loaded
+    if _environment_loaded:
+        return
+    if MODEL_BACKEND == "gemini" and not os.getenv("GEMINI_API_KEY"):
+        raise ValueError("Missing GEMINI_API_KEY in environment")
+    _environment_loaded = True
+
+
+def get_agent(name: str) -> BaseAgent:
+    """Return the agent registered under name, building it on first use."""
+    agent = _agents.get(name)
+    if agent is None:
+        if name not in FACTORIES:
+            raise KeyError(f"Unknown agent '{name}'; expected one of {sorted(FACTORIES)}")
+        load_environment()
+        module_name, factory = FACTORIES[name].split(":")
+        agent = getattr(importlib.import_module(module_name), factory)()
+        _agents[name] = agent
+    return agent
+
+
+def build_agents(names: Optional[Iterable[str]] = None) -> List[BaseAgent]:
+    """
+    Build the given agents (all registered ones by default) ahead of the
+    first request. Called during FastAPI lifespan startup.
+    """
+    return [get_agent(name) for name in (FACTORIES if names is None else names)]
+
+
+def built_agents() -> List[str]:
+    """Registry names of the agents built so far."""
+    return list(_agents)
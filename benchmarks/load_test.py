@@ -0,0 +1,335 @@
+"""
+Load Test Module
+----------------
+
+Load-test and latency benchmark for the FastAPI app in tests/test_main.py.
+
+Drives /api/inventory, /api/diet and /api/recipe at a fixed concurrency with
+a weighted request mix, either in-process (ASGI transport, no socket) or
+over a local socket (uvicorn on 127.0.0.1), and reports:
+
+    - throughput and status codes
+    - p50/p95/p99 latency per endpoint, and per pipeline stage for /recipe
+      (from its Server-Timing header; cache hits are counted separately)
+    - resident memory sampled during the run, and its growth
+
+Unless MODEL_BACKEND is set, the agents run on the offline fake model
+(services/fake_llm.py) with a fixed seed, and the admission rate limits are
+lifted, so results measure our own stack and are reproducible. Payloads are
+drawn, with a fixed seed, from a pool of `unique` distinct pantries.
+
+Reports can be saved as baselines and later runs compared against them:
+
+    python -m benchmarks.load_test --requests 2000 --concurrency 32 --save-baseline local
+    python -m benchmarks.load_test --requests 2000 --concurrency 32 --compare local
+
+--compare exits with status 1 when throughput drops, or a p95 latency
+rises, by more than --tolerance (default 20%).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+
+ENDPOINTS = {
+    "inventory": "/api/inventory",
+    "diet": "/api/diet",
+    "recipe": "/api/recipe",
+}
+DEFAULT_MIX = {"inventory": 1.0, "diet": 1.0, "recipe": 2.0}
+
+PANTRY = [
+    "tomato", "spinach", "chicken breast", "onion", "bell pepper", "garlic", "olive oil", "rice",
+    "black beans", "tofu", "eggs", "cheddar", "salmon", "broccoli", "carrot", "lentils",
+    "quinoa", "mushrooms", "zucchini", "chickpeas", "avocado", "pasta", "basil", "lemon",
+]
+DIETS = ["vegan", "vegetarian", "omnivore", "keto", "gluten-free"]
+
+# Environment for a reproducible, network-free run (explicit settings win)
+OFFLINE_ENV = {
+    "MODEL_BACKEND": "fake",
+    "FAKE_LLM_SEED": "0",
+    "ADMISSION_RPS": "0",
+    "ADMISSION_TPM": "0",
+}
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank q-quantile (0..1) of values, or None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))]
+
+
+def summarize(values: List[float]) -> Dict[str, Optional[float]]:
+    """Count, mean and p50/p95/p99 of latencies in milliseconds."""
+    return {
+        "count": len(values),
+        "mean_ms": sum(values) / len(values) if values else None,
+        "p50_ms": percentile(values, 0.50),
+        "p95_ms": percentile(values, 0.95),
+        "p99_ms": percentile(values, 0.99),
+    }
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """'a;dur=1.5, b;dur=2' -> {"a": 1.5, "b": 2.0} (entries without dur are skipped)."""
+    timings = {}
+    for entry in header.split(","):
+        name, *params = [token.strip() for token in entry.split(";")]
+        for param in params:
+            if param.startswith("dur="):
+                timings[name] = float(param[4:])
+    return timings
+
+
+def rss_mb() -> float:
+    """Resident memory of this process in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def make_payloads(unique: int, seed: int) -> List[Dict[str, Any]]:
+    """`unique` distinct pantries (items and diet), drawn with a fixed seed."""
+    rng = random.Random(seed)
+    return [
+        {"items": rng.sample(PANTRY, rng.randint(3, 8)), "diet": rng.choice(DIETS)}
+        for _ in range(unique)
+    ]
+
+
+@asynccontextmanager
+async def open_client(transport: str) -> AsyncIterator[httpx.AsyncClient]:
+    """HTTP client for the app, in-process ("asgi") or over a local socket ("socket")."""
+    from tests.test_main import app
+
+    if transport == "asgi":
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+                yield client
+        return
+
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    try:
+        while not server.started:
+            if serving.done():
+                serving.result()
+            await asyncio.sleep(0.01)
+        port = server.servers[0].sockets[0].getsockname()[1]
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+            yield client
+    finally:
+        server.should_exit = True
+        await serving
+
+
+async def run_load(
+    requests: int = 500,
+    concurrency: int = 16,
+    mix: Optional[Dict[str, float]] = None,
+    transport: str = "asgi",
+    unique: int = 50,
+    seed: int = 0,
+    memory_interval: float = 0.5,
+) -> Dict[str, Any]:
+    """Send `requests` requests with `concurrency` workers and return the report."""
+    mix = mix or DEFAULT_MIX
+    rng = random.Random(seed)
+    payloads = make_payloads(unique, seed)
+    plan = [
+        (endpoint, rng.choice(payloads))
+        for endpoint in rng.choices(list(mix), weights=list(mix.values()), k=requests)
+    ]
+
+    latencies: Dict[str, List[float]] = {endpoint: [] for endpoint in mix}
+    stages: Dict[str, List[float]] = {}
+    statuses: Dict[str, int] = {}
+    cache_hits = 0
+    memory: List[Dict[str, float]] = []
+
+    async with open_client(transport) as client:
+        started = time.perf_counter()
+
+        async def sample_memory():
+            while True:
+                memory.append({"t_s": round(time.perf_counter() - started, 3), "rss_mb": round(rss_mb(), 2)})
+                await asyncio.sleep(memory_interval)
+
+        async def worker(queue: List[tuple]):
+            nonlocal cache_hits
+            while queue:
+                endpoint, payload = queue.pop()
+                sent = time.perf_counter()
+                try:
+                    response = await client.post(ENDPOINTS[endpoint], json=payload)
+                    status = str(response.status_code)
+                except httpx.HTTPError as e:
+                    response, status = None, type(e).__name__
+                latencies[endpoint].append((time.perf_counter() - sent) * 1000)
+                statuses[status] = statuses.get(status, 0) + 1
+                timing = response.headers.get("server-timing") if response is not None else None
+                if timing:
+                    parsed = parse_server_timing(timing)
+                    if not parsed:
+                        cache_hits += 1
+                    for stage, ms in parsed.items():
+                        stages.setdefault(stage, []).append(ms)
+
+        queue = list(reversed(plan))
+        sampler = asyncio.create_task(sample_memory())
+        try:
+            await asyncio.gather(*(worker(queue) for _ in range(concurrency)))
+        finally:
+            sampler.cancel()
+        elapsed = time.perf_counter() - started
+        memory.append({"t_s": round(elapsed, 3), "rss_mb": round(rss_mb(), 2)})
+
+    return {
+        "config": {
+            "requests": requests, "concurrency": concurrency, "mix": mix, "transport": transport,
+            "unique": unique, "seed": seed, "model_backend": os.getenv("MODEL_BACKEND", "gemini"),
+        },
+        "elapsed_s": elapsed,
+        "throughput_rps": requests / elapsed if elapsed else None,
+        "status_codes": statuses,
+        "endpoints": {endpoint: summarize(values) for endpoint, values in latencies.items()},
+        "stages": {stage: summarize(values) for stage, values in stages.items()},
+        "recipe_cache_hits": cache_hits,
+        "memory": {
+            "start_mb": memory[0]["rss_mb"],
+            "end_mb": memory[-1]["rss_mb"],
+            "growth_mb": round(memory[-1]["rss_mb"] - memory[0]["rss_mb"], 2),
+            "samples": memory,
+        },
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.2) -> List[str]:
+    """Regressions of report against baseline beyond tolerance (empty if none)."""
+    regressions = []
+    if report["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance):
+        regressions.append(
+            f"throughput {report['throughput_rps']:.1f} rps < baseline {baseline['throughput_rps']:.1f} rps"
+        )
+    for group in ("endpoints", "stages"):
+        for name, current in report[group].items():
+            before = baseline.get(group, {}).get(name)
+            if not before or before.get("p95_ms") is None or current.get("p95_ms") is None:
+                continue
+            if current["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{name} p95 {current['p95_ms']:.1f} ms > baseline {before['p95_ms']:.1f} ms")
+    return regressions
+
+
+def baseline_path(name: str) -> Path:
+    return BASELINE_DIR / f"{name}.json"
+
+
+def save_baseline(name: str, report: Dict[str, Any]) -> Path:
+    path = baseline_path(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Memory samples are run-specific; keep the summary only
+    stored = {**report, "memory": {k: v for k, v in report["memory"].items() if k != "samples"}}
+    path.write_text(json.dumps(stored, indent=2) + "\n")
+    return path
+
+
+def load_baseline(name: str) -> Dict[str, Any]:
+    return json.loads(baseline_path(name).read_text())
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    config = report["config"]
+    print(
+        f"{config['requests']} requests, concurrency {config['concurrency']}, {config['transport']} transport, "
+        f"{config['model_backend']} model: {report['throughput_rps']:.1f} req/s in {report['elapsed_s']:.2f}s"
+    )
+    print(f"status codes: {report['status_codes']}  recipe cache hits: {report['recipe_cache_hits']}")
+    print(f"{'':<18} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for group in ("endpoints", "stages"):
+        for name, stats in report[group].items():
+            if not stats["count"]:
+                continue
+            label = f"/{name}" if group == "endpoints" else f"  {name}"
+            print(f"{label:<18} {stats['count']:>6} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+    memory = report["memory"]
+    print(f"memory: {memory['start_mb']:.1f} MB -> {memory['end_mb']:.1f} MB ({memory['growth_mb']:+.1f} MB)")
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """'inventory=1,recipe=2' -> {"inventory": 1.0, "recipe": 2.0}"""
+    mix = {}
+    for pair in text.split(","):
+        name, _, weight = pair.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint '{name}'; expected one of {list(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1], formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="e.g. inventory=1,diet=1,recipe=2")
+    parser.add_argument("--transport", choices=("asgi", "socket"), default="asgi")
+    parser.add_argument("--unique", type=int, default=50, help="distinct payloads in the pool")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME", help="fail if worse than this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args(argv)
+
+    for key, value in OFFLINE_ENV.items():
+        os.environ.setdefault(key, value)
+
+    report = asyncio.run(run_load(
+        requests=args.requests, concurrency=args.concurrency, mix=args.mix,
+        transport=args.transport, unique=args.unique, seed=args.seed,
+    ))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    if args.save_baseline:
+        print(f"baseline saved to {save_baseline(args.save_baseline, report)}")
+    if args.compare:
+        baseline = load_baseline(args.compare)
+        if baseline["config"] != report["config"]:
+            print(f"warning: run settings differ from baseline '{args.compare}': {baseline['config']}")
+        regressions = compare(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            return 1
+        print(f"no regressions against baseline '{args.compare}'")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,5 @@
+# Settings in config/*.py are read from the environment at import, so .env
+# is loaded first (variables already set in the environment take precedence)
+from dotenv import load_dotenv
 
-
-
+load_dotenv()
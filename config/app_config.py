@@ -1,6 +1,7 @@
 # config/app_config.py
+import os
 from google.genai import types
-from google.adk.sessions import InMemorySessionService
+from services.session_store import BoundedSessionService
 
 # Global constants
 # APP_NAME = "ai_diet_meal_planner" #"inventory_app"
@@ -10,10 +11,94 @@ USER_ID = "test_user"
 SESSION_ID = "recipe_session"
 MODEL_NAME = "gemini-2.5-flash-lite"
 
+# Model backend of every agent: "gemini", or "fake" for the offline
+# simulator in services/fake_llm.py (load tests, benchmarks, no network)
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "gemini")
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "300"))     # median per call
+FAKE_LLM_LATENCY_SIGMA = float(os.getenv("FAKE_LLM_LATENCY_SIGMA", "0.5"))   # log-normal spread
+FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+FAKE_LLM_CHUNK_CHARS = int(os.getenv("FAKE_LLM_CHUNK_CHARS", "24"))     # streamed chunk size
+FAKE_LLM_CHUNK_DELAY_MS = float(os.getenv("FAKE_LLM_CHUNK_DELAY_MS", "20"))
+FAKE_LLM_SEED = int(os.environ["FAKE_LLM_SEED"]) if os.getenv("FAKE_LLM_SEED") else None
 
+# Session store bounds (see services/session_store.py)
+SESSION_MAX_EVENTS = 50         # events kept per session before older turns are compacted
+SESSION_TTL_SECONDS = 15 * 60   # idle sessions expire after this long
+SESSION_MAX_SESSIONS = 1000     # least recently used sessions are evicted beyond this
 
-# Shared session service (singleton by module import)
-session_service = InMemorySessionService()
+# Minimum confidence of the local inventory normalizer before the
+# InventoryAgent LLM is skipped (see agents/inventory_normalizer.py)
+INVENTORY_LLM_CONFIDENCE = 0.8
+
+# Per-stage response caches (see services/response_cache.py)
+RESPONSE_CACHE_MAX_ENTRIES = 1024
+RESPONSE_CACHE_TTL_SECONDS = 60 * 60
+
+# Optional on-disk result store shared by all workers on a node
+# (see services/result_store.py). Disabled unless RESULT_STORE_PATH is set.
+RESULT_STORE_PATH = os.getenv("RESULT_STORE_PATH")
+RESULT_STORE_MAX_BYTES = 64 * 1024 * 1024
+RESULT_STORE_WARM_ENTRIES = 256     # results preloaded into memory at startup
+
+# Batch recipe planning (POST /api/recipe/batch)
+RECIPE_BATCH_CONCURRENCY = 8        # requests in flight per batch
+RECIPE_BATCH_MAX_ITEMS = 5000       # larger batches are rejected with 413
+
+# Planner fan-out (see run_planner_fanout in agents/planner_agent.py)
+PLANNER_FANOUT_K = 3        # recipe ideas expanded concurrently by default
+PLANNER_FANOUT_MAX_K = 5    # upper bound accepted from callers
+
+# Instruction prompts (see agents/prompts.py): "compact" sends a one-line
+# type sketch of the output schema, "verbose" the full JSON schema.
+# Per-agent overrides: PROMPT_MODES="planner_agent=verbose,diet_agent=compact"
+PROMPT_MODE = os.getenv("PROMPT_MODE", "compact")
+PROMPT_MODES = dict(
+    pair.strip().split("=", 1) for pair in os.getenv("PROMPT_MODES", "").split(",") if "=" in pair
+)
+
+# Diet requests packed into one model call by run_diet_batch (see agents/diet_agent.py)
+DIET_PACK_SIZE = 8
+
+# Request deadlines and hedged model calls (see services/deadline.py and
+# services/model_gateway.py). The pipeline budget is split across stages;
+# time a stage does not use is left to the stages after it.
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "20"))
+STAGE_BUDGET_SHARES = {"inventory_agent": 0.15, "diet_agent": 0.35, "planner_agent": 0.5}
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "1") != "0"
+HEDGE_PERCENTILE = 0.95             # hedge calls slower than this share of recent calls
+HEDGE_MIN_SAMPLES = 20              # latencies observed before the percentile is trusted
+HEDGE_DEFAULT_DELAY_SECONDS = 3.0   # hedge delay until then
+HEDGE_MIN_DELAY_SECONDS = 0.5
+
+# Admission control for model calls (see services/admission.py). Rates of 0
+# disable that limit. Calls beyond a full queue are shed with 503.
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "16"))
+ADMISSION_RPS = float(os.getenv("ADMISSION_RPS", "10"))
+ADMISSION_TPM = float(os.getenv("ADMISSION_TPM", "1000000"))
+ADMISSION_MAX_QUEUE = {"interactive": 64, "batch": 256}   # waiting calls per priority class
+ADMISSION_MAX_RATE_WAIT_SECONDS = 5.0   # shed instead of waiting longer for the rate limits
+
+# Pipeline latency/token metrics served at GET /metrics (see services/metrics.py)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+
+# Circuit breaker per gateway model (see services/circuit_breaker.py).
+# While open, agents answer from local rules and the planner from a template.
+CIRCUIT_WINDOW = 20                 # recent calls considered
+CIRCUIT_MIN_CALLS = 5               # calls needed before the circuit may open
+CIRCUIT_ERROR_RATE = 0.5            # open at this share of failed calls...
+CIRCUIT_SLOW_CALL_SECONDS = 10.0
+CIRCUIT_SLOW_CALL_RATE = 0.8        # ...or of calls slower than CIRCUIT_SLOW_CALL_SECONDS
+CIRCUIT_OPEN_SECONDS = float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))   # before a half-open probe
+
+
+
+# Shared session service (singleton by module import), bounded so that
+# process memory and get_session cost stay flat over long uptimes
+session_service = BoundedSessionService(
+    max_events=SESSION_MAX_EVENTS,
+    ttl_seconds=SESSION_TTL_SECONDS,
+    max_sessions=SESSION_MAX_SESSIONS,
+)
 
 async def setup_session():
     """
@@ -32,8 +117,9 @@ When working with LLMs, you may encounter transient errors like rate limits or t
 Retry options automatically handle these failures by retrying the request with exponential backoff.
 """
 retry_config=types.HttpRetryOptions(
-    attempts=5,  # Maximum retry attempts
-    exp_base=7,  # Delay multiplier
-    initial_delay=1,
+    attempts=3,  # Maximum retry attempts; the request deadline bounds the rest
+    exp_base=2,  # Delay multiplier
+    initial_delay=0.5,
+    max_delay=4,
     http_status_codes=[429, 500, 503, 504], # Retry on these HTTP errors
 )
@@ -0,0 +1,217 @@
+"""
+Logging Configuration Module
+----------------------------
+
+Non-blocking, structured logging for the app and the demo harness.
+
+Log calls on the event loop only put the record on an in-memory queue; a
+background QueueListener thread formats it as one JSON object per line and
+writes it to a size-rotated file (LOG_FILE, rotated at LOG_MAX_BYTES with
+LOG_BACKUP_COUNT backups; nothing is deleted at startup). Every record
+carries the request and session IDs of the code that logged it, taken from
+context variables:
+
+    - bind_request_id(): set per HTTP request by RequestContextMiddleware
+      (from the X-Request-ID header, or a new ID echoed back in it)
+    - bind_session_id(): set by services/session_manager.request_session
+
+Messages are formatted lazily: log with %-style arguments,
+logging.debug("Event %s", event), and records filtered out by level are
+never formatted; the rest are formatted on the writer thread. Arguments
+should therefore not be mutated after the call. Verbose per-event logs go
+to the "recipe.events" logger and are sampled (LOG_EVENT_SAMPLE_RATE).
+
+The served app calls setup_logging() at lifespan startup and
+shutdown_logging() at shutdown.
+
+Usage:
+    from config.logging_config import setup_logging
+    setup_logging()
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Iterator, Optional
+
+LOG_FILE = os.getenv("LOG_FILE", "logger.log")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+# Share of "recipe.events" records that are kept
+LOG_EVENT_SAMPLE_RATE = float(os.getenv("LOG_EVENT_SAMPLE_RATE", "0.01"))
+
+EVENT_LOGGER = "recipe.events"
+REQUEST_ID_HEADER = "x-request-id"
+
+# Attributes of every LogRecord; anything else was passed with extra=...
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id", "session_id"}
+
+_request_id: ContextVar[Optional[str]] = ContextVar("log_request_id", default=None)
+_session_id: ContextVar[Optional[str]] = ContextVar("log_session_id", default=None)
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[QueueHandler] = None
+
+
+@contextmanager
+def bind_request_id(request_id: Optional[str] = None) -> Iterator[str]:
+    """Tag the block's log records with a request ID (a new one if none given)."""
+    request_id = request_id or uuid.uuid4().hex
+    token = _request_id.set(request_id)
+    try:
+        yield request_id
+    finally:
+        _request_id.reset(token)
+
+
+@contextmanager
+def bind_session_id(session_id: str) -> Iterator[None]:
+    """Tag the block's log records with an ADK session ID."""
+    token = _session_id.set(session_id)
+    try:
+        yield
+    finally:
+        try:
+            _session_id.reset(token)
+        except ValueError:
+            # Closed from another context (see services/deadline.py)
+            pass
+
+
+class ContextFilter(logging.Filter):
+    """Copy the request and session IDs onto the record (in the calling thread, where they are visible)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        record.session_id = _session_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a sample of the records of the verbose event logger."""
+
+    def __init__(self, rate: float = LOG_EVENT_SAMPLE_RATE, logger_name: str = EVENT_LOGGER):
+        super().__init__()
+        self.rate = rate
+        self.prefix = logger_name
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not record.name.startswith(self.prefix):
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with context IDs and any extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "session_id": getattr(record, "session_id", None),
+            "where": f"{record.filename}:{record.lineno}",
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the writer thread.
+    Only the traceback is rendered here, while the exception is still live.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(
+    log_file: str = LOG_FILE,
+    level: str = LOG_LEVEL,
+    max_bytes: int = LOG_MAX_BYTES,
+    backup_count: int = LOG_BACKUP_COUNT,
+) -> QueueListener:
+    """
+    Route the root logger through a queue to a background JSON file writer.
+    Safe to call more than once: later calls return the running listener.
+    """
+    global _listener, _handler
+    if _listener is not None:
+        return _listener
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(records)
+    handler.addFilter(SamplingFilter())
+    handler.addFilter(ContextFilter())
+
+    file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+    file_handler.setFormatter(JsonFormatter())
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(handler)
+
+    _handler = handler
+    _listener = QueueListener(records, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    logging.info("Logging configured: JSON lines to %s (rotating at %d bytes)", log_file, max_bytes)
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Detach the queue from the root logger, flush queued records and stop the writer thread."""
+    global _listener, _handler
+    if _listener is None:
+        return
+    logging.getLogger().removeHandler(_handler)
+    _handler = None
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+
+class RequestContextMiddleware:
+    """
+    ASGI middleware: bind a request ID for the request's logs, taken from
+    the X-Request-ID header or generated, and echo it in the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope.get("headers") or ()).get(REQUEST_ID_HEADER.encode())
+        with bind_request_id(incoming.decode("latin-1") if incoming else None) as request_id:
+            async def send_with_id(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = [*message.get("headers", ()), (REQUEST_ID_HEADER.encode(), request_id.encode())]
+                await send(message)
+
+            await self.app(scope, receive, send_with_id)
@@ -2,40 +2,25 @@
 import asyncio
 import json
 from unittest import runner
-from agents.recipe_pipeline import recipe_pipeline  # your SequentialAgent pipeline
+from agents.registry import get_agent
 import asyncio
 from google.genai import types
-from google.adk.runners import InMemoryRunner
+from runner_manager import RunnerManager
 from config.app_config import APP_NAME, USER_ID, MODEL_NAME, retry_config, session_service, SESSION_ID, setup_session
+from config.logging_config import setup_logging, EVENT_LOGGER
 import logging
-import os   
 
-def setup_logging():
-    for log_file in ["logger.log"]:
-        if os.path.exists(log_file):
-            os.remove(log_file)
-
-    logging.basicConfig(
-        filename="logger.log",
-        # level=logging.DEBUG,
-        # switch from DEBUG to INFO to reduce verbosity
-        # cut out the noisy TCP/TLS traces and kept only the essentials:
-        # Startup confirmation: Logging configured for Recipe Pipeline
-        # Model requests: each time Gemini is called, you see the request/response cycle.
-        # Pipeline outputs: the final structured recipe JSON output from the pipeline
-        level=logging.INFO, 
-        format="%(asctime)s %(filename)s:%(lineno)d %(levelname)s:%(message)s",
-    )
-    logging.info("✅ Logging configured for Recipe Pipeline")
+# Per-event logs are sampled (see config/logging_config.py)
+event_log = logging.getLogger(EVENT_LOGGER)
 
 
 async def main():
     """
-    Entry point for testing the recipe_pipeline agent with the ADK SequentialAgent and InMemoryRunner.
+    Entry point for testing the recipe_pipeline agent with the ADK SequentialAgent and its pooled Runner.
 
     Steps performed:
-    1. Construct an InMemoryRunner bound to the recipe_pipeline agent and the configured app name.
-    2. Explicitly create a session in the runner's own session_service using APP_NAME, USER_ID, and SESSION_ID.
+    1. Get the pooled Runner of the recipe_pipeline agent (see runner_manager.py).
+    2. Explicitly create a session in the runner's (shared) session_service using APP_NAME, USER_ID, and SESSION_ID.
        This ensures the runner can locate and attach to the correct session.
     3. Send a sample user message containing pantry items and a diet preference ("vegan") to the pipeline.
     4. Iterate asynchronously over events returned by runner.run_async until the final response is received.
@@ -48,10 +33,10 @@ async def main():
 
     setup_logging()
 
-    # Step 1: Construct the runner
-    runner = InMemoryRunner(agent=recipe_pipeline, app_name=APP_NAME)
+    # Step 1: Get the pooled runner
+    runner = await RunnerManager.init_runner(get_agent("recipe_pipeline"))
 
-    # Step 2: Explicitly create the session in the runner's own session_service
+    # Step 2: Explicitly create the session in the runner's session_service
     await runner.session_service.create_session(
         app_name=APP_NAME,
         user_id=USER_ID,
@@ -80,20 +65,20 @@ async def main():
         )
     ):
         # Log the raw event class/type for visibility
-        logging.debug(f"Event received: {type(event).__name__}")
+        event_log.debug("Event received: %s", type(event).__name__)
 
         # Final response case
         if event.is_final_response() and event.content and event.content.parts:
             response_text = event.content.parts[0].text
             agent_name = getattr(event, "source_agent", "UnknownAgent")
-            logging.info(f"Final response from {agent_name}: {response_text}")
+            logging.info("Final response from %s: %s", agent_name, response_text)
             final_response = response_text  # keep the latest full response
         # Intermediate content case
         elif event.content:
-            logging.debug(f"Intermediate content: {event.content}")
+            event_log.debug("Intermediate content: %s", event.content)
         # Catch-all for other event types
         else:
-            logging.warning(f"Unhandled event: {event}")
+            logging.warning("Unhandled event: %s", event)
 
 
     # Step 4: Print results
@@ -9,3 +9,13 @@ class DietInput(BaseModel):
 class DietResponse(BaseModel):
     compatible_items: List[str] = Field(..., description="Items compatible with the specified diet")
     suggested_recipe_ideas: List[str] = Field(..., description="List of recipe ideas based on compatible items")
+
+# --- Packed (multi-item) diet requests ---
+class DietBatchInput(BaseModel):
+    requests: List[DietInput] = Field(..., description="Independent diet requests, answered in one model call")
+
+class DietBatchEntry(DietResponse):
+    index: int = Field(..., description="Position of the request this entry answers")
+
+class DietBatchResponse(BaseModel):
+    responses: List[DietBatchEntry] = Field(..., description="One entry per request, tagged with its index")
@@ -0,0 +1,56 @@
+
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Optional
+from models.inventory_schemas import InventoryInput, InventoryResponse
+from models.diet_schemas import DietResponse
+from models.planner_schemas import PlannerResponse
+
+class PipelineResult(BaseModel):
+    """
+    Result of a full recipe pipeline run: the final recipe plus the typed
+    output of each intermediate stage and a per-stage timing breakdown.
+    """
+    recipe: PlannerResponse = Field(..., description="Final recipe produced by the PlannerAgent")
+    inventory: Optional[InventoryResponse] = Field(None, description="Cleaned inventory from the InventoryAgent")
+    diet: Optional[DietResponse] = Field(None, description="Compatible items and ideas from the DietAgent")
+    stage_timings_ms: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Wall time per stage in milliseconds, keyed by agent name, plus 'total'"
+    )
+    cached: bool = Field(False, description="True if served from the response cache (timings are from the original run)")
+    degraded: List[str] = Field(
+        default_factory=list,
+        description="Stages that ran out of time and answered with a local fallback (such results are not cached)"
+    )
+
+class PipelineEvent(BaseModel):
+    """
+    One update of a streamed recipe pipeline run (POST /api/recipe/stream).
+
+    'stage' carries a finished stage's typed output, 'partial' one validated
+    PlannerPiece (title, ingredient or Step) as soon as the model writes it,
+    'result' the full PipelineResult and 'error' a failure after the stream
+    has started.
+    """
+    event: Literal["stage", "partial", "result", "error"] = Field(..., description="Kind of update")
+    stage: Optional[str] = Field(None, description="Agent name of the stage this update belongs to")
+    data: Any = Field(None, description="Stage output, planner piece, pipeline result or error detail")
+    elapsed_ms: float = Field(0.0, description="Milliseconds since the request started")
+
+class RecipeBatchInput(BaseModel):
+    """
+    Input for POST /api/recipe/batch: many pantry+diet requests at once.
+    Example: {"requests": [{"items": ["tomato"], "diet": "vegan"}, ...]}
+    """
+    requests: List[InventoryInput] = Field(..., description="Pantry+diet inputs, planned independently")
+
+class RecipeBatchItem(BaseModel):
+    """Outcome of one request of a batch: either a recipe or an error."""
+    index: int = Field(..., description="Position of the request in the batch input")
+    recipe: Optional[PlannerResponse] = Field(None, description="Planned recipe, if the pipeline succeeded")
+    error: Optional[str] = Field(None, description="Why the pipeline failed for this request")
+    cached: bool = Field(False, description="True if served from the response cache")
+
+class RecipeBatchResponse(BaseModel):
+    """Results of a batch, in the order of the input requests."""
+    results: List[RecipeBatchItem] = Field(..., description="One item per input request")
@@ -1,6 +1,6 @@
 
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional, Union
 
 class PlannerInput(BaseModel):
     """
@@ -21,4 +21,13 @@ class PlannerResponse(BaseModel):
     """
     title: str = Field(..., description="Title of the recipe")
     ingredients: List[str] = Field(..., description="List of ingredients required")
-    steps: List[Step] = Field(..., description="Step-by-step cooking instructions")
\ No newline at end of file
+    steps: List[Step] = Field(..., description="Step-by-step cooking instructions")
+
+class PlannerPiece(BaseModel):
+    """
+    One validated piece of a PlannerResponse that is still being generated:
+    the title, one ingredient or one Step, in the order the model wrote them.
+    """
+    field: str = Field(..., description="PlannerResponse field the piece belongs to")
+    index: Optional[int] = Field(None, description="Position in the list for ingredients and steps")
+    value: Union[Step, str] = Field(..., description="The validated title, ingredient or Step")
@@ -18,57 +18,36 @@ Usage:
 
 from fastapi import APIRouter, HTTPException
 from models.diet_schemas import DietInput, DietResponse
-# from models.planner_schemas import PlannerResponse
-from google.genai import types
-from config.app_config import APP_NAME, SESSION_ID, USER_ID
-from agents.diet_agent import diet_agent
-from runner_manager import RunnerManager
-import json
+from agents.diet_agent import diet_cache, run_diet
+from services.response_cache import request_key
+from services.deadline import DeadlineExceeded
+from services.admission import Overloaded
+from services.single_flight import SingleFlight
 
 router = APIRouter()
 
+# Identical /diet payloads arriving together share one agent run
+diet_flight = SingleFlight("diet")
+
 @router.post("/diet", response_model=DietResponse)
 async def diet_endpoint(payload: DietInput) -> DietResponse:
     """
     Diet endpoint.
     Uses the DietAgent pipeline to filter items based on dietary rules
     and return structured suggestions.
+    Repeated payloads are answered from the diet response cache, and
+    concurrent identical payloads share one in-flight agent run.
     """
-
-    # Initialize (or reuse) the singleton runner for the DietAgent
-    runner = await RunnerManager.init_runner(diet_agent)
-
-    # Convert payload to JSON string for the agent
-    user_content = types.Content(
-        role="user",
-        parts=[types.Part(text=payload.model_dump_json())]
-    )
-
-    final_response_content = None
-
-    # Stream events from the agent until the final response arrives
-    async for event in runner.run_async(
-        user_id=USER_ID,
-        session_id=SESSION_ID,
-        new_message=user_content
-    ):
-        if event.is_final_response():
-            final_response_content = (
-                event.content.parts[0].text
-                if event.content and event.content.parts
-                else None
-            )
-
-    # Ensure we received a final response
-    if not final_response_content:
-        raise HTTPException(
-            status_code=500,
-            detail="No final response from diet pipeline"
-        )
-
-    # Parse JSON output safely
-    parsed_output = json.loads(final_response_content or "{}")
-
-    # Return typed response model
-    return DietResponse(**parsed_output)
-
+    cache_key = request_key(payload)
+    cached = diet_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        # Same path as the pipeline's diet stage: local rules first, the
+        # model for what they cannot decide, then the shared fallback
+        return await diet_flight.do(cache_key, lambda: run_diet(payload.items, payload.diet))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=e.retry_after_header)
@@ -10,14 +10,21 @@ and filtering item lists, as well as basic health check routes.
 Endpoints:
     GET /                - Root health check, returns a simple success message.
     GET /health          - Health status endpoint, returns {"status": "ok"}.
+    GET /cache/stats     - Hit/miss counters of the agent response caches.
+    GET /admission/stats - In-flight, queued and shed counters of model call admission.
+    GET /circuit/stats   - State of the circuit breaker of each agent's model.
     POST /inventory      - Delegates to the Inventory Agent to filter usable items.
     POST /ask            - Stub endpoint for testing, simulates inventory agent behavior.
 
 Usage:
     Imported into main.py and registered via app.include_router(inventory_routes.router).
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from agents import inventory_agent
+from agents.diet_rules import compatible_items, is_known_diet
+from services.response_cache import cache_stats
+from services.admission import Overloaded, admission_stats
+from services.circuit_breaker import breaker_stats
 
 router = APIRouter()
 
@@ -30,6 +37,18 @@ def health_check():
 def health():
     return {"status": "ok"}
 
+@router.get("/cache/stats")
+def response_cache_stats():
+    return cache_stats()
+
+@router.get("/admission/stats")
+def model_admission_stats():
+    return admission_stats()
+
+@router.get("/circuit/stats")
+def circuit_breaker_stats():
+    return breaker_stats()
+
 # Stub /ask endpoint for testing
 @router.post("/ask")
 def ask(payload: dict):
@@ -41,8 +60,8 @@ def ask(payload: dict):
     items = payload.get("items", [])
     diet = payload.get("diet", "")
 
-    # Filter out chicken breast if diet is vegan
-    diet_filtered = [i for i in items if not (diet == "vegan" and i == "chicken breast")]
+    # Filter with the local diet rules (unknown diets keep every item)
+    diet_filtered = compatible_items(items, diet) if is_known_diet(diet) else items
 
     return {
         "usable_items": [i for i in items if i.strip()],
@@ -55,4 +74,7 @@ async def filter_inventory(request: inventory_agent.InventoryInput):
     """
     Endpoint that delegates to the Inventory Agent.
     """
-    return await inventory_agent.run_inventory(request.items)
\ No newline at end of file
+    try:
+        return await inventory_agent.run_inventory(request.items, diet=request.diet)
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=e.retry_after_header)
\ No newline at end of file
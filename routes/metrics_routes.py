@@ -0,0 +1,61 @@
+"""
+Metrics Routes Module
+---------------------
+
+This module exposes the pipeline's latency and token metrics in Prometheus
+text format.
+
+Endpoints:
+    GET /metrics         - Histograms of runner calls, sub-agent wall time,
+                           time to first event, tokens and model calls, plus
+                           cache, admission, circuit, single-flight and
+                           in-flight runner invocation counters.
+
+Usage:
+    Imported into the app and registered without a prefix, so scrapers find
+    it at /metrics: app.include_router(metrics_routes.router).
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from agents.recipe_pipeline import recipe_flight
+from routes.diet_routes import diet_flight
+from runner_manager import RunnerManager
+from services.admission import admission_stats
+from services.circuit_breaker import OPEN, breaker_stats
+from services.metrics import metrics, stats_lines
+from services.response_cache import cache_stats
+
+router = APIRouter()
+
+
+def _admission_lines():
+    stats = admission_stats()
+    queued = stats.pop("queued")
+    return stats_lines("recipe_admission", "Model call admission", {"all": stats}, "controller") + stats_lines(
+        "recipe_admission", "Model calls waiting for admission", {p: {"queued": n} for p, n in queued.items()}, "priority"
+    )
+
+
+def _circuit_lines():
+    stats = {name: {**s, "open": int(s["state"] == OPEN)} for name, s in breaker_stats().items()}
+    return stats_lines("recipe_circuit", "Circuit breaker", stats, "model")
+
+
+metrics.add_collector(lambda: stats_lines("recipe_cache", "Response cache", cache_stats(), "cache"))
+metrics.add_collector(_admission_lines)
+metrics.add_collector(_circuit_lines)
+metrics.add_collector(lambda: stats_lines(
+    "recipe_single_flight", "Coalesced in-flight requests",
+    {"recipe": recipe_flight.stats(), "diet": diet_flight.stats()}, "flight",
+))
+metrics.add_collector(lambda: stats_lines(
+    "recipe_runner", "Pooled runner",
+    {name: {"active_invocations": active} for name, active in RunnerManager.active_invocations().items()}, "runner",
+))
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint() -> PlainTextResponse:
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
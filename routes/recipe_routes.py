@@ -1,44 +1,135 @@
-from fastapi import APIRouter, HTTPException
+import logging
+from typing import List, Literal
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from config.app_config import RECIPE_BATCH_MAX_ITEMS, PLANNER_FANOUT_K, PLANNER_FANOUT_MAX_K
 from models.inventory_schemas import InventoryInput
+from models.pipeline_schemas import PipelineEvent, PipelineResult, RecipeBatchInput, RecipeBatchResponse
 from models.planner_schemas import PlannerResponse
-from google.genai import types
-from config.app_config import APP_NAME, SESSION_ID, USER_ID
-from agents.recipe_pipeline import recipe_pipeline
-from runner_manager import RunnerManager
-import json
+from services.admission import Overloaded
+from services.deadline import DeadlineExceeded
+from agents.recipe_pipeline import (
+    iter_recipe_batch, run_recipe_alternatives, run_recipe_batch, run_recipe_pipeline, stream_recipe_pipeline,
+)
 
 router = APIRouter()
 
-@router.post("/recipe", response_model=PlannerResponse)
-async def recipe_endpoint(payload: InventoryInput) -> PlannerResponse:
-    
-    runner = await RunnerManager.init_runner(recipe_pipeline)
+def _wants_sse(request: Request) -> bool:
+    return "text/event-stream" in request.headers.get("accept", "")
+
+def _encode(name: str, model: BaseModel, sse: bool) -> str:
+    """One Server-Sent Event, or one NDJSON line."""
+    if sse:
+        return f"event: {name}\ndata: {model.model_dump_json()}\n\n"
+    return model.model_dump_json() + "\n"
 
-    user_content = types.Content(
-        role="user",
-        parts=[types.Part(text=payload.model_dump_json())]
+def _streaming_response(body, sse: bool) -> StreamingResponse:
+    return StreamingResponse(
+        body,
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
-    final_response_content = None
-
-    async for event in runner.run_async(
-        user_id=USER_ID,
-        session_id=SESSION_ID,
-        new_message=user_content
-    ):
-        if event.is_final_response():
-            final_response_content = (
-                event.content.parts[0].text
-                if event.content and event.content.parts
-                else None
-            )
-
-    if not final_response_content:
+def _server_timing(result: PipelineResult) -> str:
+    """Server-Timing header value: per-stage wall time, or a cache hit."""
+    if result.cached:
+        return 'cache;desc="hit"'
+    return ", ".join(f"{stage};dur={ms:.1f}" for stage, ms in result.stage_timings_ms.items())
+
+@router.post("/recipe", response_model=PlannerResponse)
+async def recipe_endpoint(payload: InventoryInput, response: Response) -> PlannerResponse:
+    # Single pipeline run on the pooled runner with an isolated session;
+    # the planner's typed output is read straight from its final event.
+    # Stage timings are reported in the Server-Timing header, and stages
+    # that fell back to local answers in X-Degraded.
+    try:
+        result = await run_recipe_pipeline(payload.items, payload.diet)
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=e.retry_after_header)
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    response.headers["Server-Timing"] = _server_timing(result)
+    if result.degraded:
+        response.headers["X-Degraded"] = ",".join(result.degraded)
+    return result.recipe
+
+@router.post("/recipe/alternatives", response_model=List[PlannerResponse])
+async def recipe_alternatives_endpoint(
+    payload: InventoryInput,
+    top_k: int = Query(PLANNER_FANOUT_K, ge=1, le=PLANNER_FANOUT_MAX_K),
+    mode: Literal["first", "ranked"] = "ranked",
+) -> List[PlannerResponse]:
+    """
+    Expand several recipe ideas in parallel.
+    mode=ranked returns every valid plan, best first; mode=first returns
+    only the fastest valid plan (for tighter tail latency).
+    """
+    try:
+        recipes = await run_recipe_alternatives(payload.items, payload.diet, top_k=top_k, mode=mode)
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=e.retry_after_header)
+    if not recipes:
+        raise HTTPException(status_code=500, detail="No valid recipe from the planner")
+    return recipes
+
+@router.post("/recipe/stream")
+async def recipe_stream_endpoint(payload: InventoryInput, request: Request) -> StreamingResponse:
+    """
+    Streaming variant of /recipe.
+    Pushes each stage's output as soon as it finishes (cleaned inventory,
+    compatible items and ideas, then the recipe's title, ingredients and
+    steps one by one while the planner writes them, and the final recipe).
+
+    Sent as Server-Sent Events when the client accepts text/event-stream,
+    otherwise as newline-delimited JSON. Events are produced only as fast as
+    the client reads them. A failure after the first byte (including a
+    model call shed under load) is reported as an 'error' event, since the
+    status code has already been sent.
+    """
+    sse = _wants_sse(request)
+
+    async def body():
+        try:
+            async for event in stream_recipe_pipeline(payload.items, payload.diet):
+                yield _encode(event.event, event, sse)
+        except Exception as e:
+            logging.exception("Streamed recipe pipeline failed")
+            yield _encode("error", PipelineEvent(event="error", data=str(e)), sse)
+
+    return _streaming_response(body(), sse)
+
+@router.post("/recipe/batch", response_model=RecipeBatchResponse)
+async def recipe_batch_endpoint(payload: RecipeBatchInput, request: Request, stream: bool = False):
+    """
+    Plan many pantries in one call.
+    Identical requests in the batch are planned once, runs are bounded in
+    concurrency, their diet stages are packed into shared model calls and
+    their model calls queue behind interactive requests, and each request
+    gets its own recipe or error.
+
+    By default returns all results in input order. With ?stream=true each
+    result is sent as soon as it completes (NDJSON, or SSE 'item' events when
+    the client accepts text/event-stream); use its `index` to match inputs.
+    """
+    if len(payload.requests) > RECIPE_BATCH_MAX_ITEMS:
         raise HTTPException(
-            status_code=500,
-            detail="No final response from recipe pipeline"
+            status_code=413,
+            detail=f"Batch of {len(payload.requests)} requests exceeds the limit of {RECIPE_BATCH_MAX_ITEMS}"
         )
 
-    parsed_output = json.loads(final_response_content or "{}")
+    if not stream:
+        return RecipeBatchResponse(results=await run_recipe_batch(payload.requests))
+
+    sse = _wants_sse(request)
+
+    async def body():
+        async for item in iter_recipe_batch(payload.requests):
+            yield _encode("item", item, sse)
 
-    return PlannerResponse(**parsed_output)
+    return _streaming_response(body(), sse)
@@ -1,53 +1,97 @@
 # runner_manager.py
-from google.adk.runners import InMemoryRunner
-from config.app_config import APP_NAME, USER_ID, SESSION_ID
+import logging
+from contextlib import asynccontextmanager
+from google.adk.runners import Runner
+from config.app_config import APP_NAME, session_service
 
 class RunnerManager:
-    _runner = None
-    _agent = None
+    """
+    Pool of long-lived runners, one per agent (keyed by agent name).
+
+    Runners are stateless between invocations, so a single runner per agent
+    can serve many concurrent requests; each request brings its own session.
+    Requests for different agents (e.g. /api/diet and /api/recipe) no longer
+    tear down each other's runner.
+
+    This is the only place runners are built: the run_* helpers and the
+    routes all borrow them here, and every runner uses the shared, bounded
+    session_service, so sessions live in a single store.
+    """
+    _runners = {}
+    _active = {}
 
     @classmethod
     async def init_runner(cls, agent):
         """
-        Initialize the singleton runner with a specific agent.
-        Creates the session once.
+        Return the pooled runner for an agent, creating it on first use.
+        Sessions are allocated per request (see services/session_manager.py),
+        so no shared session is created here.
+        """
+        runner = cls._runners.get(agent.name)
+        if runner is None:
+            runner = Runner(agent=agent, app_name=APP_NAME, session_service=session_service)
+            cls._runners[agent.name] = runner
+            cls._active[agent.name] = 0
+        elif runner.agent is not agent:
+            raise ValueError(f"Another agent named '{agent.name}' already has a pooled runner")
+        return runner
+
+    @classmethod
+    async def warm_up(cls, agents):
+        """
+        Build the runners for the given agents ahead of the first request.
+        Called during FastAPI lifespan startup.
         """
-        if cls._runner is None or cls._agent != agent:
-            cls._agent = agent
-            cls._runner = InMemoryRunner(agent=agent, app_name=APP_NAME)
-            await cls._runner.session_service.create_session(
-                app_name=APP_NAME,
-                user_id=USER_ID,
-                session_id=SESSION_ID
-            )
-        return cls._runner
+        for agent in agents:
+            await cls.init_runner(agent)
 
     @classmethod
-    def get_runner(cls):
+    def get_runner(cls, agent):
         """
-        Return the existing runner instance.
-        Must be initialized first with init_runner(agent).
+        Return the existing runner instance for an agent.
+        Must be initialized first with init_runner(agent) or warm_up([...]).
         """
-        if cls._runner is None:
-            raise RuntimeError("Runner not initialized. Call init_runner(agent) first.")
-        return cls._runner
+        runner = cls._runners.get(agent.name)
+        if runner is None:
+            raise RuntimeError(f"Runner for '{agent.name}' not initialized. Call init_runner(agent) first.")
+        return runner
+
+    @classmethod
+    @asynccontextmanager
+    async def invocation(cls, agent):
+        """
+        Borrow the pooled runner for one invocation.
+        Tracks how many are active. Concurrency is not limited here: runners
+        hold no state, and model calls are bounded (and shed with 503 when
+        the queue is full) by the admission controller (services/admission.py).
+        """
+        runner = await cls.init_runner(agent)
+        cls._active[agent.name] += 1
+        try:
+            yield runner
+        finally:
+            cls._active[agent.name] -= 1
+
+    @classmethod
+    def active_invocations(cls):
+        """Return the number of in-flight invocations per pooled runner."""
+        return dict(cls._active)
 
     @classmethod
     async def shutdown_runner(cls):
         """
-        Clean up the runner instance and release resources.
+        Clean up all pooled runners and release resources.
         Called during FastAPI lifespan shutdown.
         """
-        if cls._runner is not None:
+        for name, runner in list(cls._runners.items()):
             try:
                 # If the runner has a shutdown/close method, call it
-                if hasattr(cls._runner, "close"):
-                    await cls._runner.close()
-                elif hasattr(cls._runner, "shutdown"):
-                    await cls._runner.shutdown()
+                if hasattr(runner, "close"):
+                    await runner.close()
+                elif hasattr(runner, "shutdown"):
+                    await runner.shutdown()
             except Exception as e:
-                # Log or print for debugging, but don't block shutdown
-                print(f"Runner shutdown error: {e}")
-            finally:
-                cls._runner = None
-                cls._agent = None
+                # Log for debugging, but don't block shutdown
+                logging.warning("Runner shutdown error (%s): %s", name, e)
+        cls._runners = {}
+        cls._active = {}
@@ -0,0 +1,260 @@
+"""
+Admission Module
+----------------
+
+Shared admission control for every model call.
+
+Nothing used to limit how many runner streams hit the model at once: under
+a spike the provider quota ran out, 429s came back in storms and client
+retries made everything slower. Every GatewayLlm call (services/model_gateway.py)
+now goes through one AdmissionController, which enforces:
+
+    - a maximum number of calls in flight
+    - a requests-per-second and a tokens-per-minute token bucket
+      (tokens are estimated from the request, then corrected from the
+      response's usage metadata)
+    - priority classes: waiting "interactive" calls (the /api endpoints)
+      are admitted before waiting "batch" calls (batch planning)
+    - bounded queues: when a class's queue is full, or the rate limits
+      would hold a call too long, it is shed with Overloaded, which the
+      routes turn into 503 with a Retry-After header
+
+The priority of a call is taken from the request's context:
+
+    with priority_scope("batch"):
+        ...   # model calls made here queue behind interactive ones
+
+Usage:
+    async with admission.admit(estimated_tokens) as ticket:
+        response = await call_model()
+        ticket.used(response_tokens)
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from config.app_config import (
+    ADMISSION_MAX_IN_FLIGHT, ADMISSION_RPS, ADMISSION_TPM, ADMISSION_MAX_QUEUE,
+    ADMISSION_MAX_RATE_WAIT_SECONDS,
+)
+
+# Priority classes, most urgent first
+PRIORITIES = ("interactive", "batch")
+
+
+class Overloaded(Exception):
+    """A model call was shed instead of queued; retry after `retry_after` seconds."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> Dict[str, str]:
+        """Headers for the 503 response (Retry-After in whole seconds)."""
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at `rate` per second up to `capacity`. reserve()
+    takes tokens immediately, going into debt if needed, and returns how
+    long the caller must wait for the debt to be repaid.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens would be available (nothing taken)."""
+        self._refill()
+        return max(0.0, (amount - self._tokens) / self.rate)
+
+    def reserve(self, amount: float) -> float:
+        wait = self.wait_time(amount)
+        self._tokens -= amount
+        return wait
+
+    def adjust(self, amount: float) -> None:
+        """Return (positive) or charge (negative) tokens after the fact."""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class Ticket:
+    """An admitted call; report the tokens it actually used with used()."""
+
+    def __init__(self, controller: "AdmissionController", estimated_tokens: int):
+        self._controller = controller
+        self.estimated_tokens = estimated_tokens
+
+    def used(self, tokens: Optional[int]) -> None:
+        if tokens is not None and self._controller.tpm is not None:
+            self._controller.tpm.adjust(self.estimated_tokens - tokens)
+
+
+class AdmissionController:
+    """Concurrency, rate and priority limits shared by all model calls."""
+
+    def __init__(
+        self,
+        max_in_flight: int = ADMISSION_MAX_IN_FLIGHT,
+        rps: float = ADMISSION_RPS,
+        tpm: float = ADMISSION_TPM,
+        max_queue: Optional[Dict[str, int]] = None,
+        max_rate_wait: float = ADMISSION_MAX_RATE_WAIT_SECONDS,
+    ):
+        self.max_in_flight = max_in_flight
+        # A rate of 0 disables that bucket
+        self.rps = TokenBucket(rps, max(1.0, rps)) if rps > 0 else None
+        self.tpm = TokenBucket(tpm / 60, tpm) if tpm > 0 else None
+        self.max_queue = dict(ADMISSION_MAX_QUEUE if max_queue is None else max_queue)
+        self.max_rate_wait = max_rate_wait
+
+        self._in_flight = 0
+        self._waiters: List[List[Any]] = []      # heap of [priority rank, seq, future]
+        self._queued = {name: 0 for name in PRIORITIES}
+        self._seq = itertools.count()
+        self._stats = {"admitted": 0, "shed": 0, "max_queue_depth": 0}
+        self._queue_wait_total = 0.0
+
+    def has_capacity(self) -> bool:
+        """True if a call would be admitted right now without queueing."""
+        return self._in_flight < self.max_in_flight and not self._waiters
+
+    def queue_depth(self) -> int:
+        return sum(self._queued.values())
+
+    def stats(self) -> Dict[str, Any]:
+        admitted = self._stats["admitted"]
+        return {
+            **self._stats,
+            "in_flight": self._in_flight,
+            "queued": dict(self._queued),
+            "avg_queue_wait_ms": (self._queue_wait_total / admitted * 1000) if admitted else 0.0,
+        }
+
+    @asynccontextmanager
+    async def admit(self, estimated_tokens: int = 0, priority: Optional[str] = None) -> AsyncIterator[Ticket]:
+        """
+        Hold a slot for one model call. Waits in priority order for a free
+        slot and for the rate buckets; raises Overloaded instead when the
+        class's queue is full or the rate wait would exceed max_rate_wait.
+        """
+        priority = priority or current_priority()
+        if self.tpm is not None:
+            # A call larger than the whole bucket would never be admitted
+            estimated_tokens = min(estimated_tokens, int(self.tpm.capacity))
+        started = time.monotonic()
+        await self._acquire_slot(priority)
+        try:
+            self._wait_for_rate(estimated_tokens)
+            wait = self._reserve_rate(estimated_tokens)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._stats["admitted"] += 1
+            self._queue_wait_total += time.monotonic() - started
+            yield Ticket(self, estimated_tokens)
+        finally:
+            self._release_slot()
+
+    async def _acquire_slot(self, priority: str) -> None:
+        if self.has_capacity():
+            self._in_flight += 1
+            return
+        if self._queued[priority] >= self.max_queue.get(priority, 0):
+            self._shed(f"{priority} queue is full ({self._queued[priority]} waiting)", self._drain_estimate())
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, [PRIORITIES.index(priority), next(self._seq), future])
+        self._queued[priority] += 1
+        self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self.queue_depth())
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we were cancelled: pass it on
+                self._release_slot()
+            raise
+        finally:
+            self._queued[priority] -= 1
+
+    def _release_slot(self) -> None:
+        # Hand the slot straight to the most urgent live waiter, if any
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._in_flight -= 1
+
+    def _wait_for_rate(self, estimated_tokens: int) -> None:
+        wait = max(
+            self.rps.wait_time(1) if self.rps else 0.0,
+            self.tpm.wait_time(estimated_tokens) if self.tpm else 0.0,
+        )
+        if wait > self.max_rate_wait:
+            self._shed(f"rate limit would delay the call by {wait:.1f}s", wait)
+
+    def _reserve_rate(self, estimated_tokens: int) -> float:
+        return max(
+            self.rps.reserve(1) if self.rps else 0.0,
+            self.tpm.reserve(estimated_tokens) if self.tpm else 0.0,
+        )
+
+    def _drain_estimate(self) -> float:
+        """Rough seconds until the queue has drained, for Retry-After."""
+        rate = self.rps.rate if self.rps else float(self.max_in_flight)
+        return max(1.0, self.queue_depth() / rate)
+
+    def _shed(self, reason: str, retry_after: float) -> None:
+        self._stats["shed"] += 1
+        logging.warning("Shedding model call: %s", reason)
+        raise Overloaded(f"Model capacity exhausted: {reason}", retry_after)
+
+
+_priority: ContextVar[str] = ContextVar("request_priority", default=PRIORITIES[0])
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+@contextmanager
+def priority_scope(priority: str) -> Iterator[None]:
+    """Run the block's model calls in a priority class (see PRIORITIES)."""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority '{priority}'; expected one of {PRIORITIES}")
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        try:
+            _priority.reset(token)
+        except ValueError:
+            # Closed from another context (see deadline_scope)
+            pass
+
+
+# The controller every model call goes through
+admission = AdmissionController()
+
+
+def admission_stats() -> Dict[str, Any]:
+    """In-flight, queue depth, admitted and shed counters of the shared controller."""
+    return admission.stats()
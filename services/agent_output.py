@@ -0,0 +1,93 @@
+"""
+Agent Output Module
+-------------------
+
+Fast-path access to the typed output of an ADK LlmAgent.
+
+When an LlmAgent has both an output_schema and an output_key, ADK validates
+the model's final text against the schema and stores the resulting dict in
+the final event's state_delta under output_key. Reading it from there avoids:
+
+    - a full session fetch (InMemorySessionService deep-copies the session
+      on every get_session call), and
+    - a second json.loads of text ADK has already parsed and validated.
+
+Usage:
+    response = await run_for_output(runner, diet_agent, user_id=USER_ID,
+                                    session_id=session_id, new_message=content)
+    # -> DietResponse or None
+"""
+
+from typing import Optional
+
+from google.adk.agents import LlmAgent
+from google.adk.events import Event
+from google.adk.runners import Runner
+from google.genai import types
+from pydantic import BaseModel
+
+from services.metrics import instrument_run
+
+
+def output_from_event(event: Event, agent: LlmAgent) -> Optional[BaseModel]:
+    """
+    Return the agent's typed output if this event carries it, otherwise None.
+
+    Only final events authored by the agent itself are considered, so this
+    also picks the right stage out of a SequentialAgent event stream.
+    """
+    if event.author != agent.name or not event.is_final_response():
+        return None
+    state_delta = event.actions.state_delta if event.actions else None
+    if not state_delta or agent.output_key not in state_delta:
+        return None
+    return coerce_output(state_delta[agent.output_key], agent)
+
+
+def coerce_output(value, agent: LlmAgent) -> Optional[BaseModel]:
+    """Turn a stored output_key value into the agent's output_schema model."""
+    if value is None or agent.output_schema is None:
+        return None
+    if isinstance(value, agent.output_schema):
+        return value
+    if isinstance(value, dict):
+        # Already parsed and validated by ADK: no JSON round trip needed
+        return agent.output_schema.model_validate(value)
+    if isinstance(value, str):
+        return agent.output_schema.model_validate_json(value)
+    return None
+
+
+async def run_for_output(
+    runner: Runner,
+    agent: LlmAgent,
+    *,
+    user_id: str,
+    session_id: str,
+    new_message: types.Content,
+) -> Optional[BaseModel]:
+    """
+    Run the runner to completion and return the typed output of `agent`.
+
+    The output is taken straight from the final event. Only if no event
+    carried it (e.g. a custom agent wrote the state directly) is the session
+    state consulted, which costs one session copy.
+    """
+    output = None
+    events = runner.run_async(
+        user_id=user_id,
+        session_id=session_id,
+        new_message=new_message,
+    )
+    async for event in instrument_run(events, runner.agent.name):
+        output = output_from_event(event, agent) or output
+
+    if output is None and agent.output_key:
+        session = await runner.session_service.get_session(
+            app_name=runner.app_name,
+            user_id=user_id,
+            session_id=session_id,
+        )
+        if session:
+            output = coerce_output(session.state.get(agent.output_key), agent)
+    return output
@@ -0,0 +1,149 @@
+"""
+Circuit Breaker Module
+----------------------
+
+Fail fast while a model is down.
+
+Without a breaker every request during an outage waited through the full
+retry backoff before the agents fell back to their local answers. Each
+gateway model (one per model and agent, see services/model_gateway.py) now
+has a CircuitBreaker over its recent calls:
+
+    closed     calls go through; the outcome and latency of each is recorded.
+               The circuit opens when, over the last CIRCUIT_WINDOW calls
+               (at least CIRCUIT_MIN_CALLS), the error rate reaches
+               CIRCUIT_ERROR_RATE or the share of calls slower than
+               CIRCUIT_SLOW_CALL_SECONDS reaches CIRCUIT_SLOW_CALL_RATE.
+    open       calls fail immediately with CircuitOpen, so the agents answer
+               from their local rules and the planner from a template.
+               After CIRCUIT_OPEN_SECONDS a background probe is sent.
+    half_open  the probe is in flight; calls still fail fast. A successful
+               probe closes the circuit, a failed one opens it again.
+
+Usage:
+    breaker = CircuitBreaker("gemini:diet_agent", probe=send_tiny_request)
+    breaker.check()                 # raises CircuitOpen when open
+    breaker.record(ok, seconds)     # after each real call
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from config.app_config import (
+    CIRCUIT_WINDOW, CIRCUIT_MIN_CALLS, CIRCUIT_ERROR_RATE, CIRCUIT_SLOW_CALL_SECONDS,
+    CIRCUIT_SLOW_CALL_RATE, CIRCUIT_OPEN_SECONDS,
+)
+from services.admission import Overloaded
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+# Breakers by name, so their states can be reported together
+BREAKERS: Dict[str, "CircuitBreaker"] = {}
+
+
+class CircuitOpen(Overloaded):
+    """The model's circuit is open: the call was not attempted."""
+
+
+class CircuitBreaker:
+    """Error-rate and slow-call circuit breaker with a background half-open probe."""
+
+    def __init__(
+        self,
+        name: str,
+        probe: Optional[Callable[[], Awaitable[Any]]] = None,
+        window: int = CIRCUIT_WINDOW,
+        min_calls: int = CIRCUIT_MIN_CALLS,
+        error_rate: float = CIRCUIT_ERROR_RATE,
+        slow_call_seconds: float = CIRCUIT_SLOW_CALL_SECONDS,
+        slow_call_rate: float = CIRCUIT_SLOW_CALL_RATE,
+        open_seconds: float = CIRCUIT_OPEN_SECONDS,
+    ):
+        self.name = name
+        self.probe = probe
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+
+        self.state = CLOSED
+        self._calls = deque(maxlen=window)      # (ok, slow) per recent call
+        self._opened_at = 0.0
+        self._probe_task: Optional[asyncio.Task] = None
+        self._stats = {"opened": 0, "rejected": 0, "probes": 0}
+        BREAKERS[name] = self
+
+    def retry_after(self) -> float:
+        """Seconds until the next probe is due (0 when closed)."""
+        if self.state == CLOSED:
+            return 0.0
+        return max(1.0, self._opened_at + self.open_seconds - time.monotonic())
+
+    def check(self) -> None:
+        """Raise CircuitOpen unless calls may go through."""
+        if self.state == CLOSED:
+            return
+        self._stats["rejected"] += 1
+        raise CircuitOpen(f"Circuit {self.name} is {self.state}; serving local fallbacks", self.retry_after())
+
+    def record(self, ok: bool, seconds: float) -> None:
+        """Record the outcome of a call made while closed."""
+        if self.state != CLOSED:
+            return
+        self._calls.append((ok, seconds >= self.slow_call_seconds))
+        if len(self._calls) < self.min_calls:
+            return
+        errors = sum(1 for ok, _ in self._calls if not ok) / len(self._calls)
+        slow = sum(1 for _, is_slow in self._calls if is_slow) / len(self._calls)
+        if errors >= self.error_rate or slow >= self.slow_call_rate:
+            logging.warning("Circuit %s opened (error rate %.0f%%, slow calls %.0f%%)", self.name, errors * 100, slow * 100)
+            self._open()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "state": self.state, "window_calls": len(self._calls)}
+
+    def reset(self) -> None:
+        """Close the circuit and forget recent calls (e.g. after swapping the model)."""
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            self._probe_task = None
+        self.state = CLOSED
+        self._calls.clear()
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._stats["opened"] += 1
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = asyncio.get_running_loop().create_task(self._probe_until_closed())
+
+    def _close(self) -> None:
+        logging.info("Circuit %s closed", self.name)
+        self.state = CLOSED
+        self._calls.clear()
+
+    async def _probe_until_closed(self) -> None:
+        while self.state != CLOSED:
+            await asyncio.sleep(max(0.0, self._opened_at + self.open_seconds - time.monotonic()))
+            if self.probe is None:
+                self._close()
+                return
+            self.state = HALF_OPEN
+            self._stats["probes"] += 1
+            try:
+                await asyncio.wait_for(self.probe(), self.slow_call_seconds)
+            except Exception as e:
+                logging.warning("Circuit %s probe failed: %r", self.name, e)
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+            else:
+                self._close()
+
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """State and counters of every circuit breaker, by name."""
+    return {name: breaker.stats() for name, breaker in BREAKERS.items()}
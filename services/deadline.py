@@ -0,0 +1,139 @@
+"""
+Deadline Module
+---------------
+
+Request-scoped latency budgets, propagated to every model call.
+
+A request used to have no deadline at all: one 429 or 503 could turn into
+minutes of client retries while the FastAPI request hung. Entry points now
+open a deadline_scope(); the budget travels in a context variable (so it
+follows the request into the ADK runner and any task it spawns) and the
+model gateway (services/model_gateway.py) caps each call with what is left.
+
+A scope may split its budget across ordered stages. A stage may use
+everything that is left except the shares reserved for the stages after
+it, so time saved early flows to later stages:
+
+    with deadline_scope(20, stages={"inventory_agent": 0.15, "diet_agent": 0.35, "planner_agent": 0.5}):
+        ...   # diet_agent calls may use what is left minus 50% of 20 s
+
+Scopes nest: an inner scope can shorten the deadline, never extend it.
+Stages that had to fall back to a local answer are recorded with
+mark_degraded() and shared by nested scopes, so results built from them are
+not cached. Concurrent tasks of one request that must tell their own
+results apart (the planner fan-out) collect theirs with track_degraded().
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
+from typing import Dict, Iterator, Optional, Set
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's latency budget ran out before the work finished."""
+
+
+@dataclass(frozen=True)
+class Deadline:
+    expires_at: float               # time.monotonic() value
+    total: float                    # seconds, as given to deadline_scope
+    stages: Dict[str, float] = field(default_factory=dict)   # ordered stage -> share of total
+    degraded: Set[str] = field(default_factory=set)          # stages answered by a local fallback
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def stage_remaining(self, stage: str) -> float:
+        """Time stage may use: what is left minus the shares of the stages after it."""
+        names = list(self.stages)
+        if stage not in names:
+            return self.remaining()
+        later = names[names.index(stage) + 1:]
+        reserved = sum(self.stages[name] for name in later) * self.total
+        return max(0.0, self.remaining() - reserved)
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("request_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+def time_left(stage: Optional[str] = None) -> Optional[float]:
+    """Seconds left for a stage (or the whole request); None without a deadline."""
+    deadline = _current.get()
+    if deadline is None:
+        return None
+    return deadline.stage_remaining(stage) if stage else deadline.remaining()
+
+
+def mark_degraded(stage: str) -> None:
+    """
+    Record that a stage fell back to a local answer in this request, so
+    callers can skip caching the (degraded) result.
+    """
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.degraded.add(stage)
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float], stages: Optional[Dict[str, float]] = None) -> Iterator[Optional[Deadline]]:
+    """
+    Run the block under a deadline of `seconds` from now (None: keep the
+    enclosing deadline, if any). Stage shares only apply to this scope.
+    """
+    outer = _current.get()
+    if seconds is None:
+        yield outer
+        return
+
+    expires_at = time.monotonic() + seconds
+    if outer is not None and outer.expires_at <= expires_at:
+        # Cannot extend the caller's deadline; keep its expiry but use our stages
+        deadline = Deadline(outer.expires_at, outer.total, dict(stages or outer.stages), outer.degraded)
+    else:
+        deadline = Deadline(expires_at, seconds, dict(stages or {}), outer.degraded if outer else set())
+
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        try:
+            _current.reset(token)
+        except ValueError:
+            # An async generator holding the scope was closed from another
+            # context (e.g. garbage-collected); that context is gone anyway.
+            pass
+
+
+@contextmanager
+def track_degraded() -> Iterator[Set[str]]:
+    """
+    Collect the stages degraded inside the block in a set of their own, so
+    a task can tell whether its result was degraded while its siblings run
+    under the same request deadline. The stages are added to the enclosing
+    scope on exit. Without an enclosing deadline nothing is recorded.
+    """
+    outer = _current.get()
+    degraded: Set[str] = set()
+    if outer is None:
+        yield degraded
+        return
+
+    token = _current.set(replace(outer, degraded=degraded))
+    try:
+        yield degraded
+    finally:
+        outer.degraded.update(degraded)
+        try:
+            _current.reset(token)
+        except ValueError:
+            pass
@@ -0,0 +1,198 @@
+"""
+Fake LLM Module
+---------------
+
+Offline model backend for load tests, benchmarks and network-free tests.
+
+FakeLlm is a BaseLlm that answers every request locally with JSON valid for
+the request's output schema (InventoryResponse, DietResponse,
+PlannerResponse, DietBatchResponse; any other schema gets a generic sample),
+built from the items in the request so the pipeline behaves plausibly.
+It simulates the provider with:
+
+    - latency drawn from a log-normal distribution (median and spread)
+    - an error rate (raises FakeLlmError, like a 503 after retries)
+    - streaming in fixed-size text chunks with a delay between them
+
+Select it for every agent with MODEL_BACKEND=fake (see build_model in
+services/model_gateway.py); FAKE_LLM_* settings tune the simulation.
+
+Usage:
+    model = FakeLlm(model="fake", latency_ms=200, error_rate=0.01)
+"""
+
+import asyncio
+import json
+import math
+import random
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from pydantic import BaseModel, PrivateAttr
+
+from config.app_config import (
+    FAKE_LLM_LATENCY_MS, FAKE_LLM_LATENCY_SIGMA, FAKE_LLM_ERROR_RATE, FAKE_LLM_CHUNK_CHARS,
+    FAKE_LLM_CHUNK_DELAY_MS, FAKE_LLM_SEED,
+)
+
+# Rough characters per token, for the simulated usage metadata
+CHARS_PER_TOKEN = 4
+
+
+class FakeLlmError(RuntimeError):
+    """Injected model failure (see FakeLlm.error_rate)."""
+
+
+def _request_payload(llm_request: LlmRequest) -> Dict[str, Any]:
+    """The most recent JSON object in the conversation (the agent's input)."""
+    for content in reversed(llm_request.contents):
+        for part in reversed(content.parts or ()):
+            text = part.text or ""
+            start = text.find("{")
+            if start < 0:
+                continue
+            try:
+                payload = json.loads(text[start:])
+            except ValueError:
+                continue
+            if isinstance(payload, dict):
+                return payload
+    return {}
+
+
+def _items(payload: Dict[str, Any]) -> List[str]:
+    for key in ("compatible_items", "usable_items", "items"):
+        if isinstance(payload.get(key), list):
+            return [str(item).strip() for item in payload[key] if str(item).strip()]
+    return []
+
+
+def _ideas(items: List[str]) -> List[str]:
+    if not items:
+        return []
+    return [f"{items[0].title()} Bowl", f"Roasted {' and '.join(items[:2])}"]
+
+
+def _inventory(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "usable_items": _items(payload),
+        "diet": payload.get("diet", "unknown"),
+        "message": "Filtered usable items successfully.",
+    }
+
+
+def _diet(payload: Dict[str, Any]) -> Dict[str, Any]:
+    items = _items(payload)
+    return {"compatible_items": items, "suggested_recipe_ideas": _ideas(items)}
+
+
+def _diet_batch(payload: Dict[str, Any]) -> Dict[str, Any]:
+    requests = payload.get("requests") if isinstance(payload.get("requests"), list) else []
+    return {"responses": [{"index": index, **_diet(request)} for index, request in enumerate(requests)]}
+
+
+def _planner(payload: Dict[str, Any]) -> Dict[str, Any]:
+    items = _items(payload)
+    ideas = payload.get("suggested_recipe_ideas") or _ideas(items) or ["House Special"]
+    steps = [f"Prepare the {', '.join(items) or 'ingredients'}.", "Cook until tender.", "Season and serve."]
+    return {
+        "title": ideas[0],
+        "ingredients": items,
+        "steps": [{"step_number": n, "instruction": text} for n, text in enumerate(steps, start=1)],
+    }
+
+
+# Answer builders by output schema name
+RESPONDERS = {
+    "InventoryResponse": _inventory,
+    "DietResponse": _diet,
+    "DietBatchResponse": _diet_batch,
+    "PlannerResponse": _planner,
+}
+
+JSON_SAMPLES = {"string": "sample", "integer": 1, "number": 1.0, "boolean": True, "null": None}
+
+
+def _sample(schema: Dict[str, Any], defs: Dict[str, Any]) -> Any:
+    """A minimal value valid for a JSON schema node."""
+    if "$ref" in schema:
+        return _sample(defs[schema["$ref"].split("/")[-1]], defs)
+    if "anyOf" in schema:
+        return _sample(schema["anyOf"][0], defs)
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: _sample(field, defs) for name, field in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [_sample(schema.get("items", {}), defs)]
+    return JSON_SAMPLES.get(kind)
+
+
+def fake_answer(llm_request: LlmRequest) -> str:
+    """JSON answer for a request, valid for its output schema."""
+    schema = llm_request.config.response_schema if llm_request.config else None
+    payload = _request_payload(llm_request)
+    if isinstance(schema, type) and issubclass(schema, BaseModel):
+        responder = RESPONDERS.get(schema.__name__)
+        if responder is not None:
+            return schema.model_validate(responder(payload)).model_dump_json()
+        json_schema = schema.model_json_schema()
+        return json.dumps(_sample(json_schema, json_schema.get("$defs", {})))
+    return json.dumps(_diet(payload) if payload else {})
+
+
+class FakeLlm(BaseLlm):
+    """Local BaseLlm with simulated latency, failures and streaming."""
+
+    latency_ms: float = FAKE_LLM_LATENCY_MS      # median
+    latency_sigma: float = FAKE_LLM_LATENCY_SIGMA   # log-normal spread (0: fixed latency)
+    error_rate: float = FAKE_LLM_ERROR_RATE
+    chunk_chars: int = FAKE_LLM_CHUNK_CHARS
+    chunk_delay_ms: float = FAKE_LLM_CHUNK_DELAY_MS
+    seed: Optional[int] = FAKE_LLM_SEED
+
+    _random: random.Random = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._random = random.Random(self.seed)
+
+    @classmethod
+    def supported_models(cls) -> List[str]:
+        return [r"fake.*"]
+
+    def sample_latency(self) -> float:
+        """Seconds for one simulated call."""
+        if self.latency_ms <= 0:
+            return 0.0
+        return self.latency_ms / 1000 * math.exp(self._random.gauss(0, self.latency_sigma))
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        await asyncio.sleep(self.sample_latency())
+        if self._random.random() < self.error_rate:
+            raise FakeLlmError("Fake model backend: injected failure (503 UNAVAILABLE)")
+
+        text = fake_answer(llm_request)
+        if stream:
+            size = max(1, self.chunk_chars)
+            for start in range(0, len(text), size):
+                yield LlmResponse(
+                    content=types.Content(role="model", parts=[types.Part(text=text[start:start + size])]),
+                    partial=True,
+                )
+                await asyncio.sleep(self.chunk_delay_ms / 1000)
+
+        prompt_chars = sum(len(part.text or "") for content in llm_request.contents for part in content.parts or ())
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_chars // CHARS_PER_TOKEN,
+                candidates_token_count=len(text) // CHARS_PER_TOKEN,
+                total_token_count=(prompt_chars + len(text)) // CHARS_PER_TOKEN,
+            ),
+        )
@@ -0,0 +1,153 @@
+"""
+Incremental JSON Module
+-----------------------
+
+Parses a JSON object that arrives in chunks (a streamed model response) and
+reports its pieces as soon as they are complete, instead of waiting for the
+whole text and calling json.loads once.
+
+For a top-level object it emits:
+    - ("item", key, index, value)  for each element of a top-level array,
+                                   as soon as the element closes
+    - ("field", key, None, value)  for each top-level field, as soon as its
+                                   value closes (arrays included)
+
+Everything before the opening brace (e.g. a ```json fence) and after the
+closing brace is ignored. A piece that does not decode is skipped and
+counted in `errors`; pieces emitted before it stay valid.
+
+Example:
+    parser = IncrementalJsonParser()
+    parser.feed('{"title": "Soup", "steps": [{"step_number": 1')
+    # -> [("field", "title", None, "Soup")]
+    parser.feed(', "instruction": "Boil"}, ')
+    # -> [("item", "steps", 0, {"step_number": 1, "instruction": "Boil"})]
+"""
+
+import json
+from typing import Any, List, Optional, Tuple
+
+Piece = Tuple[str, Optional[str], Optional[int], Any]
+
+
+class IncrementalJsonParser:
+    """Single-pass scanner over a growing buffer; each character is looked at once."""
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._key: Optional[str] = None
+        self._key_start: Optional[int] = None
+        self._expect_value = False
+        self._value_start: Optional[int] = None
+        self._item_start: Optional[int] = None
+        self._item_index = 0
+        self.done = False
+        self.errors = 0
+
+    @property
+    def text(self) -> str:
+        return self._buf
+
+    def feed(self, chunk: str) -> List[Piece]:
+        """Consume the next chunk and return the pieces it completed."""
+        pieces: List[Piece] = []
+        self._buf += chunk
+        buf = self._buf
+
+        for i in range(self._pos, len(buf)):
+            if self.done:
+                break
+            ch = buf[i]
+            depth = len(self._stack)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._key_start is not None:
+                        self._key = self._decode(buf[self._key_start:i + 1])
+                        self._key_start = None
+                    else:
+                        self._complete(i + 1, pieces)
+                continue
+
+            if depth == 0:
+                # Skip any preamble until the root object opens
+                if ch == "{":
+                    self._stack.append(ch)
+                continue
+            if ch.isspace():
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if depth == 1 and not self._expect_value:
+                    self._key_start = i
+                else:
+                    self._begin(i)
+            elif ch in "{[":
+                self._begin(i)
+                self._stack.append(ch)
+            elif ch in "}]":
+                self._complete(i, pieces)
+                self._stack.pop()
+                if not self._stack:
+                    self.done = True
+                else:
+                    self._complete(i + 1, pieces)
+            elif ch == ",":
+                self._complete(i, pieces)
+            elif ch == ":":
+                if depth == 1:
+                    self._expect_value = True
+            else:
+                self._begin(i)
+
+        self._pos = len(buf)
+        return pieces
+
+    def _in_top_array(self) -> bool:
+        return len(self._stack) == 2 and self._stack[1] == "["
+
+    def _begin(self, i: int) -> None:
+        """A value starts at position i, at the current depth."""
+        depth = len(self._stack)
+        if depth == 1 and self._expect_value and self._value_start is None:
+            self._value_start = i
+            self._item_index = 0
+        elif self._in_top_array() and self._item_start is None:
+            self._item_start = i
+
+    def _complete(self, end: int, pieces: List[Piece]) -> None:
+        """The value tracked at the current depth (if any) ends before `end`."""
+        depth = len(self._stack)
+        if depth == 1 and self._value_start is not None:
+            value, ok = self._try_decode(self._buf[self._value_start:end])
+            if ok:
+                pieces.append(("field", self._key, None, value))
+            self._value_start = None
+            self._expect_value = False
+        elif self._in_top_array() and self._item_start is not None:
+            value, ok = self._try_decode(self._buf[self._item_start:end])
+            if ok:
+                pieces.append(("item", self._key, self._item_index, value))
+            self._item_start = None
+            self._item_index += 1
+
+    def _try_decode(self, text: str) -> Tuple[Any, bool]:
+        try:
+            return json.loads(text), True
+        except ValueError:
+            self.errors += 1
+            return None, False
+
+    def _decode(self, text: str) -> Optional[str]:
+        value, ok = self._try_decode(text)
+        return value if ok else None
@@ -0,0 +1,203 @@
+"""
+Metrics Module
+--------------
+
+Latency and token instrumentation of the agent pipeline, in Prometheus
+text format (GET /metrics, see routes/metrics_routes.py).
+
+Two hooks sit on the hot path:
+
+    - instrument_run() wraps every runner event stream (run_for_output and
+      the recipe pipeline) and records, per runner call and per sub-agent:
+      wall time, time to first event, and prompt/completion tokens from the
+      events' usage metadata
+    - observe_model_call() is called by the model gateway for every model
+      call and hedged duplicate (outcome and latency per stage)
+
+Counters that other modules already keep (response cache hits/misses,
+admission queue, circuit states, single-flight coalescing) are not
+duplicated on the hot path; they are read when /metrics is scraped.
+
+With METRICS_ENABLED=0 instrument_run() returns the event stream unchanged
+and the gateway skips its hook, so disabled metrics cost one attribute
+check per call.
+
+Usage:
+    async for event in instrument_run(runner.run_async(...), "diet_agent"):
+        ...
+"""
+
+import time
+from bisect import bisect_left
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from config.app_config import METRICS_ENABLED
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+Labels = Tuple[str, ...]
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values."""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Labels, List[Any]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            base = _label_text(self.label_names, labels)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_label_text(self.label_names + ('le',), labels + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{base} {total}")
+            lines.append(f"{self.name}_count{base} {count}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter keyed by label values."""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_label_text(self.label_names, labels)} {value}")
+        return lines
+
+
+def _label_text(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metrics:
+    """The pipeline's histograms and counters, plus scrape-time collectors."""
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self.runner_seconds = Histogram(
+            "recipe_runner_call_seconds", "Wall time of a runner call, by root agent.", ["runner"], LATENCY_BUCKETS)
+        self.agent_seconds = Histogram(
+            "recipe_agent_seconds", "Wall time of a sub-agent invocation within a runner call.", ["agent"], LATENCY_BUCKETS)
+        self.agent_first_event_seconds = Histogram(
+            "recipe_agent_first_event_seconds", "Time from a sub-agent's start to its first event.", ["agent"], LATENCY_BUCKETS)
+        self.agent_tokens = Histogram(
+            "recipe_agent_tokens", "Tokens per model response, by sub-agent and kind (prompt/completion).",
+            ["agent", "kind"], TOKEN_BUCKETS)
+        self.model_call_seconds = Histogram(
+            "recipe_model_call_seconds", "Latency of one model request (hedges included), by stage and outcome.",
+            ["stage", "outcome"], LATENCY_BUCKETS)
+        self.model_resends = Counter(
+            "recipe_model_resends_total", "Duplicate model requests sent by the gateway (hedges), by stage.", ["stage"])
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def add_collector(self, collector: Callable[[], List[str]]) -> None:
+        """Register a function returning extra exposition lines at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in (self.runner_seconds, self.agent_seconds, self.agent_first_event_seconds,
+                       self.agent_tokens, self.model_call_seconds, self.model_resends):
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def instrument_run(events: AsyncIterator[Any], runner_name: str) -> AsyncIterator[Any]:
+    """
+    Wrap a runner event stream so its timings and token counts are recorded.
+    Returns the stream itself when metrics are disabled.
+    """
+    if not metrics.enabled:
+        return events
+    return _instrumented(events, runner_name)
+
+
+async def _instrumented(events: AsyncIterator[Any], runner_name: str) -> AsyncIterator[Any]:
+    started = stage_started = time.perf_counter()
+    current: Optional[str] = None
+    last_event_at = started
+    try:
+        async for event in events:
+            now = time.perf_counter()
+            author = event.author
+            if author != current and author != "user":
+                # A new sub-agent took over: close the previous one
+                if current is not None:
+                    metrics.agent_seconds.observe(last_event_at - stage_started, current)
+                    stage_started = last_event_at
+                current = author
+                metrics.agent_first_event_seconds.observe(now - stage_started, author)
+            last_event_at = now
+            usage = event.usage_metadata
+            if usage is not None and not event.partial:
+                if usage.prompt_token_count:
+                    metrics.agent_tokens.observe(usage.prompt_token_count, author, "prompt")
+                if usage.candidates_token_count:
+                    metrics.agent_tokens.observe(usage.candidates_token_count, author, "completion")
+            yield event
+    finally:
+        if current is not None:
+            metrics.agent_seconds.observe(last_event_at - stage_started, current)
+        metrics.runner_seconds.observe(time.perf_counter() - started, runner_name)
+
+
+def observe_model_call(stage: str, outcome: str, seconds: float) -> None:
+    """Gateway hook: one model request finished (outcome: ok, error or cancelled)."""
+    metrics.model_call_seconds.observe(seconds, stage, outcome)
+
+
+def stats_lines(name: str, help_text: str, stats: Dict[str, Dict[str, Any]], label: str) -> List[str]:
+    """
+    Exposition lines (gauges) for numeric fields of a {label value: {field: number}}
+    stats dict, e.g. cache_stats() -> recipe_cache_hits{cache="diet"} 12.
+    """
+    by_field: Dict[str, List[str]] = {}
+    for key, fields in stats.items():
+        for field, value in fields.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            by_field.setdefault(field, []).append(f'{name}_{field}{{{label}="{_escape(str(key))}"}} {value}')
+    lines = []
+    for field, samples in sorted(by_field.items()):
+        lines.append(f"# HELP {name}_{field} {help_text} ({field}).")
+        lines.append(f"# TYPE {name}_{field} gauge")
+        lines.extend(samples)
+    return lines
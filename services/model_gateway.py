@@ -0,0 +1,357 @@
+"""
+Model Gateway Module
+--------------------
+
+Deadline-aware, hedged model calls for every agent.
+
+Agents get their model from build_model(stage) instead of constructing
+Gemini(...) themselves. The returned GatewayLlm wraps the real model and:
+
+    - caps each call with the time the request has left for its stage
+      (services/deadline.py) and raises DeadlineExceeded when it runs out,
+      so callers can fall back to local results instead of hanging
+    - hedges slow calls: if no answer has arrived after the stage's recent
+      p95 latency, a duplicate request is sent and the first answer wins
+      (the loser is cancelled)
+
+Streaming calls are deadline-capped but not hedged, since chunks from two
+streams cannot be merged. Every call, hedges included, is admitted by the
+shared AdmissionController (services/admission.py); a hedge is only sent
+while the controller has a free slot. Each gateway model also has a circuit
+breaker (services/circuit_breaker.py): while a model is failing, its calls
+raise CircuitOpen at once instead of waiting through retries.
+
+Agents answer locally when answers_locally(error) holds (see their
+on_model_error_callback): only after transient failures (deadline, open
+circuit, timeouts, connection errors, 429 and 5xx). Configuration and
+auth errors (bad API key, unknown model) propagate.
+
+Usage:
+    agent = LlmAgent(model=build_model("diet_agent"), name="diet_agent", ...)
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import AsyncExitStack
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+import httpx
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.google_llm import Gemini
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from pydantic import PrivateAttr
+
+from config.app_config import (
+    MODEL_NAME, MODEL_BACKEND, retry_config, HEDGE_ENABLED, HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES,
+    HEDGE_DEFAULT_DELAY_SECONDS, HEDGE_MIN_DELAY_SECONDS,
+)
+from google.genai import errors as genai_errors, types
+from services.admission import admission
+from services.circuit_breaker import CircuitBreaker, CircuitOpen
+from services.deadline import DeadlineExceeded, time_left
+from services.fake_llm import FakeLlm, FakeLlmError
+from services.metrics import metrics, observe_model_call
+
+# Gateway models by stage name, so their counters can be reported together
+MODELS: Dict[str, "GatewayLlm"] = {}
+
+# Errors after which an agent should answer from its local fallback
+FALLBACK_ERRORS = (DeadlineExceeded, CircuitOpen)
+
+
+def _transport_errors() -> tuple:
+    errors = [TimeoutError, ConnectionError, httpx.TransportError, FakeLlmError]
+    try:
+        import aiohttp  # transport of google-genai's async client, when installed
+    except ImportError:
+        pass
+    else:
+        errors.append(aiohttp.ClientConnectionError)
+    return tuple(errors)
+
+
+# Provider failures that may pass: timeouts and connection errors
+TRANSIENT_ERRORS = _transport_errors()
+# API status codes worth a local answer instead of an error (plus every 5xx)
+TRANSIENT_STATUS_CODES = {408, 429}
+
+
+def is_transient(error: BaseException) -> bool:
+    """True for model errors that may pass: 429, 5xx, timeouts and connection errors."""
+    if isinstance(error, genai_errors.APIError):
+        return error.code in TRANSIENT_STATUS_CODES or (error.code or 0) >= 500
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+def answers_locally(error: BaseException) -> bool:
+    """
+    True if an agent should answer from its local fallback after this model
+    error: the deadline ran out, the circuit is open or the call failed
+    transiently after its retries (see is_transient). Calls shed by
+    admission control are not: they surface as 503 so the client backs
+    off. Nor are permanent errors such as an invalid API key or model name,
+    which should fail loudly instead of serving templated answers.
+    """
+    return isinstance(error, FALLBACK_ERRORS) or is_transient(error)
+
+
+def _counts_against_circuit(error: BaseException) -> bool:
+    """
+    True if a failed call should count towards opening the circuit. Only
+    transient errors and blown deadlines do: a permanent error (bad key,
+    unknown model) would otherwise open the circuit and turn every later
+    call into a local answer served with status 200.
+    """
+    return isinstance(error, DeadlineExceeded) or is_transient(error)
+
+# Rough characters per token, for the admission estimate of a request
+CHARS_PER_TOKEN = 4
+
+
+def estimate_request_tokens(llm_request: LlmRequest) -> int:
+    """Input tokens of a request, estimated from its instruction and contents."""
+    chars = 0
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    if isinstance(instruction, str):
+        chars += len(instruction)
+    for content in llm_request.contents:
+        for part in content.parts or ():
+            chars += len(part.text or "")
+    return chars // CHARS_PER_TOKEN
+
+
+def _used_tokens(responses: List[LlmResponse]) -> Optional[int]:
+    """Total tokens reported by the model, if any response carries usage."""
+    for response in reversed(responses):
+        if response.usage_metadata and response.usage_metadata.total_token_count:
+            return response.usage_metadata.total_token_count
+    return None
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies (seconds)."""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """The q-quantile (0..1) of the window, or None until enough samples."""
+        if len(self._samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class GatewayLlm(BaseLlm):
+    """Wraps another BaseLlm with per-stage deadlines and hedged requests."""
+
+    inner: BaseLlm
+    stage: str
+    hedge: bool = True
+
+    _latency: LatencyTracker = PrivateAttr(default_factory=LatencyTracker)
+    _stats: Dict[str, int] = PrivateAttr(
+        default_factory=lambda: {"calls": 0, "hedged": 0, "hedge_wins": 0, "deadline_exceeded": 0}
+    )
+
+    _breaker: Optional[CircuitBreaker] = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._breaker = CircuitBreaker(f"{self.inner.model}:{self.stage}", probe=self._probe)
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        return self._breaker
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for the first answer before sending a duplicate."""
+        p = self._latency.percentile(HEDGE_PERCENTILE)
+        return max(HEDGE_MIN_DELAY_SECONDS, p if p is not None else HEDGE_DEFAULT_DELAY_SECONDS)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "hedge_delay_s": self.hedge_delay(), "circuit": self._breaker.state}
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self._stats["calls"] += 1
+        self._breaker.check()
+        budget = time_left(self.stage)
+        if budget is not None and budget <= 0:
+            self._stats["deadline_exceeded"] += 1
+            raise DeadlineExceeded(f"No time left for a {self.stage} model call")
+
+        if stream:
+            async for response in self._stream(llm_request, budget):
+                yield response
+            return
+
+        for response in await self._call(llm_request, budget):
+            yield response
+
+    async def _collect(self, llm_request: LlmRequest) -> List[LlmResponse]:
+        async with admission.admit(estimate_request_tokens(llm_request)) as ticket:
+            started = time.monotonic()
+            try:
+                responses = [r async for r in self.inner.generate_content_async(llm_request, stream=False)]
+            except asyncio.CancelledError:
+                if metrics.enabled:
+                    observe_model_call(self.stage, "cancelled", time.monotonic() - started)
+                raise
+            except Exception as e:
+                if _counts_against_circuit(e):
+                    self._breaker.record(False, time.monotonic() - started)
+                if metrics.enabled:
+                    observe_model_call(self.stage, "error", time.monotonic() - started)
+                raise
+            elapsed = time.monotonic() - started
+            self._breaker.record(True, elapsed)
+            if metrics.enabled:
+                observe_model_call(self.stage, "ok", elapsed)
+            self._latency.observe(elapsed)
+            ticket.used(_used_tokens(responses))
+        return responses
+
+    async def _probe(self) -> None:
+        """Tiny request sent by the circuit breaker to test a half-open circuit."""
+        request = LlmRequest(
+            model=self.inner.model,
+            contents=[types.Content(role="user", parts=[types.Part(text="ping")])],
+            config=types.GenerateContentConfig(max_output_tokens=1),
+        )
+        async with admission.admit(1):
+            try:
+                async for _ in self.inner.generate_content_async(request, stream=False):
+                    pass
+            except Exception as e:
+                # The model answered: close the circuit so the real error surfaces
+                if _counts_against_circuit(e):
+                    raise
+
+    async def _call(self, llm_request: LlmRequest, budget: Optional[float]) -> List[LlmResponse]:
+        delay = self.hedge_delay()
+        can_hedge = self.hedge and HEDGE_ENABLED and (budget is None or budget > delay)
+        # The model may mutate its request, so the hedge gets a pristine copy
+        hedge_request = llm_request.model_copy(deep=True) if can_hedge else None
+
+        primary = asyncio.create_task(self._collect(llm_request))
+        pending = {primary}
+        timeout = asyncio.timeout(budget)
+        try:
+            async with timeout:
+                if can_hedge:
+                    done, _ = await asyncio.wait(pending, timeout=delay)
+                    # Never hedge into a queue: that only adds load
+                    if not done and admission.has_capacity():
+                        self._stats["hedged"] += 1
+                        if metrics.enabled:
+                            metrics.model_resends.inc(self.stage)
+                        logging.debug("%s: no answer after %.2fs, sending hedged request", self.stage, delay)
+                        pending.add(asyncio.create_task(self._collect(hedge_request)))
+
+                error: Optional[BaseException] = None
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.exception() is None:
+                            if task is not primary:
+                                self._stats["hedge_wins"] += 1
+                            return task.result()
+                        error = task.exception()
+                raise error
+        except TimeoutError:
+            if not timeout.expired():
+                raise
+            self._stats["deadline_exceeded"] += 1
+            self._breaker.record(False, budget)
+            raise DeadlineExceeded(f"{self.stage} model call exceeded its {budget:.1f}s budget") from None
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _stream(
+        self, llm_request: LlmRequest, budget: Optional[float]
+    ) -> AsyncGenerator[LlmResponse, None]:
+        expires_at = None if budget is None else time.monotonic() + budget
+
+        def remaining() -> Optional[float]:
+            if expires_at is None:
+                return None
+            left = expires_at - time.monotonic()
+            if left <= 0:
+                raise asyncio.TimeoutError
+            return left
+
+        async with AsyncExitStack() as stack:
+            try:
+                ticket = await asyncio.wait_for(
+                    stack.enter_async_context(admission.admit(estimate_request_tokens(llm_request))),
+                    remaining(),
+                )
+            except asyncio.TimeoutError:
+                self._stats["deadline_exceeded"] += 1
+                raise DeadlineExceeded(f"{self.stage} model stream was not admitted within its {budget:.1f}s budget") from None
+
+            chunks = self.inner.generate_content_async(llm_request, stream=True)
+            responses: List[LlmResponse] = []
+            started = time.monotonic()
+            try:
+                while True:
+                    try:
+                        response = await asyncio.wait_for(anext(chunks), remaining())
+                    except StopAsyncIteration:
+                        break
+                    except asyncio.TimeoutError:
+                        self._stats["deadline_exceeded"] += 1
+                        raise DeadlineExceeded(f"{self.stage} model stream exceeded its {budget:.1f}s budget") from None
+                    responses.append(response)
+                    yield response
+            except Exception as e:
+                if _counts_against_circuit(e):
+                    self._breaker.record(False, time.monotonic() - started)
+                if metrics.enabled:
+                    observe_model_call(self.stage, "error", time.monotonic() - started)
+                raise
+            else:
+                self._breaker.record(True, time.monotonic() - started)
+                if metrics.enabled:
+                    observe_model_call(self.stage, "ok", time.monotonic() - started)
+            finally:
+                await chunks.aclose()
+                ticket.used(_used_tokens(responses))
+
+    def connect(self, llm_request: LlmRequest):
+        # Live (bidi) sessions are passed through unchanged
+        return self.inner.connect(llm_request)
+
+
+def build_backend(backend: str = MODEL_BACKEND) -> BaseLlm:
+    """The raw model for MODEL_BACKEND: Gemini, or the offline FakeLlm."""
+    if backend == "fake":
+        return FakeLlm(model=f"fake-{MODEL_NAME}")
+    if backend != "gemini":
+        raise ValueError(f"Unknown MODEL_BACKEND '{backend}'; expected 'gemini' or 'fake'")
+    return Gemini(model=MODEL_NAME, retry_options=retry_config)
+
+
+def build_model(stage: str) -> GatewayLlm:
+    """The model for an agent (stage): the backend behind the deadline/hedging gateway."""
+    model = GatewayLlm(
+        model=MODEL_NAME,
+        inner=build_backend(),
+        stage=stage,
+    )
+    MODELS[stage] = model
+    return model
+
+
+def gateway_stats() -> Dict[str, Dict[str, Any]]:
+    """Call, hedge, deadline and circuit counters of every gateway model, by stage."""
+    return {stage: model.stats() for stage, model in MODELS.items()}
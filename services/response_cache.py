@@ -0,0 +1,115 @@
+"""
+Response Cache Module
+---------------------
+
+In-process cache for agent stage responses.
+
+The same pantry/diet combinations come up again and again, and every one of
+them used to cost a fresh Gemini call. Each stage (inventory, diet, planner,
+full recipe pipeline) gets its own ResponseCache keyed by a canonical hash of
+its typed input, so "Tomato, spinach" and "spinach,  tomato " hit the same
+entry. Only the item lists are unordered (SET_FIELDS): other lists, such as
+the ranked recipe ideas the planner picks from, keep their order. Entries are bounded in number (LRU eviction) and in age (TTL).
+
+Cached values are the typed response models themselves and are shared
+between callers: treat them as read-only.
+
+Usage:
+    key = request_key(DietInput(items=items, diet=diet))
+    cached = diet_cache.get(key)
+    if cached is not None:
+        return cached
+    ...
+    diet_cache.put(key, response)
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+# All caches by name, so their counters can be reported together
+CACHES: Dict[str, "ResponseCache"] = {}
+
+
+# Fields holding unordered string lists, sorted and deduped in the key
+SET_FIELDS = {"items", "compatible_items"}
+
+
+def _canonical(value: Any, unordered: bool = False) -> Any:
+    """Normalize a dumped payload: trim/case-fold strings, sort and dedupe SET_FIELDS lists."""
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, list):
+        items = [_canonical(v) for v in value]
+        if unordered and all(isinstance(v, str) for v in items):
+            return sorted({v for v in items if v})
+        return items
+    if isinstance(value, dict):
+        return {k: _canonical(v, k in SET_FIELDS) for k, v in value.items()}
+    return value
+
+
+def request_key(payload: BaseModel) -> str:
+    """Canonical hash of a typed request (the model type is part of the key)."""
+    canonical = {"type": type(payload).__name__, "data": _canonical(payload.model_dump())}
+    encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Size-bounded LRU cache with per-entry TTL and hit/miss counters."""
+
+    def __init__(self, name: str, max_entries: int = 1024, ttl_seconds: float = 3600):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        CACHES[name] = self
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Counters for every registered cache, keyed by cache name."""
+    return {name: cache.stats() for name, cache in CACHES.items()}
@@ -0,0 +1,200 @@
+"""
+Result Store Module
+-------------------
+
+Optional on-disk store for pipeline results, shared by every uvicorn worker
+on a node.
+
+Each worker process has its own in-memory ResponseCache, so a restart or a
+scale-out used to start cold and pay again for LLM calls the node had
+already made. ResultStore keeps results in a SQLite database in WAL mode:
+many workers can read concurrently while one writes, and writes are atomic.
+
+    - lookups by the same canonical key as the in-memory caches
+      (services/response_cache.request_key)
+    - size-based eviction of the least recently accessed rows; the total
+      size is kept up to date by triggers in a meta row, so a write only
+      scans rows when the store is over its budget
+    - warm start: a booting worker preloads its in-memory cache with the
+      most recently used results
+
+The store is disabled unless RESULT_STORE_PATH is set in the environment.
+Blocking SQLite calls are run in a worker thread by the async helpers.
+
+Usage:
+    store = get_result_store()
+    if store:
+        value = await store.aget(key)
+"""
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from config.app_config import RESULT_STORE_PATH, RESULT_STORE_MAX_BYTES
+
+# Only refresh accessed_at if it is older than this, to keep reads cheap
+TOUCH_INTERVAL_SECONDS = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at);
+CREATE INDEX IF NOT EXISTS results_kind_accessed_at ON results (kind, accessed_at);
+CREATE TABLE IF NOT EXISTS result_meta (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# Running total of results.size, created (and seeded from existing rows)
+# in one transaction so concurrent workers never double count
+TOTAL_BYTES = """
+BEGIN IMMEDIATE;
+INSERT OR IGNORE INTO result_meta (name, value)
+    SELECT 'total_bytes', COALESCE(SUM(size), 0) FROM results;
+CREATE TRIGGER IF NOT EXISTS results_size_insert AFTER INSERT ON results BEGIN
+    UPDATE result_meta SET value = value + NEW.size WHERE name = 'total_bytes';
+END;
+CREATE TRIGGER IF NOT EXISTS results_size_update AFTER UPDATE OF size ON results BEGIN
+    UPDATE result_meta SET value = value + NEW.size - OLD.size WHERE name = 'total_bytes';
+END;
+CREATE TRIGGER IF NOT EXISTS results_size_delete AFTER DELETE ON results BEGIN
+    UPDATE result_meta SET value = value - OLD.size WHERE name = 'total_bytes';
+END;
+COMMIT;
+"""
+
+# Rows deleted per query while evicting
+EVICT_BATCH = 64
+
+
+class ResultStore:
+    """SQLite (WAL) key-value store of serialized results with size-bounded LRU eviction."""
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.executescript(TOTAL_BYTES)
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE results SET accessed_at = ? WHERE key = ? AND accessed_at < ?",
+                (now, key, now - TOUCH_INTERVAL_SECONDS),
+            )
+        return row[0]
+
+    def put(self, key: str, kind: str, value: str) -> None:
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            # One write transaction so concurrent workers see put + eviction atomically
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # An upsert, not INSERT OR REPLACE: its implicit delete would skip the size trigger
+                self._conn.execute(
+                    "INSERT INTO results (key, kind, value, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET kind = excluded.kind, value = excluded.value, "
+                    "size = excluded.size, created_at = excluded.created_at, accessed_at = excluded.accessed_at",
+                    (key, kind, value, size, now, now),
+                )
+                self._evict()
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def recent(self, kind: str, limit: int) -> List[Tuple[str, str]]:
+        """Most recently accessed (key, value) pairs of a kind, newest first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT key, value FROM results WHERE kind = ? ORDER BY accessed_at DESC, rowid DESC LIMIT ?",
+                (kind, limit),
+            ).fetchall()
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._total_bytes()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _total_bytes(self) -> int:
+        return self._conn.execute("SELECT value FROM result_meta WHERE name = 'total_bytes'").fetchone()[0]
+
+    def _evict(self) -> None:
+        """Delete least recently accessed rows until the store fits in max_bytes."""
+        total = self._total_bytes()
+        evicted = 0
+        while total > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM results ORDER BY accessed_at ASC, rowid ASC LIMIT ?", (EVICT_BATCH,)
+            ).fetchall()
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                total -= size
+                evicted += 1
+            if not rows:
+                break
+        if evicted:
+            logging.debug("Result store evicted %d rows", evicted)
+
+    # --- Async helpers ---
+    # SQLite calls block, so they run off the event loop. A disk problem
+    # must never fail a request: it is logged and the request goes uncached.
+
+    async def aget(self, key: str) -> Optional[str]:
+        try:
+            return await asyncio.to_thread(self.get, key)
+        except sqlite3.Error as e:
+            logging.warning("Result store read failed: %s", e)
+            return None
+
+    async def aput(self, key: str, kind: str, value: str) -> None:
+        try:
+            await asyncio.to_thread(self.put, key, kind, value)
+        except sqlite3.Error as e:
+            logging.warning("Result store write failed: %s", e)
+
+
+_store: Optional[ResultStore] = None
+
+
+def get_result_store() -> Optional[ResultStore]:
+    """The process-wide store, opened on first use; None when not configured."""
+    global _store
+    if _store is None and RESULT_STORE_PATH:
+        _store = ResultStore(RESULT_STORE_PATH, RESULT_STORE_MAX_BYTES)
+    return _store
+
+
+def close_result_store() -> None:
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
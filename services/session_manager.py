@@ -0,0 +1,75 @@
+"""
+Session Manager Module
+----------------------
+
+Allocates short-lived, per-request ADK sessions so that concurrent requests
+never share a conversation history.
+
+Previously every call ran inside the single global USER_ID/SESSION_ID pair
+from config/app_config.py. Concurrent requests interleaved their events in
+that one session and each new call re-sent the whole accumulated history to
+the model. Here every request gets its own session, created when the request
+first needs it and deleted as soon as the response has been produced, so the
+prompt size (and therefore latency) stays flat no matter how many requests
+have been served before.
+
+Usage:
+    async with request_session(runner.session_service) as session_id:
+        async for event in runner.run_async(
+            user_id=USER_ID, session_id=session_id, new_message=content
+        ):
+            ...
+"""
+
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from google.adk.sessions import BaseSessionService
+
+from config.app_config import APP_NAME, USER_ID
+from config.logging_config import bind_session_id
+
+
+def new_session_id(prefix: str = "req") -> str:
+    """Return a unique session id for a single request."""
+    return f"{prefix}-{uuid.uuid4().hex}"
+
+
+@asynccontextmanager
+async def request_session(
+    session_service: BaseSessionService,
+    app_name: str = APP_NAME,
+    user_id: str = USER_ID,
+    session_id: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """
+    Create an isolated session for the duration of one request.
+
+    The session is created on entry (i.e. only when a request actually needs
+    one) and always deleted on exit, even if the agent run raised. Log
+    records written inside the block carry its session ID.
+    A client-provided user_id may be passed to keep per-client separation.
+
+    Yields:
+        The id of the newly created session.
+    """
+    session = await session_service.create_session(
+        app_name=app_name,
+        user_id=user_id,
+        session_id=session_id or new_session_id(),
+    )
+    try:
+        with bind_session_id(session.id):
+            yield session.id
+    finally:
+        try:
+            await session_service.delete_session(
+                app_name=app_name,
+                user_id=user_id,
+                session_id=session.id,
+            )
+        except Exception as e:
+            # Never let cleanup hide the real result (or error) of the request
+            logging.warning("Failed to delete session %s: %s", session.id, e)
@@ -0,0 +1,147 @@
+"""
+Session Store Module
+--------------------
+
+A bounded drop-in replacement for ADK's InMemorySessionService.
+
+The stock in-memory service keeps every event of every session forever and
+deep-copies the whole session on each get_session call, so both memory and
+lookup cost grow with uptime. BoundedSessionService keeps the same API but:
+
+    - caps the number of events stored per session; older turns are
+      compacted away. Their effect is preserved because ADK already folds
+      every event's state_delta into session.state, so the state is the
+      latest snapshot of everything the dropped events produced;
+    - expires sessions that have been idle longer than a TTL;
+    - evicts the least recently used sessions once a maximum count is hit.
+
+Usage:
+    session_service = BoundedSessionService(max_events=50, ttl_seconds=900, max_sessions=1000)
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from google.adk.events import Event
+from google.adk.sessions import InMemorySessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig
+
+SessionKey = tuple[str, str, str]
+
+
+class BoundedSessionService(InMemorySessionService):
+    """InMemorySessionService with per-session event caps, TTL and LRU eviction."""
+
+    def __init__(self, max_events: int = 50, ttl_seconds: float = 900, max_sessions: int = 1000):
+        super().__init__()
+        self.max_events = max_events
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+
+        # Last access time per session, ordered from least to most recently used
+        self._last_access: "OrderedDict[SessionKey, float]" = OrderedDict()
+
+        # Counters, useful for monitoring memory behaviour over long uptimes
+        self.compacted_events = 0
+        self.evicted_sessions = 0
+
+    # --- BaseSessionService API ---
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        self._evict_expired()
+        session = await super().create_session(
+            app_name=app_name, user_id=user_id, state=state, session_id=session_id
+        )
+        self._touch((app_name, user_id, session.id))
+
+        # LRU eviction once the store is full
+        while len(self._last_access) > self.max_sessions:
+            oldest_key = next(iter(self._last_access))
+            self._drop(oldest_key)
+        return session
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        key = (app_name, user_id, session_id)
+        if self._is_expired(key):
+            self._drop(key)
+            return None
+
+        session = await super().get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=config
+        )
+        if session is not None:
+            self._touch(key)
+        return session
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        # Pop directly: the base implementation deep-copies the session
+        # just to check that it exists.
+        self._drop((app_name, user_id, session_id), evicted=False)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        event = await super().append_event(session=session, event=event)
+        if event.partial:
+            return event
+
+        key = (session.app_name, session.user_id, session.id)
+        stored = self._stored(key)
+        if stored is not None:
+            if len(stored.events) > self.max_events:
+                self._compact(stored)
+            self._touch(key)
+        return event
+
+    # --- Internals ---
+
+    def _stored(self, key: SessionKey) -> Optional[Session]:
+        app_name, user_id, session_id = key
+        return self.sessions.get(app_name, {}).get(user_id, {}).get(session_id)
+
+    def _touch(self, key: SessionKey) -> None:
+        self._last_access[key] = time.monotonic()
+        self._last_access.move_to_end(key)
+
+    def _is_expired(self, key: SessionKey) -> bool:
+        last_access = self._last_access.get(key)
+        return last_access is not None and time.monotonic() - last_access > self.ttl_seconds
+
+    def _evict_expired(self) -> None:
+        # Entries are ordered by access time, so expired ones sit at the front
+        while self._last_access:
+            oldest_key = next(iter(self._last_access))
+            if not self._is_expired(oldest_key):
+                break
+            self._drop(oldest_key)
+
+    def _compact(self, stored: Session) -> None:
+        """Drop the oldest events; session.state already holds their combined effect."""
+        overflow = len(stored.events) - self.max_events
+        del stored.events[:overflow]
+        self.compacted_events += overflow
+        logging.debug("Compacted %d events from session %s", overflow, stored.id)
+
+    def _drop(self, key: SessionKey, evicted: bool = True) -> None:
+        app_name, user_id, session_id = key
+        self._last_access.pop(key, None)
+        user_sessions = self.sessions.get(app_name, {}).get(user_id)
+        if user_sessions and user_sessions.pop(session_id, None) is not None:
+            if not user_sessions:
+                del self.sessions[app_name][user_id]
+            if evicted:
+                self.evicted_sessions += 1
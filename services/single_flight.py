@@ -0,0 +1,71 @@
+"""
+Single Flight Module
+--------------------
+
+Coalesces concurrent identical requests into one in-flight execution.
+
+Bursts of the same /api/recipe or /api/diet payload used to start one agent
+run each, paying for the same model calls several times within milliseconds.
+A SingleFlight keyed by the canonical request hash (see
+services/response_cache.request_key) lets the first caller start the work as
+a task and every caller that arrives while it runs await that same task.
+
+The shared task is shielded from its waiters: a client that disconnects only
+stops waiting, the work carries on for the others (and still fills the
+caches). Errors are delivered to every waiter.
+
+Usage:
+    recipe_flight = SingleFlight("recipe")
+    result = await recipe_flight.do(cache_key, lambda: run_pipeline(payload))
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls by key; callers share one task's result."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the result of fn(), sharing it with concurrent calls for key.
+        fn is only called when no execution for key is in flight.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._finish(key, t))
+            self.started += 1
+        else:
+            self.coalesced += 1
+            logging.debug("Single-flight '%s': joined in-flight call %s", self.name, key[:12])
+
+        # Cancelling this waiter must not cancel the shared work
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._inflight),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Every waiter may have gone away; retrieve the error so it is not
+        # reported as "never retrieved", and log it once here.
+        if not task.cancelled() and task.exception() is not None:
+            logging.debug("Single-flight '%s' call %s failed: %r", self.name, key[:12], task.exception())
+
@@ -1,7 +1,48 @@
 
 import asyncio
+import os
 import sys
+import tempfile
+
+# The app's lifespan starts file logging; keep the tests' log out of the repo
+os.environ.setdefault("LOG_FILE", os.path.join(tempfile.gettempdir(), "recipe-tests.log"))
 
 #This replaces the default ProactorEventLoop with SelectorEventLoop, which avoids the “loop closed” error.
 if sys.platform.startswith("win"):
-    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
\ No newline at end of file
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+import pytest
+
+import agents.registry as registry
+from services.fake_llm import FakeLlm
+from services.model_gateway import MODELS
+from services.response_cache import CACHES
+
+
+@pytest.fixture
+def fake_backend(monkeypatch):
+    """
+    Swap every agent's model for an instant, deterministic FakeLlm (no
+    network) and start from closed circuits and empty response caches. Yields a function that
+    reconfigures the fake, e.g. fake_backend(error_rate=1.0). Needs no API key.
+    """
+    # Agents (and their models) are built lazily; the fake backend needs no key
+    monkeypatch.setattr(registry, "MODEL_BACKEND", "fake")
+    monkeypatch.setattr(registry, "_environment_loaded", registry._environment_loaded)
+    registry.build_agents()
+    originals = {stage: model.inner for stage, model in MODELS.items()}
+
+    def configure(**settings):
+        for model in MODELS.values():
+            model.inner = FakeLlm(model="fake", **{"latency_ms": 0, "chunk_delay_ms": 0, "seed": 0, **settings})
+            model.breaker.reset()
+
+    configure()
+    for cache in CACHES.values():
+        cache.clear()
+    yield configure
+    for stage, inner in originals.items():
+        MODELS[stage].inner = inner
+        MODELS[stage].breaker.reset()
+    for cache in CACHES.values():
+        cache.clear()
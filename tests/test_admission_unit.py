@@ -0,0 +1,84 @@
+"""
+Unit Tests for Model Call Admission
+-----------------------------------
+
+Validates the in-flight limit, that waiting interactive calls are admitted
+before batch calls, that full queues and long rate waits shed with
+Overloaded, and that a cancelled waiter does not leak its slot.
+"""
+
+import asyncio
+import pytest
+
+from services.admission import AdmissionController, Overloaded, priority_scope
+
+
+@pytest.mark.asyncio
+async def test_waiting_interactive_calls_go_before_batch():
+    controller = AdmissionController(max_in_flight=1, rps=0, tpm=0, max_queue={"interactive": 5, "batch": 5})
+    order = []
+    release = asyncio.Event()
+
+    async def call(name, priority):
+        async with controller.admit(priority=priority):
+            order.append(name)
+            await release.wait()
+
+    holder = asyncio.create_task(call("holder", "batch"))
+    await asyncio.sleep(0)
+    waiters = [
+        asyncio.create_task(call("batch", "batch")),
+        asyncio.create_task(call("interactive", "interactive")),
+    ]
+    await asyncio.sleep(0.01)
+    assert controller.stats()["queued"] == {"interactive": 1, "batch": 1}
+
+    release.set()
+    await asyncio.gather(holder, *waiters)
+    assert order == ["holder", "interactive", "batch"]
+    assert controller.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_sheds_with_retry_after():
+    controller = AdmissionController(max_in_flight=1, rps=0, tpm=0, max_queue={"interactive": 0, "batch": 0})
+    async with controller.admit():
+        with pytest.raises(Overloaded) as shed:
+            async with controller.admit():
+                pass
+    assert int(shed.value.retry_after_header["Retry-After"]) >= 1
+    assert controller.stats()["shed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_sheds_calls_that_would_wait_too_long():
+    controller = AdmissionController(max_in_flight=10, rps=0, tpm=600, max_rate_wait=1.0)
+    async with controller.admit(estimated_tokens=600):
+        pass
+    # The bucket refills 10 tokens/s: 600 more would take a minute
+    with pytest.raises(Overloaded) as shed:
+        async with controller.admit(estimated_tokens=600):
+            pass
+    assert shed.value.retry_after > 1.0
+    assert controller.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_its_slot():
+    controller = AdmissionController(max_in_flight=1, rps=0, tpm=0)
+
+    async with controller.admit():
+        waiter = asyncio.create_task(controller.admit().__aenter__())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+    assert controller.stats()["in_flight"] == 0
+    async with controller.admit():
+        assert controller.stats()["in_flight"] == 1
+
+
+def test_priority_scope_rejects_unknown_class():
+    with pytest.raises(ValueError):
+        with priority_scope("urgent"):
+            pass
@@ -0,0 +1,74 @@
+"""
+Unit Tests for the Agent Output fast path
+-----------------------------------------
+
+Validates that typed agent outputs are read straight from the final event's
+state_delta, and that events from other agents (e.g. earlier stages of the
+SequentialAgent pipeline) are ignored. No model calls are made.
+"""
+
+from google.adk.agents import LlmAgent
+from google.adk.events import Event, EventActions
+from google.genai import types
+from models.diet_schemas import DietResponse
+from models.planner_schemas import PlannerResponse, Step
+from services.agent_output import output_from_event
+
+diet_like_agent = LlmAgent(
+    name="diet_agent",
+    model="gemini-2.5-flash-lite",
+    output_schema=DietResponse,
+    output_key="diet_result",
+)
+
+planner_like_agent = LlmAgent(
+    name="planner_agent",
+    model="gemini-2.5-flash-lite",
+    output_schema=PlannerResponse,
+    output_key="planner_result",
+)
+
+
+def final_event(author: str, state_delta: dict) -> Event:
+    return Event(
+        author=author,
+        content=types.Content(role="model", parts=[types.Part(text="{}")]),
+        actions=EventActions(state_delta=state_delta),
+    )
+
+
+def test_output_is_read_from_state_delta():
+    event = final_event("diet_agent", {
+        "diet_result": {"compatible_items": ["tomato"], "suggested_recipe_ideas": ["Soup"]}
+    })
+
+    result = output_from_event(event, diet_like_agent)
+
+    assert isinstance(result, DietResponse)
+    assert result.compatible_items == ["tomato"]
+
+
+def test_nested_models_are_typed():
+    event = final_event("planner_agent", {
+        "planner_result": {
+            "title": "Soup",
+            "ingredients": ["tomato"],
+            "steps": [{"step_number": 1, "instruction": "Boil"}],
+        }
+    })
+
+    result = output_from_event(event, planner_like_agent)
+
+    assert isinstance(result.steps[0], Step)
+
+
+def test_events_from_other_agents_are_ignored():
+    event = final_event("diet_agent", {
+        "diet_result": {"compatible_items": ["tomato"], "suggested_recipe_ideas": []}
+    })
+
+    assert output_from_event(event, planner_like_agent) is None
+
+
+def test_event_without_output_key_returns_none():
+    assert output_from_event(final_event("diet_agent", {}), diet_like_agent) is None
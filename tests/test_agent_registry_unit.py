@@ -0,0 +1,78 @@
+"""
+Unit Tests for the Agent Registry
+---------------------------------
+
+Validates that importing the app builds no agent and needs no API key,
+that agents are built once on first use and shared with the agent modules'
+attributes, and that a missing key is reported when the first agent is
+built. No model calls.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import agents.registry as registry
+from agents.registry import FACTORIES, build_agents, get_agent
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def no_key(monkeypatch):
+    """Build agents on the fake backend, so no GEMINI_API_KEY is needed."""
+    monkeypatch.setattr(registry, "MODEL_BACKEND", "fake")
+    monkeypatch.setattr(registry, "_environment_loaded", registry._environment_loaded)
+
+
+def test_importing_the_app_builds_no_agents_and_needs_no_key():
+    env = {key: value for key, value in os.environ.items() if key != "GEMINI_API_KEY"}
+    code = (
+        "import tests.test_main, agents.registry as r, services.model_gateway as g; "
+        "assert r.built_agents() == [] and not g.MODELS, (r.built_agents(), list(g.MODELS))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", code], cwd=REPO_ROOT, env=env, capture_output=True, text=True, timeout=120
+    )
+    assert completed.returncode == 0, completed.stderr
+
+
+def test_agents_are_built_once_and_shared_with_module_attributes(no_key):
+    import agents.diet_agent
+    import agents.recipe_pipeline
+
+    diet_agent = get_agent("diet_agent")
+    assert get_agent("diet_agent") is diet_agent
+    assert agents.diet_agent.diet_agent is diet_agent
+    assert agents.recipe_pipeline.recipe_pipeline.sub_agents[1] is diet_agent
+    assert set(registry.built_agents()) >= {"diet_agent", "recipe_pipeline"}
+
+
+def test_build_agents_builds_every_registered_agent(no_key):
+    assert len(build_agents()) == len(FACTORIES)
+    assert set(registry.built_agents()) == set(FACTORIES)
+
+
+def test_unknown_names_raise():
+    import agents.planner_agent
+
+    with pytest.raises(KeyError):
+        get_agent("sommelier_agent")
+    with pytest.raises(AttributeError):
+        agents.planner_agent.sommelier_agent
+
+
+def test_missing_api_key_is_reported_on_first_build(monkeypatch):
+    monkeypatch.setattr(registry, "_environment_loaded", False)
+    monkeypatch.setattr(registry, "MODEL_BACKEND", "gemini")
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+
+    with pytest.raises(ValueError, match="GEMINI_API_KEY"):
+        registry.load_environment()
+
+    monkeypatch.setattr(registry, "MODEL_BACKEND", "fake")
+    registry.load_environment()
+    assert registry._environment_loaded
@@ -0,0 +1,71 @@
+"""
+Unit Tests for the Circuit Breaker
+----------------------------------
+
+Validates that the circuit opens on the error rate and on slow calls,
+fails fast while open, and that the background probe closes it again (or
+keeps it open when the model is still down). Also checks the planner's
+templated fallback recipe.
+"""
+
+import asyncio
+import pytest
+
+from agents.planner_agent import template_recipe
+from services.circuit_breaker import CLOSED, OPEN, CircuitBreaker, CircuitOpen
+
+
+def _breaker(name, probe=None, **kwargs):
+    options = dict(window=4, min_calls=4, error_rate=0.5, slow_call_seconds=1.0, slow_call_rate=0.75, open_seconds=0.05)
+    options.update(kwargs)
+    return CircuitBreaker(name, probe=probe, **options)
+
+
+@pytest.mark.asyncio
+async def test_opens_on_error_rate_and_probe_closes_it():
+    probes = []
+
+    async def probe():
+        probes.append(1)
+
+    breaker = _breaker("test_errors", probe)
+    for ok in (True, False, True, True):
+        breaker.record(ok, 0.1)
+    assert breaker.state == CLOSED
+
+    breaker.record(False, 0.1)    # window is now 2 failures of 4
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpen) as rejected:
+        breaker.check()
+    assert rejected.value.retry_after >= 1
+
+    await asyncio.sleep(0.1)
+    assert probes == [1]
+    assert breaker.state == CLOSED
+    breaker.check()
+
+
+@pytest.mark.asyncio
+async def test_opens_on_slow_calls_and_failed_probe_keeps_it_open():
+    async def probe():
+        raise ConnectionError("still down")
+
+    breaker = _breaker("test_slow", probe)
+    for _ in range(3):
+        breaker.record(True, 2.0)
+    breaker.record(True, 0.1)
+    assert breaker.state == OPEN
+
+    await asyncio.sleep(0.08)
+    assert breaker.state == OPEN
+    assert breaker.stats()["probes"] >= 1
+    breaker._probe_task.cancel()
+
+
+def test_template_recipe_uses_items_and_first_idea():
+    recipe = template_recipe(["rice", "beans", " "], ["Rice Bowl", "Salad"])
+    assert recipe.title == "Rice Bowl"
+    assert recipe.ingredients == ["rice", "beans"]
+    assert [step.step_number for step in recipe.steps] == [1, 2, 3, 4]
+
+    assert template_recipe([], []).steps == []
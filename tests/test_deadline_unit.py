@@ -0,0 +1,33 @@
+"""
+Unit Tests for Request Deadlines
+--------------------------------
+
+Validates stage budget reservation, that nested scopes never extend the
+enclosing deadline, and that degraded stages are shared across scopes.
+"""
+
+import pytest
+
+from services.deadline import current_deadline, deadline_scope, mark_degraded, time_left
+
+
+def test_stage_remaining_reserves_later_stages():
+    with deadline_scope(10, stages={"a": 0.2, "b": 0.3, "c": 0.5}):
+        assert time_left("a") == pytest.approx(2.0, abs=0.1)
+        assert time_left("b") == pytest.approx(5.0, abs=0.1)
+        assert time_left("c") == pytest.approx(10.0, abs=0.1)
+        assert time_left("unknown") == pytest.approx(10.0, abs=0.1)
+    assert current_deadline() is None
+    assert time_left("a") is None
+
+
+def test_nested_scope_cannot_extend_deadline_and_shares_degraded():
+    with deadline_scope(1, stages={"a": 0.5, "b": 0.5}) as outer:
+        with deadline_scope(60) as inner:
+            assert inner.expires_at == outer.expires_at
+            assert inner.stages == outer.stages
+            mark_degraded("a")
+        with deadline_scope(0.5) as shorter:
+            assert shorter.expires_at < outer.expires_at
+        assert outer.degraded == {"a"}
+    assert current_deadline() is None
@@ -0,0 +1,82 @@
+"""
+Unit Tests for Packed Diet Requests
+-----------------------------------
+
+Validates that the packed agent's callback keeps only valid entries, and
+that run_diet_batch packs deduplicated requests, splits the answers back
+in input order and retries missing ones singly (model calls stubbed), and
+that a failing model backend falls back per request instead of failing
+the batch.
+"""
+
+import json
+import pytest
+from google.genai import types
+from google.adk.models.llm_response import LlmResponse
+
+from agents import diet_agent
+from models.diet_schemas import DietBatchResponse, DietInput, DietResponse
+
+
+def test_keep_valid_entries_drops_bad_and_truncated_entries():
+    text = json.dumps({"responses": [
+        {"index": 0, "compatible_items": ["tomato"], "suggested_recipe_ideas": ["Soup"]},
+        {"index": 1, "compatible_items": "tomato"},
+        {"index": 2, "compatible_items": ["rice"], "suggested_recipe_ideas": ["Risotto"]},
+    ]})[:-20]
+    response = LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+    diet_agent.keep_valid_entries(None, response)
+
+    kept = DietBatchResponse.model_validate_json(response.content.parts[0].text)
+    assert [entry.index for entry in kept.responses] == [0]
+
+
+@pytest.mark.asyncio
+async def test_run_diet_batch_packs_splits_and_retries(monkeypatch):
+    diet_agent.diet_cache.clear()
+    packs, singles = [], []
+
+    async def fake_packed(inputs):
+        packs.append([(tuple(i.items), i.diet) for i in inputs])
+        # No answer for the second request of each pack
+        return {
+            position: DietResponse(compatible_items=i.items, suggested_recipe_ideas=[f"{i.items[0]} bowl"])
+            for position, i in enumerate(inputs) if position != 1
+        }
+
+    async def fake_single(items, diet):
+        singles.append((tuple(items), diet))
+        return DietResponse(compatible_items=items, suggested_recipe_ideas=["single"])
+
+    monkeypatch.setattr(diet_agent, "_run_packed", fake_packed)
+    monkeypatch.setattr(diet_agent, "run_diet", fake_single)
+
+    requests = [
+        DietInput(items=["tomato", "beef"], diet="vegan"),
+        DietInput(items=["kale"], diet="paleo"),
+        DietInput(items=["beef"], diet="vegan"),
+        DietInput(items=["Tomato", "beef"], diet="Vegan"),
+    ]
+
+    responses = await diet_agent.run_diet_batch(requests, pack_size=8)
+
+    assert packs == [[(("tomato",), "vegan"), (("kale",), "paleo")]]
+    assert singles == [(("kale",), "paleo")]
+    assert responses[0].compatible_items == ["tomato"]
+    assert responses[0].suggested_recipe_ideas == ["tomato bowl"]
+    assert responses[1].suggested_recipe_ideas == ["single"]
+    assert responses[2].compatible_items == []
+    assert responses[3] == responses[0]
+
+
+@pytest.mark.asyncio
+async def test_run_diet_batch_falls_back_per_request_when_the_model_fails(fake_backend):
+    fake_backend(error_rate=1.0)
+    requests = [DietInput(items=["tomato", "beef"], diet="vegan"), DietInput(items=["kale"], diet="paleo")]
+
+    responses = await diet_agent.run_diet_batch(requests, pack_size=8)
+
+    assert responses[0].compatible_items == ["tomato"]
+    assert responses[1].compatible_items == ["kale"]
+    assert all(response.suggested_recipe_ideas == [diet_agent.FALLBACK_RECIPE_IDEA] for response in responses)
@@ -23,6 +23,9 @@ import pytest
 from fastapi.testclient import TestClient
 import main
 from tests.test_main import app
+from agents import diet_agent
+from models.diet_schemas import DietInput
+from services.response_cache import request_key
 
 
 client = TestClient(app)
@@ -114,4 +117,19 @@ def test_diet_route_vegan():
 #     assert isinstance(body["suggested_recipe_ideas"], list)
 
 #     # --- Scenario-specific check ---
-#     assert "chicken breast" not in body["compatible_items"]
\ No newline at end of file
+#     assert "chicken breast" not in body["compatible_items"]
+
+def test_diet_route_shares_run_diet_answers(fake_backend):
+    """
+    The route answers through run_diet: a known diet with no compatible
+    item short-circuits to an empty answer, and both paths agree on the
+    cached answer of a payload.
+    """
+    empty = client.post("/api/diet", json={"items": ["beef", "chicken breast"], "diet": "vegan"})
+    assert empty.status_code == 200
+    assert empty.json() == {"compatible_items": [], "suggested_recipe_ideas": []}
+
+    payload = {"items": ["tomato", "beef", "rice"], "diet": "vegan"}
+    routed = client.post("/api/diet", json=payload).json()
+    assert routed["compatible_items"] == ["tomato", "rice"]
+    assert diet_agent.diet_cache.get(request_key(DietInput(**payload))).model_dump() == routed
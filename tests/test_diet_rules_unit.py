@@ -0,0 +1,70 @@
+"""
+Unit Tests for the Diet Rules engine
+------------------------------------
+
+Validates the local ingredient taxonomy index and diet rules used instead
+of asking the model whether an ingredient fits a diet.
+"""
+
+import pytest
+from agents.diet_rules import compatible_items, is_known_diet, item_categories, normalize_diet
+
+PANTRY = ["tomato", "chicken breast", "spinach", "2 eggs", "Cheddar Cheese", "rice", "shrimp", "honey"]
+
+
+def test_vegan_excludes_animal_products():
+    assert compatible_items(PANTRY, "vegan") == ["tomato", "spinach", "rice"]
+
+
+def test_vegetarian_keeps_dairy_and_eggs():
+    assert compatible_items(PANTRY, "vegetarian") == ["tomato", "spinach", "2 eggs", "Cheddar Cheese", "rice", "honey"]
+
+
+def test_keto_excludes_high_carb():
+    result = compatible_items(PANTRY, "keto")
+    assert "rice" not in result and "honey" not in result
+    assert "chicken breast" in result
+
+
+def test_omnivore_keeps_everything():
+    assert compatible_items(PANTRY, "omnivore") == PANTRY
+
+
+def test_phrases_and_qualifiers_override_words():
+    assert item_categories("almond milk") == []
+    assert item_categories("peanut butter") == []
+    assert item_categories("eggplant") == []
+    assert item_categories("vegan cheese") == []
+    assert compatible_items(["gluten-free pasta", "pasta", "rice flour"], "gluten free") == ["gluten-free pasta", "rice flour"]
+
+
+def test_diet_names_are_normalized():
+    assert normalize_diet("Gluten Free") == "gluten-free"
+    assert normalize_diet("ketogenic") == "keto"
+    assert is_known_diet("VEGAN")
+    assert not is_known_diet("paleo")
+
+
+def test_unknown_diet_raises():
+    with pytest.raises(ValueError):
+        compatible_items(PANTRY, "paleo")
+
+
+@pytest.mark.parametrize("item, categories", [
+    ("goat cheese", ["dairy"]),
+    ("sheep milk", ["dairy"]),
+    ("quail eggs", ["egg"]),
+    ("duck eggs", ["egg"]),
+    ("butter beans", ["high_carb"]),
+    ("cream of tartar", []),
+    ("beef tomatoes", []),
+    ("hot dog buns", ["gluten", "high_carb"]),
+])
+def test_product_and_phrase_overrides(item, categories):
+    assert item_categories(item) == categories
+
+
+def test_animal_products_fit_the_right_diets():
+    assert compatible_items(["goat cheese", "quail eggs", "duck eggs"], "vegetarian") == ["goat cheese", "quail eggs", "duck eggs"]
+    assert compatible_items(["butter beans", "cream of tartar", "goat cheese"], "vegan") == ["butter beans", "cream of tartar"]
+    assert compatible_items(["beef tomatoes", "hot dog buns", "beef"], "vegetarian") == ["beef tomatoes", "hot dog buns"]
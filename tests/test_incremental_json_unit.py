@@ -0,0 +1,58 @@
+"""
+Unit Tests for the Incremental JSON Parser
+------------------------------------------
+
+Validates that IncrementalJsonParser reports top-level fields and array
+elements as soon as they close, whatever the chunk boundaries, and that a
+malformed piece does not discard the pieces before it.
+"""
+
+import json
+
+from services.incremental_json import IncrementalJsonParser
+
+DOC = {
+    "title": "Soup \"tonight\" {quick}",
+    "ingredients": ["tomato", "salt, fine", "1 [cup] rice"],
+    "steps": [{"step_number": 1, "instruction": "Boil } ]"}, {"step_number": 2, "instruction": "Serve"}],
+    "servings": 2,
+}
+
+
+def feed_in_chunks(text, size):
+    parser = IncrementalJsonParser()
+    pieces = []
+    for i in range(0, len(text), size):
+        pieces += parser.feed(text[i:i + size])
+    return parser, pieces
+
+
+def test_fields_and_items_match_json_loads_for_any_chunk_size():
+    text = "```json\n" + json.dumps(DOC, indent=2) + "\n```"
+
+    for size in (1, 2, 5, 13, len(text)):
+        parser, pieces = feed_in_chunks(text, size)
+
+        assert {key: value for kind, key, _, value in pieces if kind == "field"} == DOC
+        assert [(key, index, value) for kind, key, index, value in pieces if kind == "item" and key == "steps"] == [
+            ("steps", 0, DOC["steps"][0]),
+            ("steps", 1, DOC["steps"][1]),
+        ]
+        assert parser.done and parser.errors == 0
+
+
+def test_pieces_are_emitted_as_soon_as_they_close():
+    parser = IncrementalJsonParser()
+
+    assert parser.feed('{"title": "Soup", "steps": [{"step_number": 1') == [("field", "title", None, "Soup")]
+    assert parser.feed(', "instruction": "Boil"}') == [
+        ("item", "steps", 0, {"step_number": 1, "instruction": "Boil"})
+    ]
+
+
+def test_malformed_tail_keeps_valid_prefix():
+    parser, pieces = feed_in_chunks('{"title": "Soup", "steps": [{"step_number": 1}, {"step_number": tru}]}', 4)
+
+    assert ("field", "title", None, "Soup") in pieces
+    assert ("item", "steps", 0, {"step_number": 1}) in pieces
+    assert parser.errors >= 1
@@ -0,0 +1,49 @@
+"""
+Unit Tests for the Inventory Normalizer
+---------------------------------------
+
+Validates the deterministic pantry cleaning that replaces the InventoryAgent
+model call: whitespace and case handling, junk detection, quantity stripping,
+plural/singular merging, de-duplication and the confidence score.
+"""
+
+from agents.inventory_normalizer import normalize_inventory, normalize_item
+
+
+def test_blank_and_junk_entries_are_dropped():
+    result = normalize_inventory(["tomato", " ", "", "??", "n/a", "chicken"])
+
+    assert result.items == ["tomato", "chicken"]
+    assert result.dropped == [" ", "", "??", "n/a"]
+    assert result.confidence == 1.0
+
+
+def test_quantities_and_units_are_stripped():
+    assert normalize_item("2 lbs chicken breast") == "chicken breast"
+    assert normalize_item("1 1/2 cups of rice") == "rice"
+    assert normalize_item("500g flour") == "flour"
+    assert normalize_item("a dozen eggs") == "egg"
+    assert normalize_item("3 cloves garlic") == "garlic"
+
+
+def test_case_whitespace_and_plurals_are_merged():
+    result = normalize_inventory(["Tomatoes", "  tomato ", "Cherry  Tomatoes", "berries", "berry"])
+
+    assert result.items == ["tomato", "cherry tomato", "berry"]
+
+
+def test_uncountable_words_are_kept():
+    assert normalize_item("hummus") == "hummus"
+    assert normalize_item("asparagus") == "asparagus"
+    assert normalize_item("olive oil") == "olive oil"
+
+
+def test_sentences_lower_confidence():
+    result = normalize_inventory(["tomato", "I have some leftover chicken from yesterday"])
+
+    assert result.ambiguous == ["i have some leftover chicken from yesterday"]
+    assert result.confidence == 0.5
+
+
+def test_empty_input_is_confident():
+    assert normalize_inventory([]).confidence == 1.0
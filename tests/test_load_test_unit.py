@@ -0,0 +1,44 @@
+"""
+Unit Tests for the Load-Test Harness
+------------------------------------
+
+Validates the latency statistics, Server-Timing parsing and baseline
+comparison, and runs a small in-process load test on the fake backend.
+"""
+
+import pytest
+
+from benchmarks.load_test import compare, parse_server_timing, percentile, run_load
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 0.50) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([7], 0.95) == 7
+    assert percentile([], 0.5) is None
+
+
+def test_parse_server_timing():
+    assert parse_server_timing("inventory_agent;dur=1.5, total;dur=12") == {"inventory_agent": 1.5, "total": 12.0}
+    assert parse_server_timing('cache;desc="hit"') == {}
+
+
+def test_compare_flags_throughput_and_p95_regressions():
+    baseline = {"throughput_rps": 100.0, "endpoints": {"recipe": {"p95_ms": 50.0}}, "stages": {}}
+    same = {"throughput_rps": 95.0, "endpoints": {"recipe": {"p95_ms": 55.0}}, "stages": {}}
+    worse = {"throughput_rps": 70.0, "endpoints": {"recipe": {"p95_ms": 80.0}}, "stages": {}}
+
+    assert compare(same, baseline, tolerance=0.2) == []
+    assert len(compare(worse, baseline, tolerance=0.2)) == 2
+
+
+@pytest.mark.asyncio
+async def test_in_process_load_run_reports_latency_and_stages(fake_backend):
+    report = await run_load(requests=40, concurrency=8, unique=10, memory_interval=0.05)
+
+    assert report["status_codes"] == {"200": 40}
+    assert sum(stats["count"] for stats in report["endpoints"].values()) == 40
+    assert report["endpoints"]["recipe"]["p95_ms"] >= report["endpoints"]["recipe"]["p50_ms"]
+    assert "planner_agent" in report["stages"]
+    assert report["memory"]["samples"]
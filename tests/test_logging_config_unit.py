@@ -0,0 +1,108 @@
+"""
+Unit Tests for Structured Logging
+---------------------------------
+
+Validates that records are rendered as JSON carrying the bound request and
+session IDs, that event logs are sampled, that setup_logging writes through
+the background queue to a rotating file, that the app's lifespan starts and
+stops it, and that the middleware echoes the request ID.
+"""
+
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import config.logging_config as logging_config
+from config.logging_config import (
+    EVENT_LOGGER, ContextFilter, DeferredQueueHandler, JsonFormatter, RequestContextMiddleware, SamplingFilter,
+    bind_request_id, bind_session_id, setup_logging, shutdown_logging,
+)
+
+
+def _record(name="recipe", msg="Planned %d recipes", args=(3,), **extra):
+    record = logging.makeLogRecord({"name": name, "msg": msg, "args": args, "levelname": "INFO"})
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_context_ids_and_extra_fields():
+    record = _record(stage="planner")
+    with bind_request_id("req-1"), bind_session_id("sess-1"):
+        ContextFilter().filter(record)
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["msg"] == "Planned 3 recipes"
+    assert entry["request_id"] == "req-1"
+    assert entry["session_id"] == "sess-1"
+    assert entry["stage"] == "planner"
+
+
+def test_context_ids_are_unset_outside_their_blocks():
+    with bind_request_id() as request_id:
+        assert request_id
+    record = _record()
+    ContextFilter().filter(record)
+    assert record.request_id is None and record.session_id is None
+
+
+def test_sampling_filter_only_samples_the_event_logger():
+    drop_all, keep_all = SamplingFilter(rate=0.0), SamplingFilter(rate=1.0)
+    assert not drop_all.filter(_record(name=EVENT_LOGGER))
+    assert keep_all.filter(_record(name=EVENT_LOGGER))
+    assert drop_all.filter(_record(name="agents.recipe_pipeline"))
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    shutdown_logging()
+    yield tmp_path / "app.log"
+    shutdown_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+def test_setup_logging_writes_json_lines_through_the_queue(log_file):
+    listener = setup_logging(str(log_file), level="INFO")
+    assert setup_logging(str(log_file)) is listener
+    with bind_request_id("req-42"):
+        logging.getLogger("recipe").info("Served %s", "soup", extra={"stage": "planner"})
+    logging.getLogger("recipe").debug("Below the level, never formatted")
+    shutdown_logging()
+
+    entries = [json.loads(line) for line in log_file.read_text().splitlines()]
+    served = [entry for entry in entries if entry["msg"] == "Served soup"]
+    assert served and served[0]["request_id"] == "req-42" and served[0]["stage"] == "planner"
+    assert not any("never formatted" in entry["msg"] for entry in entries)
+    assert logging_config._listener is None
+    assert not any(isinstance(handler, DeferredQueueHandler) for handler in logging.getLogger().handlers)
+
+
+def test_app_lifespan_logs_through_the_queue(log_file, fake_backend):
+    from tests.test_main import app
+
+    with TestClient(app):
+        assert logging_config._listener is not None
+        assert any(isinstance(handler, DeferredQueueHandler) for handler in logging.getLogger().handlers)
+    assert logging_config._listener is None
+
+
+def test_middleware_echoes_or_generates_request_id():
+    app = FastAPI()
+    app.add_middleware(RequestContextMiddleware)
+
+    @app.get("/whoami")
+    def whoami():
+        return {"request_id": logging_config._request_id.get()}
+
+    client = TestClient(app)
+    response = client.get("/whoami", headers={"X-Request-ID": "abc123"})
+    assert response.headers["x-request-id"] == "abc123"
+    assert response.json()["request_id"] == "abc123"
+
+    generated = client.get("/whoami").headers["x-request-id"]
+    assert generated and generated != "abc123"
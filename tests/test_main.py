@@ -18,25 +18,41 @@ from fastapi import FastAPI
 from routes.inventory_routes import router as inventory_router
 from routes.diet_routes import router as diet_router
 from routes.recipe_routes import router as recipe_router
+from routes.metrics_routes import router as metrics_router
 # from routes.recipe_routes import lifespan
 from contextlib import asynccontextmanager
 from runner_manager import RunnerManager
-from agents.recipe_pipeline import recipe_pipeline
+from agents.recipe_pipeline import warm_start_recipe_cache
+from agents.registry import build_agents
+from agents.diet_rules import load_index
+from services.result_store import close_result_store
+from config.logging_config import RequestContextMiddleware, setup_logging, shutdown_logging
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print(">>> Lifespan startup running")
-    # Startup logic
-    # await RunnerManager.init_runner(recipe_pipeline)
+    # Request-path logs only enqueue; a background thread writes them
+    setup_logging()
+    # Startup logic: build the served agents (nothing is built at import)
+    # and one long-lived runner per agent
+    await RunnerManager.warm_up(build_agents(["diet_agent", "recipe_pipeline"]))
+    # Compile the diet rules index once, shared by all requests
+    load_index()
+    # Reuse results other workers on this node already paid for
+    await warm_start_recipe_cache()
     yield
     print(">>> Lifespan shutdown running")
     # Shutdown logic (optional)
     await RunnerManager.shutdown_runner()
+    close_result_store()
+    shutdown_logging()
 
 # Build a test-only FastAPI app
 # app = FastAPI(title="Test App: Recipe & Diet API")
 app = FastAPI(lifespan=lifespan, title="Test App: Recipe & Diet API")
+app.add_middleware(RequestContextMiddleware)
 
 app.include_router(inventory_router, prefix="/api", tags=["inventory"])
 app.include_router(diet_router, prefix="/api", tags=["diet"])
 app.include_router(recipe_router, prefix="/api", tags=["recipe"])
+app.include_router(metrics_router, tags=["metrics"])
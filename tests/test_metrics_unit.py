@@ -0,0 +1,90 @@
+"""
+Unit Tests for Pipeline Metrics
+-------------------------------
+
+Validates histogram exposition, that instrument_run attributes wall time,
+time to first event and tokens to each sub-agent, that it is a no-op when
+metrics are disabled, and that an offline pipeline run shows up in the
+/metrics output, along with the in-flight invocations per pooled runner.
+"""
+
+import pytest
+from google.adk.agents import BaseAgent
+from google.adk.events import Event
+from google.genai import types
+
+from agents.recipe_pipeline import run_recipe_pipeline
+from services.metrics import Histogram, Metrics, instrument_run, metrics
+import services.metrics as metrics_module
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo.", ["stage"], (0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, "a")
+
+    lines = histogram.render()
+    assert 'demo_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{stage="a",le="1.0"} 3' in lines
+    assert 'demo_seconds_bucket{stage="a",le="+Inf"} 4' in lines
+    assert 'demo_seconds_count{stage="a"} 4' in lines
+
+
+async def _events():
+    yield Event(author="inventory_agent")
+    yield Event(
+        author="diet_agent",
+        usage_metadata=types.GenerateContentResponseUsageMetadata(prompt_token_count=120, candidates_token_count=30),
+    )
+    yield Event(author="planner_agent")
+
+
+@pytest.mark.asyncio
+async def test_instrument_run_records_each_sub_agent(monkeypatch):
+    fresh = Metrics(enabled=True)
+    monkeypatch.setattr(metrics_module, "metrics", fresh)
+
+    assert [event.author async for event in instrument_run(_events(), "RecipePipeline")] == [
+        "inventory_agent", "diet_agent", "planner_agent"]
+
+    text = fresh.render()
+    assert 'recipe_runner_call_seconds_count{runner="RecipePipeline"} 1' in text
+    for agent in ("inventory_agent", "diet_agent", "planner_agent"):
+        assert f'recipe_agent_seconds_count{{agent="{agent}"}} 1' in text
+        assert f'recipe_agent_first_event_seconds_count{{agent="{agent}"}} 1' in text
+    assert 'recipe_agent_tokens_sum{agent="diet_agent",kind="prompt"} 120' in text
+    assert 'recipe_agent_tokens_sum{agent="diet_agent",kind="completion"} 30' in text
+
+
+def test_instrument_run_is_a_no_op_when_disabled(monkeypatch):
+    monkeypatch.setattr(metrics_module, "metrics", Metrics(enabled=False))
+    events = _events()
+    assert instrument_run(events, "RecipePipeline") is events
+
+
+@pytest.mark.asyncio
+async def test_offline_pipeline_run_is_exposed(fake_backend):
+    before = metrics.model_call_seconds._series.get(("planner_agent", "ok"), [None, 0, 0])[2]
+
+    await run_recipe_pipeline(["rice", "beans", "zzq paste"], "vegan")
+
+    assert metrics.model_call_seconds._series[("planner_agent", "ok")][2] == before + 1
+    assert 'recipe_runner_call_seconds_count{runner="RecipePipeline"}' in metrics.render()
+
+
+class EchoAgent(BaseAgent):
+    async def _run_async_impl(self, ctx):
+        return
+        yield
+
+
+@pytest.mark.asyncio
+async def test_active_runner_invocations_are_exposed():
+    import routes.metrics_routes  # noqa: F401  (registers the scrape-time collectors)
+    from runner_manager import RunnerManager
+
+    agent = EchoAgent(name="metered")
+    async with RunnerManager.invocation(agent):
+        assert 'recipe_runner_active_invocations{runner="metered"} 1' in metrics.render()
+    assert 'recipe_runner_active_invocations{runner="metered"} 0' in metrics.render()
+    await RunnerManager.shutdown_runner()
@@ -0,0 +1,123 @@
+"""
+Unit Tests for the Model Gateway
+--------------------------------
+
+Validates that a slow model call is hedged and the first answer wins, and
+that a call running past its stage budget raises DeadlineExceeded, that
+only transient errors are answered locally, and that only they count
+towards opening the circuit.
+Uses a fake inner model; no network access.
+"""
+
+import asyncio
+from typing import List
+
+import httpx
+import pytest
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import errors as genai_errors, types
+
+import services.model_gateway as model_gateway
+from services.deadline import DeadlineExceeded, deadline_scope
+from services.admission import Overloaded
+from services.circuit_breaker import CircuitOpen
+from services.fake_llm import FakeLlmError
+from services.model_gateway import GatewayLlm, answers_locally
+
+
+class FakeLlm(BaseLlm):
+    """Answers each call with its index, after the next configured delay."""
+
+    delays: List[float] = []
+    calls: int = 0
+
+    async def generate_content_async(self, llm_request, stream=False):
+        index = self.calls
+        self.calls += 1
+        await asyncio.sleep(self.delays[index] if index < len(self.delays) else 0)
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=str(index))]))
+
+
+class FailingLlm(BaseLlm):
+    """Raises the configured error on every call."""
+
+    error: Exception
+
+    async def generate_content_async(self, llm_request, stream=False):
+        raise self.error
+        yield
+
+
+async def _answer(model: GatewayLlm) -> str:
+    responses = [r async for r in model.generate_content_async(LlmRequest())]
+    return responses[0].content.parts[0].text
+
+
+@pytest.mark.asyncio
+async def test_slow_call_is_hedged_and_first_answer_wins(monkeypatch):
+    monkeypatch.setattr(model_gateway, "HEDGE_DEFAULT_DELAY_SECONDS", 0.05)
+    monkeypatch.setattr(model_gateway, "HEDGE_MIN_DELAY_SECONDS", 0.05)
+    model = GatewayLlm(model="fake", inner=FakeLlm(model="fake", delays=[5, 0]), stage="test")
+
+    assert await asyncio.wait_for(_answer(model), 1) == "1"
+    stats = model.stats()
+    assert stats["hedged"] == 1 and stats["hedge_wins"] == 1
+
+
+@pytest.mark.asyncio
+async def test_call_past_stage_budget_raises_deadline_exceeded():
+    model = GatewayLlm(model="fake", inner=FakeLlm(model="fake", delays=[5]), stage="a", hedge=False)
+
+    with deadline_scope(0.4, stages={"a": 0.5, "b": 0.5}):
+        # Half of the budget is reserved for stage b
+        started = asyncio.get_running_loop().time()
+        with pytest.raises(DeadlineExceeded):
+            await _answer(model)
+        assert asyncio.get_running_loop().time() - started < 0.35
+
+    assert model.stats()["deadline_exceeded"] == 1
+
+
+@pytest.mark.asyncio
+async def test_no_deadline_and_fast_answer_is_not_hedged():
+    model = GatewayLlm(model="fake", inner=FakeLlm(model="fake"), stage="test")
+
+    assert await _answer(model) == "0"
+    assert model.stats()["hedged"] == 0
+
+
+@pytest.mark.parametrize("error, local", [
+    (DeadlineExceeded("late"), True),
+    (CircuitOpen("open", 1.0), True),
+    (genai_errors.ServerError(503, {"error": {"message": "unavailable"}}), True),
+    (genai_errors.ClientError(429, {"error": {"message": "quota"}}), True),
+    (httpx.ConnectError("down"), True),
+    (TimeoutError(), True),
+    (FakeLlmError("injected"), True),
+    (genai_errors.ClientError(401, {"error": {"message": "API key not valid"}}), False),
+    (genai_errors.ClientError(404, {"error": {"message": "model not found"}}), False),
+    (Overloaded("shed", 1.0), False),
+    (ValueError("bad config"), False),
+])
+def test_only_transient_errors_are_answered_locally(error, local):
+    assert answers_locally(error) is local
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("code, opens", [(401, False), (503, True)])
+async def test_only_transient_errors_open_the_circuit(monkeypatch, code, opens):
+    error_type = genai_errors.ServerError if code >= 500 else genai_errors.ClientError
+    error = error_type(code, {"error": {"message": "failed"}})
+    model = GatewayLlm(model="fake", inner=FailingLlm(model="fake", error=error), stage=f"breaker-{code}", hedge=False)
+
+    for _ in range(model.breaker.min_calls):
+        with pytest.raises(error_type):
+            await _answer(model)
+
+    assert model.breaker.state == ("open" if opens else "closed")
+    if not opens:
+        with pytest.raises(genai_errors.ClientError):
+            await _answer(model)
+    model.breaker.reset()
@@ -0,0 +1,119 @@
+"""
+Unit Tests for the Offline Pipeline
+-----------------------------------
+
+Runs the full recipe pipeline (runner, sessions, callbacks, streaming
+parser) on the FakeLlm backend, without network or API key. Validates
+schema-valid answers, streamed recipe pieces and degradation when the fake
+model fails (reported in X-Degraded), that templated plans are not cached,
+that batches pack their diet stage, and that permanent errors propagate.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from google.adk.models.llm_request import LlmRequest
+from google.genai import errors as genai_errors, types
+
+from agents.planner_agent import run_planner
+from agents.recipe_pipeline import recipe_cache, run_recipe_batch, run_recipe_pipeline, stream_recipe_pipeline
+from models.diet_schemas import DietBatchInput, DietBatchResponse, DietInput
+from models.inventory_schemas import InventoryInput
+from services.fake_llm import FakeLlm, fake_answer
+from services.model_gateway import MODELS
+from services.response_cache import request_key
+
+
+@pytest.mark.asyncio
+async def test_pipeline_runs_offline_with_schema_valid_outputs(fake_backend):
+    result = await run_recipe_pipeline(["tomato", "spinach", "zzq paste"], "vegan")
+
+    assert result.degraded == []
+    assert result.recipe.title
+    assert result.recipe.steps[0].step_number == 1
+    assert set(result.recipe.ingredients) <= set(result.inventory.usable_items)
+
+
+@pytest.mark.asyncio
+async def test_streamed_pipeline_sends_planner_pieces_offline(fake_backend):
+    fake_backend(chunk_chars=8)
+    events = [event async for event in stream_recipe_pipeline(["rice", "beans", "zzq paste"], "omnivore")]
+
+    kinds = [event.event for event in events]
+    assert kinds[-1] == "result"
+    fields = [event.data.field for event in events if event.event == "partial"]
+    assert fields[0] == "title" and "steps" in fields
+
+
+@pytest.mark.asyncio
+async def test_failing_model_degrades_to_local_answers_and_is_not_cached(fake_backend):
+    fake_backend(error_rate=1.0)
+    items, diet = ["rice", "beans", "zzq paste"], "vegan"
+
+    result = await run_recipe_pipeline(items, diet)
+
+    assert "planner_agent" in result.degraded
+    assert result.recipe.steps
+    assert recipe_cache.get(request_key(InventoryInput(items=items, diet=diet))) is None
+
+
+@pytest.mark.asyncio
+async def test_planner_template_is_not_cached_past_the_outage(fake_backend):
+    args = (["rice", "beans"], ["Bean Chili", "Rice Bowl"], "vegan")
+
+    fake_backend(error_rate=1.0)
+    template = await run_planner(*args)
+    fake_backend(error_rate=0.0)
+    recovered = await run_planner(*args)
+
+    assert template.steps[0].instruction.startswith("Wash and prepare")
+    assert recovered != template
+
+
+@pytest.mark.asyncio
+async def test_batch_sends_one_packed_diet_call_per_chunk(fake_backend):
+    requests = [InventoryInput(items=[item, "zzq paste"], diet="vegan") for item in ("rice", "beans", "tofu")]
+    before = {stage: MODELS[stage].stats()["calls"] for stage in ("diet_agent", "packed_diet_agent")}
+
+    results = await run_recipe_batch(requests)
+
+    assert all(item.error is None and item.recipe.steps for item in results)
+    assert MODELS["packed_diet_agent"].stats()["calls"] - before["packed_diet_agent"] == 1
+    assert MODELS["diet_agent"].stats()["calls"] == before["diet_agent"]
+
+
+def test_recipe_route_reports_degraded_stages(fake_backend):
+    from tests.test_main import app
+
+    fake_backend(error_rate=1.0)
+    with TestClient(app) as client:
+        degraded = client.post("/api/recipe", json={"items": ["rice", "zzq paste"], "diet": "vegan"})
+        fake_backend()
+        healthy = client.post("/api/recipe", json={"items": ["kale", "zzq paste"], "diet": "vegan"})
+
+    assert degraded.status_code == 200
+    assert "planner_agent" in degraded.headers["x-degraded"].split(",")
+    assert healthy.status_code == 200 and "x-degraded" not in healthy.headers
+
+
+class RejectedKeyLlm(FakeLlm):
+    async def generate_content_async(self, llm_request, stream=False):
+        raise genai_errors.ClientError(400, {"error": {"message": "API key not valid"}})
+        yield
+
+
+@pytest.mark.asyncio
+async def test_permanent_model_errors_propagate(fake_backend):
+    MODELS["diet_agent"].inner = RejectedKeyLlm(model="fake")
+
+    with pytest.raises(genai_errors.ClientError):
+        await run_recipe_pipeline(["kale", "zzq paste"], "omnivore")
+
+
+def test_fake_answer_follows_the_request_schema():
+    payload = DietBatchInput(requests=[DietInput(items=["kale"], diet="vegan"), DietInput(items=["egg"], diet="keto")])
+    request = LlmRequest(contents=[types.Content(role="user", parts=[types.Part(text=payload.model_dump_json())])])
+    request.set_output_schema(DietBatchResponse)
+
+    answer = DietBatchResponse.model_validate_json(fake_answer(request))
+    assert [entry.index for entry in answer.responses] == [0, 1]
+    assert answer.responses[1].compatible_items == ["egg"]
@@ -0,0 +1,97 @@
+"""
+Unit Tests for the Planner Fan-out
+----------------------------------
+
+Validates run_planner_fanout with the planner call stubbed: ideas are
+expanded concurrently, 'first' returns the fastest valid plan and cancels
+the rest, 'ranked' orders valid plans by pantry coverage, and degraded
+(templated) plans never win.
+"""
+
+import asyncio
+import pytest
+
+from agents import planner_agent
+from models.planner_schemas import PlannerResponse, Step
+from services.deadline import deadline_scope, mark_degraded
+
+PLANS = {
+    "Soup": (0.05, ["tomato", "spinach"]),
+    "Salad": (0.01, ["spinach", "lettuce"]),
+    "Empty": (0.0, None),
+    "Pasta": (0.02, ["tomato", "pasta", "cheese"]),
+}
+# Ideas whose expansion falls back to the planner's template
+DEGRADED = set()
+
+
+@pytest.fixture
+def stub_planner(monkeypatch):
+    started, cancelled = [], []
+
+    async def fake_run_planner(compatible_items, suggested_recipe_ideas, diet):
+        idea = suggested_recipe_ideas[0]
+        started.append(idea)
+        delay, ingredients = PLANS[idea]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(idea)
+            raise
+        if ingredients is None:
+            return PlannerResponse(title="", ingredients=[], steps=[])
+        if idea in DEGRADED:
+            mark_degraded("planner_agent")
+        return PlannerResponse(title=idea, ingredients=ingredients, steps=[Step(step_number=1, instruction="Cook")])
+
+    monkeypatch.setattr(planner_agent, "run_planner", fake_run_planner)
+    yield started, cancelled
+    DEGRADED.clear()
+
+
+@pytest.mark.asyncio
+async def test_ranked_mode_orders_valid_plans_by_coverage(stub_planner):
+    started, _ = stub_planner
+
+    plans = await planner_agent.run_planner_fanout(["tomato", "spinach"], list(PLANS), "vegan", top_k=4)
+
+    assert sorted(started) == sorted(PLANS)
+    assert [plan.title for plan in plans] == ["Soup", "Salad", "Pasta"]
+
+
+@pytest.mark.asyncio
+async def test_first_mode_returns_fastest_valid_plan_and_cancels_rest(stub_planner):
+    _, cancelled = stub_planner
+
+    plans = await planner_agent.run_planner_fanout(["tomato", "spinach"], list(PLANS), "vegan", top_k=4, mode="first")
+
+    assert [plan.title for plan in plans] == ["Salad"]
+    assert sorted(cancelled) == ["Pasta", "Soup"]
+
+
+@pytest.mark.asyncio
+async def test_top_k_limits_distinct_ideas(stub_planner):
+    started, _ = stub_planner
+
+    await planner_agent.run_planner_fanout(["tomato"], ["Soup", "Soup", "Salad", "Pasta"], "vegan", top_k=2)
+
+    assert sorted(started) == ["Salad", "Soup"]
+
+
+@pytest.mark.asyncio
+async def test_degraded_plans_never_win(stub_planner):
+    DEGRADED.add("Salad")
+
+    with deadline_scope(5) as deadline:
+        first = await planner_agent.run_planner_fanout(["tomato", "spinach"], list(PLANS), "vegan", top_k=4, mode="first")
+        ranked = await planner_agent.run_planner_fanout(["tomato", "spinach"], list(PLANS), "vegan", top_k=4)
+
+    assert [plan.title for plan in first] == ["Pasta"]
+    assert [plan.title for plan in ranked] == ["Soup", "Pasta"]
+    assert deadline.degraded == {"planner_agent"}
+
+
+@pytest.mark.asyncio
+async def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        await planner_agent.run_planner_fanout(["tomato"], ["Soup"], "vegan", mode="fastest")
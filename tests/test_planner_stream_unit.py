@@ -0,0 +1,57 @@
+"""
+Unit Tests for the Planner Stream Parser
+----------------------------------------
+
+Validates that PlannerStreamParser emits schema-checked titles,
+ingredients and Steps while the planner output streams in, rejects pieces
+that do not match the schema, and rebuilds a recipe from a valid prefix.
+"""
+
+import json
+
+from agents.planner_stream import PlannerStreamParser, recipe_from_prefix
+from models.planner_schemas import Step
+
+RECIPE = {
+    "title": "Tomato Soup",
+    "ingredients": ["tomato", "onion"],
+    "steps": [
+        {"step_number": 1, "instruction": "Chop the vegetables"},
+        {"step_number": 2, "instruction": "Simmer for 20 minutes"},
+    ],
+}
+
+
+def test_pieces_stream_in_order():
+    parser = PlannerStreamParser()
+    text = json.dumps(RECIPE)
+
+    pieces = []
+    for i in range(0, len(text), 7):
+        pieces += parser.feed(text[i:i + 7])
+
+    assert [(p.field, p.index) for p in pieces] == [
+        ("title", None), ("ingredients", 0), ("ingredients", 1), ("steps", 0), ("steps", 1)
+    ]
+    assert isinstance(pieces[-1].value, Step)
+    assert parser.result().model_dump() == RECIPE
+
+
+def test_invalid_step_is_rejected():
+    parser = PlannerStreamParser()
+
+    pieces = parser.feed('{"title": "Soup", "steps": [{"step_number": "first"}, {"step_number": 2, "instruction": "Serve"}]}')
+
+    assert [p.field for p in pieces] == ["title", "steps"]
+    assert parser.rejected == 1
+    assert parser.steps == [Step(step_number=2, instruction="Serve")]
+
+
+def test_recipe_from_truncated_output():
+    text = json.dumps(RECIPE)[:-25]
+
+    recipe = recipe_from_prefix(text)
+
+    assert recipe.title == "Tomato Soup"
+    assert recipe.steps == [Step(**RECIPE["steps"][0])]
+    assert recipe_from_prefix('{"title": "Soup", "ingred') is None
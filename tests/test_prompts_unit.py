@@ -0,0 +1,49 @@
+"""
+Unit Tests for the Prompt Builder
+---------------------------------
+
+Validates the compact schema sketches, the per-agent prompt modes and the
+token report of agents/prompts.py.
+"""
+
+import pytest
+
+from agents import prompts
+from models.diet_schemas import DietBatchResponse
+from models.planner_schemas import PlannerPiece, PlannerResponse
+
+
+def test_compact_schema_sketches_nested_models():
+    assert prompts.compact_schema(PlannerResponse) == (
+        '{"title":str,"ingredients":[str],"steps":[{"step_number":int,"instruction":str}]}'
+    )
+    assert prompts.compact_schema(DietBatchResponse) == (
+        '{"responses":[{"compatible_items":[str],"suggested_recipe_ideas":[str],"index":int}]}'
+    )
+    assert '"index?":int|null' in prompts.compact_schema(PlannerPiece)
+
+
+def test_modes_follow_per_agent_overrides(monkeypatch):
+    monkeypatch.setattr(prompts, "PROMPT_MODE", "compact")
+    monkeypatch.setattr(prompts, "PROMPT_MODES", {"verbose_agent": "verbose"})
+
+    compact = prompts.build_instruction("compact_agent", "  Plan a recipe.\n", PlannerResponse)
+    verbose = prompts.build_instruction("verbose_agent", "Plan a recipe.", PlannerResponse)
+
+    assert compact.startswith("Plan a recipe.\nRespond ONLY with JSON: {")
+    assert '"description"' in verbose and len(verbose) > 2 * len(compact)
+
+
+def test_unknown_mode_is_rejected(monkeypatch):
+    monkeypatch.setattr(prompts, "PROMPT_MODES", {"odd_agent": "tiny"})
+
+    with pytest.raises(ValueError):
+        prompts.build_instruction("odd_agent", "Plan a recipe.", PlannerResponse)
+
+
+def test_report_compares_both_modes():
+    prompts.build_instruction("report_agent", "Plan a recipe.", PlannerResponse)
+
+    entry = prompts.prompt_report()["report_agent"]
+
+    assert entry["compact_tokens"] < entry["verbose_tokens"]
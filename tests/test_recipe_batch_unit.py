@@ -0,0 +1,104 @@
+"""
+Unit Tests for Batch Recipe Planning
+------------------------------------
+
+Validates run_recipe_batch / iter_recipe_batch with the pipeline's stages
+replaced by stubs: identical requests are planned once, results keep the
+input order, concurrency is bounded, one failure stays per item and the
+diet stage is packed per chunk of requests.
+"""
+
+import asyncio
+import pytest
+
+import agents.recipe_pipeline as recipe_pipeline
+from models.diet_schemas import DietResponse
+from models.inventory_schemas import InventoryInput, InventoryResponse
+from models.planner_schemas import PlannerResponse
+
+
+@pytest.fixture
+def stub_pipeline(monkeypatch):
+    calls, diet_packs = [], []
+    state = {"active": 0, "peak": 0}
+
+    async def fake_inventory(items, diet):
+        return InventoryResponse(usable_items=items, message="ok", diet=diet)
+
+    async def fake_diet_batch(requests):
+        diet_packs.append(len(requests))
+        return [DietResponse(compatible_items=request.items, suggested_recipe_ideas=[]) for request in requests]
+
+    async def fake_planner(compatible_items, suggested_recipe_ideas, diet):
+        calls.append((tuple(compatible_items), diet))
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        try:
+            await asyncio.sleep(0.01)
+            if diet == "broken":
+                raise RuntimeError("No final response from recipe pipeline")
+            return PlannerResponse(title=f"{compatible_items[0]} dish", ingredients=compatible_items, steps=[])
+        finally:
+            state["active"] -= 1
+
+    monkeypatch.setattr(recipe_pipeline, "run_inventory", fake_inventory)
+    monkeypatch.setattr(recipe_pipeline, "run_diet_batch", fake_diet_batch)
+    monkeypatch.setattr(recipe_pipeline, "run_planner", fake_planner)
+    recipe_pipeline.recipe_cache.clear()
+    yield calls, state, diet_packs
+    recipe_pipeline.recipe_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_batch_dedupes_and_keeps_input_order(stub_pipeline):
+    calls, _, _ = stub_pipeline
+    requests = [
+        InventoryInput(items=["tomato"], diet="vegan"),
+        InventoryInput(items=["rice"], diet="keto"),
+        InventoryInput(items=[" Tomato"], diet="VEGAN"),
+    ]
+
+    results = await recipe_pipeline.run_recipe_batch(requests)
+
+    assert [item.index for item in results] == [0, 1, 2]
+    assert [item.recipe.title for item in results] == ["tomato dish", "rice dish", "tomato dish"]
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_failures_are_per_item(stub_pipeline):
+    requests = [
+        InventoryInput(items=["tomato"], diet="broken"),
+        InventoryInput(items=["rice"], diet="vegan"),
+    ]
+
+    results = await recipe_pipeline.run_recipe_batch(requests)
+
+    assert results[0].recipe is None and "No final response" in results[0].error
+    assert results[1].error is None and results[1].recipe.title == "rice dish"
+
+
+@pytest.mark.asyncio
+async def test_batch_concurrency_is_bounded(stub_pipeline):
+    calls, state, _ = stub_pipeline
+    requests = [InventoryInput(items=[f"item{i}"], diet="vegan") for i in range(10)]
+
+    items = [item async for item in recipe_pipeline.iter_recipe_batch(requests, max_concurrency=3)]
+
+    assert sorted(item.index for item in items) == list(range(10))
+    assert len(calls) == 10
+    assert state["peak"] == 3
+
+
+@pytest.mark.asyncio
+async def test_batch_packs_the_diet_stage_and_caches_results(stub_pipeline):
+    calls, _, diet_packs = stub_pipeline
+    requests = [InventoryInput(items=[f"item{i}"], diet="vegan") for i in range(10)]
+
+    first = await recipe_pipeline.run_recipe_batch(requests, max_concurrency=8)
+    again = await recipe_pipeline.run_recipe_batch(requests, max_concurrency=8)
+
+    assert diet_packs == [8, 2]
+    assert not any(item.cached for item in first) and all(item.cached for item in again)
+    assert [item.recipe.title for item in again] == [f"item{i} dish" for i in range(10)]
+    assert len(calls) == 10
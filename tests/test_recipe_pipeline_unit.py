@@ -1,6 +1,6 @@
 import pytest
 import json
-from agents.recipe_pipeline import recipe_pipeline
+from agents.registry import get_agent
 import asyncio
 from google.genai import types
 from google.adk.runners import InMemoryRunner
@@ -8,7 +8,7 @@ from config.app_config import APP_NAME, USER_ID, MODEL_NAME, retry_config, sessi
 
 
 @pytest.mark.asyncio
-async def test_recipe_pipeline_generates_valid_json():
+async def test_recipe_pipeline_generates_valid_json(fake_backend):
     """
     Verify that the recipe_pipeline SequentialAgent produces valid structured JSON output.
 
@@ -22,7 +22,7 @@ async def test_recipe_pipeline_generates_valid_json():
     It also checks that "steps" is returned as a list, confirming the pipeline
     generates a usable recipe format.
     """
-    runner = InMemoryRunner(agent=recipe_pipeline, app_name=APP_NAME)
+    runner = InMemoryRunner(agent=get_agent("recipe_pipeline"), app_name=APP_NAME)
 
     # without await the session is not created and tests fail by session inexistant
     await runner.session_service.create_session(
@@ -54,11 +54,11 @@ async def test_recipe_pipeline_generates_valid_json():
 
 
 @pytest.mark.asyncio
-async def test_recipe_pipeline_includes_chicken_for_omnivore():
+async def test_recipe_pipeline_includes_chicken_for_omnivore(fake_backend):
     """
     Verify that the recipe_pipeline includes chicken when diet is set to 'omnivore'.
     """
-    runner = InMemoryRunner(agent=recipe_pipeline, app_name=APP_NAME)
+    runner = InMemoryRunner(agent=get_agent("recipe_pipeline"), app_name=APP_NAME)
     await runner.session_service.create_session(app_name=APP_NAME, user_id=USER_ID, session_id=SESSION_ID)
 
     final_response = None
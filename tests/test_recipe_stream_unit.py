@@ -0,0 +1,55 @@
+"""
+Unit Tests for the Streamed Recipe Pipeline
+-------------------------------------------
+
+Validates that stream_recipe_pipeline replays a cached result as one
+'stage' event per stage followed by the 'result' event, without running
+the agents, and that events serialize to the NDJSON/SSE wire format.
+"""
+
+import json
+import pytest
+
+from agents.recipe_pipeline import recipe_cache, stream_recipe_pipeline
+from models.diet_schemas import DietResponse
+from models.inventory_schemas import InventoryInput, InventoryResponse
+from models.pipeline_schemas import PipelineEvent, PipelineResult
+from models.planner_schemas import PlannerResponse, Step
+from services.response_cache import request_key
+
+
+@pytest.mark.asyncio
+async def test_cached_result_is_replayed_as_stage_events():
+    items, diet = ["tomato", "spinach"], "vegan"
+    result = PipelineResult(
+        recipe=PlannerResponse(title="Soup", ingredients=["tomato"], steps=[Step(step_number=1, instruction="Boil")]),
+        inventory=InventoryResponse(usable_items=items, diet=diet, message="ok"),
+        diet=DietResponse(compatible_items=items, suggested_recipe_ideas=["Soup"]),
+        stage_timings_ms={"total": 12.0},
+    )
+    recipe_cache.put(request_key(InventoryInput(items=items, diet=diet)), result)
+
+    events = [event async for event in stream_recipe_pipeline(items, diet)]
+
+    assert [(e.event, e.stage) for e in events] == [
+        ("stage", "inventory_agent"),
+        ("stage", "diet_agent"),
+        ("stage", "planner_agent"),
+        ("result", None),
+    ]
+    assert events[-1].data.cached is True
+    assert events[-1].data.recipe.title == "Soup"
+
+
+def test_event_serializes_typed_stage_output():
+    event = PipelineEvent(
+        event="stage",
+        stage="diet_agent",
+        data=DietResponse(compatible_items=["tomato"], suggested_recipe_ideas=["Soup"]),
+        elapsed_ms=5.0,
+    )
+
+    decoded = json.loads(event.model_dump_json())
+
+    assert decoded["event"] == "stage"
+    assert decoded["data"] == {"compatible_items": ["tomato"], "suggested_recipe_ideas": ["Soup"]}
@@ -0,0 +1,68 @@
+"""
+Unit Tests for the Response Cache
+---------------------------------
+
+Validates canonical request keys (item order, case and whitespace
+insensitive; recipe idea order kept),
+LRU and TTL eviction, and the hit/miss counters of ResponseCache.
+"""
+
+from models.diet_schemas import DietInput, DietResponse
+from models.inventory_schemas import InventoryInput
+from models.planner_schemas import PlannerInput
+from services.response_cache import ResponseCache, cache_stats, request_key
+
+
+def test_request_key_is_canonical():
+    a = DietInput(items=["Tomato", "spinach "], diet="Vegan")
+    b = DietInput(items=["spinach", "tomato", "tomato"], diet="vegan")
+    c = DietInput(items=["spinach", "tomato"], diet="keto")
+
+    assert request_key(a) == request_key(b)
+    assert request_key(a) != request_key(c)
+
+
+def test_request_key_keeps_the_order_of_recipe_ideas():
+    a = PlannerInput(compatible_items=["rice", "Beans"], suggested_recipe_ideas=["Chili", "Rice Bowl"], diet="vegan")
+    b = PlannerInput(compatible_items=["beans", "rice"], suggested_recipe_ideas=["Chili", "Rice Bowl"], diet="vegan")
+    c = PlannerInput(compatible_items=["rice", "beans"], suggested_recipe_ideas=["Rice Bowl", "Chili"], diet="vegan")
+
+    assert request_key(a) == request_key(b)
+    assert request_key(a) != request_key(c)
+
+
+def test_request_key_includes_payload_type():
+    items, diet = ["tomato"], "vegan"
+    assert request_key(DietInput(items=items, diet=diet)) != request_key(InventoryInput(items=items, diet=diet))
+
+
+def test_hits_and_misses_are_counted():
+    cache = ResponseCache("test_counts")
+    response = DietResponse(compatible_items=["tomato"], suggested_recipe_ideas=["Soup"])
+
+    assert cache.get("k") is None
+    cache.put("k", response)
+    assert cache.get("k") is response
+
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert "test_counts" in cache_stats()
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache("test_lru", max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entries_are_not_returned():
+    cache = ResponseCache("test_ttl", ttl_seconds=0)
+    cache.put("a", 1)
+
+    assert cache.get("a") is None
@@ -0,0 +1,111 @@
+"""
+Unit Tests for the on-disk Result Store
+---------------------------------------
+
+Validates the SQLite (WAL) result store shared between workers: lookups,
+visibility across independent connections (as separate uvicorn workers
+would have), size-based eviction, the running total size (no table scan
+per write) and the warm-start query.
+"""
+
+import sqlite3
+
+import pytest
+from services.result_store import ResultStore
+
+
+def test_put_and_get(tmp_path):
+    store = ResultStore(str(tmp_path / "results.db"))
+    store.put("k1", "recipe", '{"title": "Soup"}')
+
+    assert store.get("k1") == '{"title": "Soup"}'
+    assert store.get("missing") is None
+    store.close()
+
+
+def test_results_are_shared_between_workers(tmp_path):
+    path = str(tmp_path / "results.db")
+    worker_a, worker_b = ResultStore(path), ResultStore(path)
+
+    worker_a.put("k1", "recipe", "value-from-a")
+
+    assert worker_b.get("k1") == "value-from-a"
+    worker_a.close()
+    worker_b.close()
+
+
+def test_least_recently_accessed_rows_are_evicted_by_size(tmp_path):
+    store = ResultStore(str(tmp_path / "results.db"), max_bytes=250)
+    for i in range(5):
+        store.put(f"k{i}", "recipe", "x" * 100)
+
+    assert store.total_bytes() <= 250
+    assert store.get("k4") is not None
+    assert store.get("k0") is None
+    store.close()
+
+
+def _summed_size(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+
+def test_running_total_tracks_puts_replacements_and_evictions(tmp_path):
+    path = str(tmp_path / "results.db")
+    worker_a, worker_b = ResultStore(path, max_bytes=250), ResultStore(path, max_bytes=250)
+    worker_a.put("k0", "recipe", "x" * 100)
+    worker_b.put("k0", "recipe", "x" * 40)
+    worker_b.put("k1", "recipe", "x" * 100)
+    worker_a.put("k2", "recipe", "x" * 100)
+    assert worker_a.total_bytes() == worker_b.total_bytes() == _summed_size(path) == 240
+
+    worker_b.put("k3", "recipe", "x" * 100)
+    assert worker_a.total_bytes() == worker_b.total_bytes() == _summed_size(path) == 200
+    assert worker_a.get("k0") is None and worker_a.get("k1") is None
+    worker_a.close()
+    worker_b.close()
+
+
+def test_writes_under_budget_do_not_scan_the_table(tmp_path):
+    store = ResultStore(str(tmp_path / "results.db"))
+    statements = []
+    store._conn.set_trace_callback(statements.append)
+
+    store.put("k1", "recipe", "value")
+
+    assert not any("SUM(" in sql or "ORDER BY" in sql for sql in statements)
+    store.close()
+
+
+def test_total_is_seeded_from_an_existing_store(tmp_path):
+    path = str(tmp_path / "results.db")
+    store = ResultStore(path)
+    store.put("k1", "recipe", "x" * 10)
+    store.close()
+    with sqlite3.connect(path) as conn:
+        conn.executescript("DROP TABLE result_meta; DROP TRIGGER results_size_insert;")
+
+    reopened = ResultStore(path)
+    reopened.put("k2", "recipe", "x" * 5)
+
+    assert reopened.total_bytes() == 15
+    reopened.close()
+
+
+def test_recent_returns_newest_first(tmp_path):
+    store = ResultStore(str(tmp_path / "results.db"))
+    store.put("old", "recipe", "1")
+    store.put("new", "recipe", "2")
+    store.put("other", "diet", "3")
+
+    assert [key for key, _ in store.recent("recipe", 10)] == ["new", "old"]
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_async_helpers(tmp_path):
+    store = ResultStore(str(tmp_path / "results.db"))
+    await store.aput("k1", "recipe", "value")
+
+    assert await store.aget("k1") == "value"
+    store.close()
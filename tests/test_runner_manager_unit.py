@@ -0,0 +1,108 @@
+"""
+Unit Tests for the Runner pool
+------------------------------
+
+Validates that RunnerManager keeps one long-lived runner per agent, does
+not rebuild runners when traffic alternates between agents, that every
+runner uses the shared session store, and reports active invocations.
+Uses tiny local agents, no model calls.
+"""
+
+import asyncio
+import pytest
+from google.adk.agents import BaseAgent
+from config.app_config import session_service
+from runner_manager import RunnerManager
+
+
+class EchoAgent(BaseAgent):
+    async def _run_async_impl(self, ctx):
+        return
+        yield
+
+
+@pytest.mark.asyncio
+async def test_one_runner_per_agent_is_reused():
+    diet_like, pipeline_like = EchoAgent(name="diet_like"), EchoAgent(name="pipeline_like")
+    await RunnerManager.warm_up([diet_like, pipeline_like])
+
+    first_diet = RunnerManager.get_runner(diet_like)
+    first_pipeline = RunnerManager.get_runner(pipeline_like)
+
+    # Alternating traffic must not rebuild either runner
+    for _ in range(3):
+        assert await RunnerManager.init_runner(diet_like) is first_diet
+        assert await RunnerManager.init_runner(pipeline_like) is first_pipeline
+
+    await RunnerManager.shutdown_runner()
+
+
+@pytest.mark.asyncio
+async def test_active_invocations_are_counted():
+    agent = EchoAgent(name="counted")
+    release = asyncio.Event()
+    entered = []
+
+    async def invoke():
+        async with RunnerManager.invocation(agent):
+            entered.append(1)
+            await release.wait()
+
+    tasks = [asyncio.create_task(invoke()) for _ in range(3)]
+    while len(entered) < 3:
+        await asyncio.sleep(0)
+
+    assert RunnerManager.active_invocations()["counted"] == 3
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert RunnerManager.active_invocations()["counted"] == 0
+
+    await RunnerManager.shutdown_runner()
+
+
+@pytest.mark.asyncio
+async def test_get_runner_requires_initialization():
+    with pytest.raises(RuntimeError):
+        RunnerManager.get_runner(EchoAgent(name="never_started"))
+
+
+@pytest.mark.asyncio
+async def test_runners_share_one_session_store():
+    first, second = EchoAgent(name="first_shared"), EchoAgent(name="second_shared")
+    await RunnerManager.warm_up([first, second])
+
+    assert RunnerManager.get_runner(first).session_service is session_service
+    assert RunnerManager.get_runner(second).session_service is session_service
+
+    await RunnerManager.shutdown_runner()
+
+
+@pytest.mark.asyncio
+async def test_same_name_for_another_agent_is_rejected():
+    await RunnerManager.init_runner(EchoAgent(name="twin"))
+    with pytest.raises(ValueError):
+        await RunnerManager.init_runner(EchoAgent(name="twin"))
+
+    await RunnerManager.shutdown_runner()
+
+
+@pytest.mark.asyncio
+async def test_invocations_do_not_queue_in_front_of_admission():
+    agent = EchoAgent(name="unqueued")
+    release = asyncio.Event()
+    entered = []
+
+    async def invoke():
+        async with RunnerManager.invocation(agent):
+            entered.append(1)
+            await release.wait()
+
+    tasks = [asyncio.create_task(invoke()) for _ in range(200)]
+    for _ in range(10):
+        await asyncio.sleep(0)
+    assert len(entered) == 200
+
+    release.set()
+    await asyncio.gather(*tasks)
+    await RunnerManager.shutdown_runner()
@@ -0,0 +1,54 @@
+"""
+Unit Tests for the Session Manager
+----------------------------------
+
+Validates that every request gets its own short-lived session and that
+sessions are removed once the request is done, including when the request
+fails. These tests run fully in memory and do not call the model.
+"""
+
+import asyncio
+import pytest
+from google.adk.sessions import InMemorySessionService
+from config.app_config import APP_NAME, USER_ID
+from services.session_manager import request_session
+
+
+@pytest.mark.asyncio
+async def test_request_session_is_created_and_deleted():
+    service = InMemorySessionService()
+
+    async with request_session(service) as session_id:
+        session = await service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+        assert session is not None
+
+    assert await service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id) is None
+
+
+@pytest.mark.asyncio
+async def test_request_session_deleted_on_error():
+    service = InMemorySessionService()
+
+    with pytest.raises(RuntimeError):
+        async with request_session(service) as session_id:
+            raise RuntimeError("agent failed")
+
+    assert await service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id) is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_get_isolated_sessions():
+    service = InMemorySessionService()
+    seen = []
+
+    async def fake_request():
+        async with request_session(service) as session_id:
+            seen.append(session_id)
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(fake_request() for _ in range(150)))
+
+    # Every request had its own session and nothing is left behind
+    assert len(set(seen)) == 150
+    listed = await service.list_sessions(app_name=APP_NAME, user_id=USER_ID)
+    assert listed.sessions == []
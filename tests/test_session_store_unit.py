@@ -0,0 +1,69 @@
+"""
+Unit Tests for the Bounded Session Store
+----------------------------------------
+
+Validates event capping with state compaction, idle TTL expiry and LRU
+eviction in BoundedSessionService. Runs fully in memory.
+"""
+
+import pytest
+from google.adk.events import Event, EventActions
+from services.session_store import BoundedSessionService
+
+APP, USER = "agents", "test_user"
+
+
+def make_event(i: int) -> Event:
+    return Event(author="diet_agent", actions=EventActions(state_delta={"turn": i, f"key_{i}": i}))
+
+
+@pytest.mark.asyncio
+async def test_events_are_capped_and_state_is_kept():
+    service = BoundedSessionService(max_events=5)
+    session = await service.create_session(app_name=APP, user_id=USER)
+
+    for i in range(20):
+        await service.append_event(session, make_event(i))
+
+    stored = await service.get_session(app_name=APP, user_id=USER, session_id=session.id)
+    assert len(stored.events) == 5
+    assert [e.actions.state_delta["turn"] for e in stored.events] == [15, 16, 17, 18, 19]
+
+    # The state snapshot still reflects the compacted turns
+    assert stored.state["turn"] == 19
+    assert stored.state["key_0"] == 0
+    assert service.compacted_events == 15
+
+
+@pytest.mark.asyncio
+async def test_idle_sessions_expire():
+    service = BoundedSessionService(ttl_seconds=0)
+    session = await service.create_session(app_name=APP, user_id=USER)
+
+    assert await service.get_session(app_name=APP, user_id=USER, session_id=session.id) is None
+    assert service.evicted_sessions == 1
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_session_is_evicted():
+    service = BoundedSessionService(max_sessions=2)
+    first = await service.create_session(app_name=APP, user_id=USER)
+    second = await service.create_session(app_name=APP, user_id=USER)
+
+    # Touch the first session so the second becomes least recently used
+    await service.get_session(app_name=APP, user_id=USER, session_id=first.id)
+    await service.create_session(app_name=APP, user_id=USER)
+
+    assert await service.get_session(app_name=APP, user_id=USER, session_id=first.id) is not None
+    assert await service.get_session(app_name=APP, user_id=USER, session_id=second.id) is None
+
+
+@pytest.mark.asyncio
+async def test_delete_session_is_not_counted_as_eviction():
+    service = BoundedSessionService()
+    session = await service.create_session(app_name=APP, user_id=USER)
+
+    await service.delete_session(app_name=APP, user_id=USER, session_id=session.id)
+
+    assert await service.get_session(app_name=APP, user_id=USER, session_id=session.id) is None
+    assert service.evicted_sessions == 0